@@ -3,7 +3,6 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException, NoSuchElementException
-from bs4 import BeautifulSoup
 import csv
 import json
 import re
@@ -13,6 +12,12 @@ import sys
 from datetime import datetime
 import requests
 from urllib.parse import urljoin, urlparse
+from html_parsing import make_soup
+from page_cache import PageCache
+from page_waits import wait_for_page, print_wait_stats
+from run_metrics import get_metrics
+from snapshot_store import snapshot_mode, create_replay_driver, wrap_for_recording
+from browser_service import attach_browser_service
 
 class MMAFightScraper:
     """
@@ -27,6 +32,7 @@ class MMAFightScraper:
         self.base_url = "https://fightodds.io"
         self.events_data = {}
         self.fights_data = []
+        self.page_cache = PageCache()
         self.session = requests.Session()
         
         # Configure session headers to mimic browser
@@ -40,7 +46,21 @@ class MMAFightScraper:
         })
     
     def initialize_driver(self):
-        """Initialize undetected Chrome driver with stealth settings"""
+        """Initialize undetected Chrome driver with stealth settings.
+
+        SNAPSHOT_MODE=replay serves recorded pages without Chrome;
+        SNAPSHOT_MODE=record saves every fetched page (see snapshot_store).
+        BROWSER_SERVICE attaches to the warm browser service instead (browser_service.py).
+        """
+        if snapshot_mode() == 'replay':
+            self.driver = create_replay_driver()
+            return True
+
+        attached = attach_browser_service()
+        if attached:
+            self.driver = wrap_for_recording(attached)
+            return True
+
         print("🔧 Initializing stealth Chrome driver...")
         
         max_retries = 3
@@ -74,6 +94,7 @@ class MMAFightScraper:
                 
                 # Remove webdriver property
                 self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+                self.driver = wrap_for_recording(self.driver)
                 
                 print("   ✅ Chrome initialized successfully")
                 return True
@@ -87,13 +108,17 @@ class MMAFightScraper:
         
         return False
     
-    def load_page_with_retry(self, url, max_retries=3):
-        """Load page with retry logic and Cloudflare bypass"""
+    def load_page_with_retry(self, url, max_retries=3, page_type='events'):
+        """Load page with retry logic and Cloudflare bypass.
+
+        page_type selects the readiness condition and maximum wait in page_waits.
+        """
         for attempt in range(max_retries):
             try:
                 print(f"   🔄 Loading {url} - attempt {attempt + 1}/{max_retries}")
-                self.driver.get(url)
-                time.sleep(10)  # Wait for Cloudflare and page load
+                with get_metrics().timer('page_load_seconds', url_class=page_type):
+                    self.driver.get(url)
+                    wait_for_page(self.driver, page_type, max_wait=10.0)  # Wait for Cloudflare and page load
                 
                 # Check if we're past Cloudflare
                 page_source = self.driver.page_source
@@ -121,19 +146,24 @@ class MMAFightScraper:
         
         return None
     
-    def extract_ufc_events(self):
-        """Extract all UFC events from the upcoming events page"""
+    def extract_ufc_events(self, page_source=None):
+        """Extract all UFC events from the upcoming events page
+
+        page_source: the events page already loaded in self.driver (unified
+        pipeline); when given, the page is not loaded again.
+        """
         print("\n🔍 Phase 1: Extracting UFC Events")
         print("-" * 40)
         
-        events_url = f"{self.base_url}/upcoming-mma-events/ufc"
-        page_source = self.load_page_with_retry(events_url)
+        if page_source is None:
+            events_url = f"{self.base_url}/upcoming-mma-events/ufc"
+            page_source = self.load_page_with_retry(events_url)
         
         if not page_source:
             print("   ❌ Failed to load events page")
             return {}
         
-        soup = BeautifulSoup(page_source, 'html.parser')
+        soup = make_soup(page_source)
         events = {}
         
         try:
@@ -209,17 +239,23 @@ class MMAFightScraper:
         print(f"   📅 Total events found: {len(events)}")
         return events
     
-    def extract_event_fights(self, event_name, fights_url):
-        """Extract fight matchups from a specific event"""
+    def extract_event_fights(self, event_name, fights_url, page_source=None, soup=None):
+        """Extract fight matchups from a specific event
+
+        page_source/soup: the card page already fetched (and parsed) by the
+        unified pipeline; when given, the page is not loaded or parsed again.
+        """
         print(f"   🥊 Extracting fights from: {event_name}")
         
         try:
-            page_source = self.load_page_with_retry(fights_url)
+            if page_source is None:
+                page_source = self.page_cache.fetch(fights_url, lambda: self.load_page_with_retry(fights_url, page_type='fights'))
             if not page_source:
                 print(f"      ❌ Failed to load fights page for {event_name}")
                 return []
             
-            soup = BeautifulSoup(page_source, 'html.parser')
+            if soup is None:
+                soup = self.page_cache.soup(fights_url, page_source)
             fights = []
             
             # Define fighter vs fighter patterns
@@ -503,6 +539,8 @@ class MMAFightScraper:
             print("   🔧 This might be a network, browser, or parsing issue")
             return False
         finally:
+            print_wait_stats()
+            self.page_cache.print_stats()
             try:
                 if self.driver:
                     self.driver.quit()
@@ -1,7 +1,6 @@
 import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException, WebDriverException
-from bs4 import BeautifulSoup
 import requests
 import csv
 import json
@@ -9,9 +8,29 @@ import re
 import time
 import os
 import sys
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from datetime import datetime
 import platform
+from array import array
 from urllib.parse import urljoin
+from page_cache import PageCache, cached_load, cached_soup, load_page
+from MMAFightScraper import MMAFightScraper
+from change_detection import EventChangeTracker, change_detection_enabled, tables_signature, page_signature, roster_signature
+from odds_history import open_history_store
+from line_movement import update_line_movement
+from odds_parquet import parquet_root
+from validate_output import validate_run
+from odds_output import OddsOutputWriter
+from odds_matrix import odds_to_int16
+from change_feed import open_change_feed
+from run_metrics import get_metrics, reset_metrics
+from page_waits import wait_for_page, wait_for_dom_stable, print_wait_stats, wait_stats_summary, record_wait, ReadinessTracker, PAGE_MAX_WAIT, POLL_INTERVAL
+from staged_pipeline import StagedPipeline
+from snapshot_store import snapshot_mode, create_replay_driver, wrap_for_recording
+from browser_service import attach_browser_service
 try:
     import winreg  # type: ignore
 except Exception:
@@ -24,11 +43,17 @@ try:
 except Exception:
     pass
 
-def odds_market_combo(debug_mode=False):
+def odds_market_combo(debug_mode=False, pool_size=None, unified=None):
     """
     LulSec OddsMarketCombo - Clean UFC odds extraction
     Outputs: OddsMarketCombo.csv (overwrites each run)
     Outputs: OddsMarketCombo.json (overwrites each run)
+    Returns the number of fighter rows extracted (0 on failure).
+
+    pool_size: number of Chrome drivers used for per-event extraction
+    (defaults to the DRIVER_POOL_SIZE env var, 1 = serial).
+    unified: also build MMAFights.csv/.json in this browser session and reuse
+    its card pages for the odds pass (defaults to the UNIFIED_PIPELINE env var).
     """
     print("🏴‍☠️ LulSec OddsMarketCombo - fightodds.io")
     print("=" * 50)
@@ -38,6 +63,323 @@ def odds_market_combo(debug_mode=False):
         print("🔍 DEBUG MODE ENABLED - Enhanced logging active")
         print("=" * 50)
     
+    metrics = reset_metrics('odds_market_combo')
+    driver = create_chrome_driver()
+    metrics.lap('browser_start')
+
+    if not driver:
+        print("   ❌ Chrome driver initialization failed - cannot proceed")
+        metrics.finish(False)
+        metrics.write_outputs()
+        return 0
+
+    history = None
+    feed = None
+    output_writer = None
+    page_cache = PageCache()
+    events_url = "https://fightodds.io/upcoming-mma-events/ufc"
+    success = False
+    try:
+        print("\n🔍 Phase 1: Loading UFC Events Page")
+        print("-" * 40)
+        
+        # Navigate to the real UFC events page with retry logic
+        max_page_retries = 3
+        page_loaded = False
+        
+        for page_attempt in range(max_page_retries):
+            try:
+                print(f"   🔄 Loading page attempt {page_attempt + 1}/{max_page_retries}")
+                with metrics.timer('page_load_seconds', url_class='events'):
+                    driver.get(events_url)
+                    wait_for_page(driver, 'events')  # Wait for Cloudflare and page load
+                
+                # Check if we're past Cloudflare
+                page_source = driver.page_source
+                if 'cloudflare' in page_source.lower() and 'checking your browser' in page_source.lower():
+                    print(f"   ⏳ Still in Cloudflare challenge on attempt {page_attempt + 1}")
+                    if page_attempt < max_page_retries - 1:
+                        time.sleep(15)  # Wait longer before retry
+                        continue
+                    else:
+                        print("   ❌ Failed to bypass Cloudflare after all attempts")
+                        return 0
+                else:
+                    page_loaded = True
+                    break
+                    
+            except TimeoutException:
+                print(f"   ⏰ Page load timeout on attempt {page_attempt + 1}")
+                if page_attempt == max_page_retries - 1:
+                    print("   ❌ Page failed to load after all attempts")
+                    return 0
+            except WebDriverException as e:
+                print(f"   ❌ WebDriver error on attempt {page_attempt + 1}: {str(e)}")
+                if page_attempt == max_page_retries - 1:
+                    return 0
+        
+        if not page_loaded:
+            print("   ❌ Failed to load page successfully")
+            return 0
+        
+        print("   ✅ Past Cloudflare - extracting events...")
+        
+        # Phase 2: Extract all UFC events from the page
+        print("\n🔍 Phase 2: Extracting All UFC Events")
+        print("-" * 40)
+        
+        expand_events_listing(driver)
+        page_source = driver.page_source
+        metrics.lap('events_page')
+        page_cache.put(events_url, page_source)
+        soup = cached_soup(page_cache, events_url, page_source)
+
+        # Validate that the odds page header/token matches this event (e.g., 'UFC 319')
+        try:
+            header_txt = ''
+            title_el = soup.find('title')
+            if title_el and title_el.get_text():
+                header_txt = title_el.get_text(' ', strip=True)
+            if not header_txt:
+                h = soup.find(['h1','h2'])
+                if h:
+                    header_txt = h.get_text(' ', strip=True)
+            token = event_name
+            mnum = re.search(r'(UFC\s+\d+)', event_name, re.I)
+            if mnum:
+                token = mnum.group(1)
+            if token and token.upper() not in (header_txt or '').upper():
+                print(f"      ⚠️ Skipping odds page (header mismatch): expected token '{token}', got '{header_txt[:100]}'")
+                debug_save_html(event_id, 'odds_header_mismatch', page_source)
+                return 0
+        except Exception:
+            pass
+
+        # Optional: load pre-scraped FIGHTS index from MMAFights.csv to enforce rosters and dates.
+        # Unified mode scrapes MMAFights in this session first and keeps the card pages it fetched.
+        if unified is None:
+            unified = unified_pipeline_enabled()
+        if unified:
+            fights_index_by_id = build_fights_index_in_session(driver, page_source, page_cache)
+        else:
+            fights_index_by_id = load_fights_index_from_csv('MMAFights.csv')
+        metrics.lap('roster_index')
+        metrics.set('roster_index_events', len(fights_index_by_id))
+        date_cache = EventDateCache()
+
+        # Note: header token validation is performed per-event during odds extraction
+        ufc_events = discover_events(driver, soup, fights_index_by_id, date_cache, page_cache)
+        metrics.lap('discovery')
+        metrics.set('events_discovered', len(ufc_events))
+        
+        # Phase 3: Extract fighter data from each event
+        print("\n🔍 Phase 3: Extracting Fighter Data from Each Event")
+        print("-" * 40)
+        
+        if pool_size is None:
+            try:
+                pool_size = int(os.getenv('DRIVER_POOL_SIZE', '1'))
+            except ValueError:
+                pool_size = 1
+        try:
+            pipeline_workers = int(os.getenv('PIPELINE_WORKERS', '0'))
+            pipeline_queue_size = int(os.getenv('PIPELINE_QUEUE_SIZE', '2'))
+        except ValueError:
+            pipeline_workers, pipeline_queue_size = 0, 2
+        change_tracker = EventChangeTracker() if change_detection_enabled() else None
+
+        # Each finished event is de-duped, bleed-guarded and spooled to disk right away (see odds_output.py)
+        csv_file = "OddsMarketCombo.csv"
+        json_file = "OddsMarketCombo.json"
+        run_id = f"lulsec_{int(time.time())}"
+        current_timestamp = datetime.now().isoformat()
+        history = open_history_store()
+        feed = open_change_feed()
+        if feed and not history:
+            print("   ⚠️  Change feed needs the odds history store (ODDS_HISTORY_DB) - no changes will be emitted")
+        output_writer = OddsOutputWriter(csv_file, json_file, run_id=run_id, started_at=current_timestamp, history=history, feed=feed)
+        extract_all_event_fighters(
+            driver, ufc_events, fights_index_by_id, pool_size=pool_size, change_tracker=change_tracker,
+            page_cache=page_cache, pipeline_workers=pipeline_workers, pipeline_queue_size=pipeline_queue_size,
+            on_event=lambda event_name, event_fighters: output_writer.add_event(event_name, event_fighters, ufc_events)
+        )
+        event_keys = [data.get('event_id') or name for name, data in ufc_events.items()]
+        if change_tracker:
+            change_tracker.prune(event_keys)
+            change_tracker.save()
+            print(f"   ♻️ Change detection: {len(change_tracker.reused)} event(s) unchanged, {len(change_tracker.changed)} re-extracted")
+            metrics.set('events_reused', len(change_tracker.reused))
+        metrics.lap('odds_extraction')
+
+        # Phase 4: Create OddsMarketCombo.csv and .json
+        print("\n🔍 Phase 4: Creating OddsMarketCombo Files")
+        print("-" * 40)
+        
+        total_fighters = output_writer.total_fighters
+        if not total_fighters:
+            print("   ❌ No fighter data extracted - cannot create files")
+            output_writer.discard()
+            return 0
+
+        # Always overwrite OddsMarketCombo.csv (unless change detection says nothing moved)
+        if change_tracker and change_tracker.nothing_changed(event_keys) and os.path.exists(csv_file) and os.path.exists(json_file):
+            print("   ♻️ No event changed since last run - keeping existing OddsMarketCombo.csv/.json")
+            output_writer.discard()
+            metrics.lap('output')
+            success = True
+            return total_fighters
+
+        # Header is the union of sportsbooks across all kept fighters; rows come from the
+        # run's odds matrix (the same lines the history store recorded per event)
+        output_writer.finalize(ufc_events, fights_index_by_id)
+        if output_writer.history:
+            print(f"   🗄️  History: {output_writer.history_appended} changed line(s) appended to {output_writer.history.path}")
+            metrics.set('history_lines_appended', output_writer.history_appended)
+        if output_writer.feed:
+            print(f"   📰 Change feed: {output_writer.feed_records} record(s) appended to {output_writer.feed.path}")
+            metrics.set('change_feed_records', output_writer.feed_records)
+        if output_writer.analytics is not None:
+            if output_writer.analytics_csv_written:
+                print(f"   ✅ {output_writer.analytics_csv_path} created/updated ({len(output_writer.analytics)} fights)")
+            metrics.set('arbitrage_opportunities', output_writer.analytics.arbitrage_count())
+        if output_writer.parquet_files:
+            print(f"   🧱 Parquet: {len(output_writer.parquet_files)} partition file(s) under {parquet_root()}/")
+        validation = validate_run(output_writer.matrix)
+        if validation:
+            metrics.set('validation_failures', len(validation['failures']))
+        movement = update_line_movement(output_writer.history, ufc_events)
+        if movement:
+            metrics.set('line_moves', movement[0])
+            metrics.set('steam_signals', movement[1])
+        metrics.lap('output')
+        metrics.set('fighters_written', total_fighters)
+        success = True
+        if change_tracker:
+            change_tracker.mark_written(event_keys)
+            change_tracker.save()
+        
+        print(f"   ✅ OddsMarketCombo.csv created/updated")
+        print(f"   ✅ OddsMarketCombo.json created/updated")
+        print(f"   📊 Total fighters: {total_fighters}")
+        print(f"   📅 Total events: {len(ufc_events)}")
+        print(f"   🕐 Extraction timestamp: {current_timestamp}")
+        print(f"   🆔 Run ID: {run_id}")
+        
+        return total_fighters
+        
+    except KeyboardInterrupt:
+        print("\n🛑 Extraction interrupted by user")
+        return 0
+    except Exception as main_error:
+        print(f"\n💥 Main extraction error: {str(main_error)}")
+        print("   🔧 This might be a network, browser, or parsing issue")
+        return 0
+    finally:
+        if output_writer:
+            output_writer.abort()
+        if history:
+            history.close()
+        if feed:
+            feed.close()
+        print_wait_stats()
+        page_cache.print_stats()
+        try:
+            if driver:
+                driver.quit()
+                print("   🔒 Chrome driver closed")
+        except Exception as cleanup_error:
+            print(f"   ⚠️  Driver cleanup warning: {str(cleanup_error)}")
+        record_run_metrics(metrics, page_cache, success)
+
+def expand_events_listing(driver):
+    """Reveal all events on a loaded listing page: scroll and click 'More Events' until nothing changes."""
+    try:
+        for _ in range(5):
+            try:
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                wait_for_dom_stable(driver, max_wait=1.0)
+                more_btns = driver.find_elements(By.XPATH, "//a[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'), 'more events')]")
+                if not more_btns:
+                    break
+                clicked_any = False
+                for btn in more_btns:
+                    try:
+                        btn.click()
+                        clicked_any = True
+                        wait_for_dom_stable(driver, max_wait=1.0)
+                    except Exception:
+                        continue
+                if not clicked_any:
+                    break
+            except Exception:
+                break
+    except Exception:
+        pass
+
+def discover_events(driver, soup, fights_index_by_id, date_cache, page_cache=None):
+    """Phase 2 discovery: events of the UFC listing (+ the generic listing when few are found),
+    merged with the events of the fights index that the listings missed."""
+    ufc_events = extract_ufc_events_from_page(driver, soup, fights_index_by_id, date_cache, page_cache)
+    # Fallback: also try the generic upcoming events page if few were found
+    if len(ufc_events) < 5:
+        try:
+            generic_url = "https://fightodds.io/upcoming-mma-events"
+            generic_source = cached_load(page_cache, driver, generic_url, 'events', max_wait=5.0)
+            generic_soup = cached_soup(page_cache, generic_url, generic_source)
+            extra_events = extract_ufc_events_from_page(driver, generic_soup, fights_index_by_id, date_cache, page_cache)
+            # Merge
+            for k, v in extra_events.items():
+                if k not in ufc_events:
+                    ufc_events[k] = v
+        except Exception:
+            pass
+    date_cache.save()
+    print(f"   📅 Found {len(ufc_events)} UFC events")
+
+    if fights_index_by_id:
+        print(f"   🗂️  Loaded fights index for {len(fights_index_by_id)} events from MMAFights.csv")
+        # Merge any events from fights index that were missed during discovery
+        for eid, meta in fights_index_by_id.items():
+            name = meta.get('event')
+            if not name:
+                continue
+            if name not in ufc_events:
+                ufc_events[name] = {
+                    'event_url': meta.get('event_url',''),
+                    'odds_url': meta.get('odds_url',''),
+                    'event_id': eid,
+                    'event_date': meta.get('event_date','')
+                }
+        print(f"   ➕ After merge from fights index: {len(ufc_events)} events")
+    return ufc_events
+
+def record_run_metrics(metrics, page_cache, success):
+    """Fold the page-cache and wait summaries into the run metrics and write the report/textfile."""
+    cache = page_cache.stats()
+    metrics.inc('page_cache_requests_total', cache['hits'], result='hit')
+    metrics.inc('page_cache_requests_total', cache['misses'], result='miss')
+    metrics.inc('page_cache_evictions_total', cache['evictions'])
+    for page_type, entry in wait_stats_summary().items():
+        metrics.set('page_wait_seconds_total', entry['total_s'], page_type=page_type)
+        metrics.set('page_wait_timeouts', entry['timeouts'], page_type=page_type)
+    metrics.finish(success)
+    metrics.write_outputs()
+
+def create_chrome_driver():
+    """Launch one undetected Chrome driver with the stealth options, retrying on failure.
+
+    Returns the driver, or None when every attempt failed. With SNAPSHOT_MODE=replay
+    a Chrome-free ReplayDriver is returned instead; with SNAPSHOT_MODE=record the
+    driver is wrapped so every fetched page is saved to the snapshot store.
+    With BROWSER_SERVICE set, attaches to the warm browser service (browser_service.py).
+    """
+    if snapshot_mode() == 'replay':
+        return create_replay_driver()
+
+    attached = attach_browser_service()
+    if attached:
+        return wrap_for_recording(attached)
+
     # Chrome configuration will be created fresh for each retry attempt
     
     # Try to initialize Chrome with retry logic
@@ -118,6 +460,11 @@ def odds_market_combo(debug_mode=False):
                 setattr(driver, '__del__', lambda: None)
             except Exception:
                 pass
+            # Remove webdriver property
+            try:
+                driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            except Exception:
+                pass
             print("   ✅ Chrome initialized successfully")
             break
         except Exception as e:
@@ -125,286 +472,161 @@ def odds_market_combo(debug_mode=False):
             if attempt == max_retries - 1:
                 print("   💀 All Chrome initialization attempts failed!")
                 print("   🔧 This might be a Chrome/driver/profile issue")
-                return []
+                return None
             time.sleep(5)
-    
-    if not driver:
-        print("   ❌ Chrome driver initialization failed - cannot proceed")
-        return []
-        
+
+    return wrap_for_recording(driver)
+
+def extract_single_event(driver, event_name, event_data, fights_index_by_id=None, change_tracker=None, page_cache=None, page_source=None, driver_lock=None):
+    """Phase 3 work unit: extract one event's fighters on the given driver."""
+    print(f"   🎯 Extracting: {event_name}")
+    metrics = get_metrics()
+    started = time.monotonic()
+    # Set up front so the finally block also works when KeyboardInterrupt/SystemExit escapes
+    outcome = 'error'
+    event_fighters = []
     try:
-        # Remove webdriver property
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        
-        print("\n🔍 Phase 1: Loading UFC Events Page")
-        print("-" * 40)
-        
-        # Navigate to the real UFC events page with retry logic
-        max_page_retries = 3
-        page_loaded = False
-        
-        for page_attempt in range(max_page_retries):
-            try:
-                print(f"   🔄 Loading page attempt {page_attempt + 1}/{max_page_retries}")
-                driver.get("https://fightodds.io/upcoming-mma-events/ufc")
-                time.sleep(10)  # Wait for Cloudflare and page load
-                
-                # Check if we're past Cloudflare
-                page_source = driver.page_source
-                if 'cloudflare' in page_source.lower() and 'checking your browser' in page_source.lower():
-                    print(f"   ⏳ Still in Cloudflare challenge on attempt {page_attempt + 1}")
-                    if page_attempt < max_page_retries - 1:
-                        time.sleep(15)  # Wait longer before retry
-                        continue
-                    else:
-                        print("   ❌ Failed to bypass Cloudflare after all attempts")
-                        return []
-                else:
-                    page_loaded = True
-                    break
-                    
-            except TimeoutException:
-                print(f"   ⏰ Page load timeout on attempt {page_attempt + 1}")
-                if page_attempt == max_page_retries - 1:
-                    print("   ❌ Page failed to load after all attempts")
-                    return []
-            except WebDriverException as e:
-                print(f"   ❌ WebDriver error on attempt {page_attempt + 1}: {str(e)}")
-                if page_attempt == max_page_retries - 1:
-                    return []
-        
-        if not page_loaded:
-            print("   ❌ Failed to load page successfully")
-            return []
-        
-        print("   ✅ Past Cloudflare - extracting events...")
-        
-        # Phase 2: Extract all UFC events from the page
-        print("\n🔍 Phase 2: Extracting All UFC Events")
-        print("-" * 40)
-        
-        # Try to reveal all events (click 'More Events' and scroll)
-        try:
-            for _ in range(5):
-                try:
-                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(1)
-                    more_btns = driver.find_elements(By.XPATH, "//a[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'), 'more events')]")
-                    if not more_btns:
-                        break
-                    clicked_any = False
-                    for btn in more_btns:
-                        try:
-                            btn.click()
-                            clicked_any = True
-                            time.sleep(1)
-                        except Exception:
-                            continue
-                    if not clicked_any:
-                        break
-                except Exception:
-                    break
-        except Exception:
-            pass
+        event_fighters = extract_event_fighters_from_odds(
+            driver,
+            event_data['odds_url'],
+            event_name,
+            event_data.get('event_date', ''),
+            event_data.get('event_url',''),
+            event_id=event_data.get('event_id'),
+            fights_index_by_id=fights_index_by_id,
+            change_tracker=change_tracker,
+            page_cache=page_cache,
+            page_source=page_source,
+            driver_lock=driver_lock
+        )
+        print(f"      ✅ {event_name}: found {len(event_fighters)} fighters")
+        outcome = 'ok' if event_fighters else 'empty'
+        return event_fighters
+    except Exception as e:
+        print(f"      ❌ Error ({event_name}): {str(e)}")
+        return []
+    finally:
+        seconds = time.monotonic() - started
+        metrics.observe('event_extract_seconds', seconds)
+        metrics.inc('events_total', outcome=outcome)
+        metrics.record_event(event=event_name, event_id=event_data.get('event_id'), seconds=round(seconds, 3),
+                             outcome=outcome, fighters=len(event_fighters))
+
+def extract_all_event_fighters(driver, ufc_events, fights_index_by_id=None, pool_size=1, change_tracker=None, on_event=None, page_cache=None, pipeline_workers=0, pipeline_queue_size=2):
+    """Run Phase 3 over every event, optionally across a bounded pool of Chrome drivers.
+
+    The given driver is always part of the pool; up to pool_size - 1 extra drivers
+    are launched and closed here. Results are delivered in ufc_events order
+    regardless of completion order, so the Phase 4 de-dup and cross-event bleed
+    guard see exactly what a serial run would produce.
+
+    on_event(event_name, fighters) is called as soon as an event and all events
+    before it are done (pooled completions are buffered until their turn); the
+    rows are then not accumulated here. Without it the concatenated rows are returned.
+
+    pipeline_workers > 0 switches to the staged pipeline (staged_pipeline.py): the
+    drivers only fetch /odds pages, pipeline_workers threads parse, match and
+    merge them, and a writer thread delivers results, joined by queues of
+    pipeline_queue_size.
+    """
+    items = list(ufc_events.items())
+    pool_size = max(1, min(pool_size or 1, len(items)))
+    all_fighter_data = []
 
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
+    def deliver(event_name, event_fighters):
+        if on_event:
+            on_event(event_name, event_fighters)
+        else:
+            all_fighter_data.extend(event_fighters)
 
-        # Validate that the odds page header/token matches this event (e.g., 'UFC 319')
-        try:
-            header_txt = ''
-            title_el = soup.find('title')
-            if title_el and title_el.get_text():
-                header_txt = title_el.get_text(' ', strip=True)
-            if not header_txt:
-                h = soup.find(['h1','h2'])
-                if h:
-                    header_txt = h.get_text(' ', strip=True)
-            token = event_name
-            mnum = re.search(r'(UFC\s+\d+)', event_name, re.I)
-            if mnum:
-                token = mnum.group(1)
-            if token and token.upper() not in (header_txt or '').upper():
-                print(f"      ⚠️ Skipping odds page (header mismatch): expected token '{token}', got '{header_txt[:100]}'")
-                debug_save_html(event_id, 'odds_header_mismatch', page_source)
-                return []
-        except Exception:
-            pass
+    if pool_size == 1 and not pipeline_workers:
+        for event_name, event_data in items:
+            deliver(event_name, extract_single_event(driver, event_name, event_data, fights_index_by_id, change_tracker, page_cache))
+        return all_fighter_data
 
-        # Note: header token validation is performed per-event during odds extraction
-        ufc_events = extract_ufc_events_from_page(driver, soup)
-        # Fallback: also try the generic upcoming events page if few were found
-        if len(ufc_events) < 5:
+    extra_drivers = []
+    if pool_size > 1:
+        print(f"   🧵 Driver pool: launching {pool_size - 1} extra Chrome driver(s)")
+        for _ in range(pool_size - 1):
+            extra = create_chrome_driver()
+            if extra:
+                extra_drivers.append(extra)
+
+    try:
+        if pipeline_workers:
+            run_staged_event_pipeline([driver] + extra_drivers, items, fights_index_by_id, change_tracker, page_cache,
+                                      deliver, pipeline_workers, pipeline_queue_size)
+            return all_fighter_data
+
+        idle_drivers = queue.Queue()
+        for d in [driver] + extra_drivers:
+            idle_drivers.put(d)
+
+        def work(event_name, event_data):
+            d = idle_drivers.get()
             try:
-                driver.get("https://fightodds.io/upcoming-mma-events")
-                time.sleep(5)
-                generic_source = driver.page_source
-                generic_soup = BeautifulSoup(generic_source, 'html.parser')
-                extra_events = extract_ufc_events_from_page(driver, generic_soup)
-                # Merge
-                for k, v in extra_events.items():
-                    if k not in ufc_events:
-                        ufc_events[k] = v
+                return extract_single_event(d, event_name, event_data, fights_index_by_id, change_tracker, page_cache)
+            finally:
+                idle_drivers.put(d)
+
+        finished = {}
+        next_index = 0
+        with ThreadPoolExecutor(max_workers=1 + len(extra_drivers)) as executor:
+            futures = {executor.submit(work, name, data): i for i, (name, data) in enumerate(items)}
+            for future in as_completed(futures):
+                try:
+                    finished[futures[future]] = future.result()
+                except Exception as e:
+                    print(f"      ❌ Error: {str(e)}")
+                    finished[futures[future]] = []
+                while next_index in finished:
+                    deliver(items[next_index][0], finished.pop(next_index))
+                    next_index += 1
+    finally:
+        for d in extra_drivers:
+            try:
+                d.quit()
             except Exception:
                 pass
-        print(f"   📅 Found {len(ufc_events)} UFC events")
-
-        # Optional: load pre-scraped FIGHTS index from MMAFights.csv to enforce rosters and dates
-        fights_index_by_id = load_fights_index_from_csv('MMAFights.csv')
-        if fights_index_by_id:
-            print(f"   🗂️  Loaded fights index for {len(fights_index_by_id)} events from MMAFights.csv")
-            # Merge any events from fights index that were missed during discovery
-            for eid, meta in fights_index_by_id.items():
-                name = meta.get('event')
-                if not name:
-                    continue
-                if name not in ufc_events:
-                    ufc_events[name] = {
-                        'event_url': meta.get('event_url',''),
-                        'odds_url': meta.get('odds_url',''),
-                        'event_id': eid,
-                        'event_date': meta.get('event_date','')
-                    }
-            print(f"   ➕ After merge from fights index: {len(ufc_events)} events")
-        
-        # Phase 3: Extract fighter data from each event
-        print("\n🔍 Phase 3: Extracting Fighter Data from Each Event")
-        print("-" * 40)
-        
-        all_fighter_data = []
-        
-        for event_name, event_data in ufc_events.items():
-            print(f"   🎯 Extracting: {event_name}")
-            
-            # Get odds page URL and event date
-            odds_url = event_data['odds_url']
-            event_date = event_data.get('event_date', '')
-            try:
-                event_fighters = extract_event_fighters_from_odds(
-                    driver,
-                    odds_url,
-                    event_name,
-                    event_date,
-                    event_data.get('event_url',''),
-                    event_id=event_data.get('event_id'),
-                    fights_index_by_id=fights_index_by_id
-                )
-                all_fighter_data.extend(event_fighters)
-                print(f"      ✅ Found {len(event_fighters)} fighters")
-            except Exception as e:
-                print(f"      ❌ Error: {str(e)}")
-        
-        # Phase 4: Create OddsMarketCombo.csv and .json
-        print("\n🔍 Phase 4: Creating OddsMarketCombo Files")
-        print("-" * 40)
-        
-        if not all_fighter_data:
-            print("   ❌ No fighter data extracted - cannot create files")
-            return []
-            
-        if all_fighter_data:
-            # De-duplicate by (Event, Fighter)
-            dedup_map = {}
-            for f in all_fighter_data:
-                dedup_key = (f.get('event',''), f.get('fighter',''))
-                if dedup_key not in dedup_map:
-                    dedup_map[dedup_key] = f
-            all_fighter_data = list(dedup_map.values())
-
-            # Prevent cross-event bleed: ensure a fighter belongs to only one event
-            fighter_seen_event = {}
-            filtered = []
-            for f in all_fighter_data:
-                name = f.get('fighter','')
-                ev = f.get('event','')
-                if name not in fighter_seen_event:
-                    fighter_seen_event[name] = ev
-                    filtered.append(f)
-                else:
-                    if fighter_seen_event[name] != ev:
-                        print(f"   🚫 Cross-event bleed: '{name}' already under '{fighter_seen_event[name]}', dropping from '{ev}'")
-            all_fighter_data = filtered
-
-            # Union of sportsbooks across all fighters for stable headers
-            sportsbooks = []
-            seen_books = set()
-            for f in all_fighter_data:
-                for b in f.get('odds', {}).keys():
-                    if b not in seen_books:
-                        seen_books.add(b)
-                        sportsbooks.append(b)
-            
-            # Always overwrite OddsMarketCombo.csv
-            csv_file = "OddsMarketCombo.csv"
-            
-            with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                
-                # Create headers with EventDate column
-                headers = ['Fighter', 'Event', 'EventDate', 'FightOrder', 'Source'] + sportsbooks
-                writer.writerow(headers)
-                
-                # Write all fighter data
-                for fighter_data in all_fighter_data:
-                    row = [
-                        fighter_data['fighter'],
-                        fighter_data['event'],
-                        fighter_data.get('event_date', ''),
-                        fighter_data.get('fight_order', ''),
-                        fighter_data['source']
-                    ]
-                    
-                    for sportsbook in sportsbooks:
-                        odds = fighter_data['odds'].get(sportsbook, '')
-                        row.append(odds)
-                    
-                    writer.writerow(row)
-            
-            # Create JSON backup with fresh timestamp
-            json_file = "OddsMarketCombo.json"
-            current_timestamp = datetime.now().isoformat()
-            json_data = {
-                'extraction_timestamp': current_timestamp,
-                'extraction_run_id': f"lulsec_{int(time.time())}",
-                'total_fighters': len(all_fighter_data),
-                'total_events': len(ufc_events),
-                'sportsbooks': sportsbooks,
-                'events': ufc_events,
-                'fighters': all_fighter_data
-            }
-            
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, indent=2)
-            
-            print(f"   ✅ OddsMarketCombo.csv created/updated")
-            print(f"   ✅ OddsMarketCombo.json created/updated")
-            print(f"   📊 Total fighters: {len(all_fighter_data)}")
-            print(f"   📅 Total events: {len(ufc_events)}")
-            print(f"   🕐 Extraction timestamp: {current_timestamp}")
-            print(f"   🆔 Run ID: lulsec_{int(time.time())}")
-        
-        return all_fighter_data
-        
-    except KeyboardInterrupt:
-        print("\n🛑 Extraction interrupted by user")
-        return []
-    except Exception as main_error:
-        print(f"\n💥 Main extraction error: {str(main_error)}")
-        print("   🔧 This might be a network, browser, or parsing issue")
-        return []
-    finally:
-        try:
-            if driver:
-                driver.quit()
-                print("   🔒 Chrome driver closed")
-        except Exception as cleanup_error:
-            print(f"   ⚠️  Driver cleanup warning: {str(cleanup_error)}")
+        if extra_drivers:
+            print(f"   🔒 Closed {len(extra_drivers)} pooled Chrome driver(s)")
+
+    return all_fighter_data
+
+def run_staged_event_pipeline(drivers, items, fights_index_by_id, change_tracker, page_cache, deliver, workers, queue_size):
+    """Phase 3 as fetch -> extract -> write stages (see staged_pipeline.py).
 
-def extract_ufc_events_from_page(driver, soup):
+    Each driver gets a fetch thread that loads /odds pages ahead; the extract
+    workers run extract_single_event() on the fetched HTML and borrow the
+    fetching driver (under its lock) only for /fights or pair-link loads.
+    """
+    fetch_workers = [(d, threading.Lock()) for d in drivers]
+
+    def fetch(worker, item):
+        d, lock = worker
+        event_name, event_data = item
+        print(f"   📥 Fetching: {event_name}")
+        with lock:
+            return fetch_odds_page(d, event_data['odds_url'], page_cache)
+
+    def extract(worker, item, page_source):
+        d, lock = worker
+        event_name, event_data = item
+        return extract_single_event(d, event_name, event_data, fights_index_by_id, change_tracker, page_cache,
+                                    page_source=page_source, driver_lock=lock)
+
+    pipeline = StagedPipeline(fetch, extract, lambda item, result: deliver(item[0], result or []),
+                              extract_workers=workers, queue_size=queue_size)
+    pipeline.run(items, fetch_workers)
+    pipeline.print_stats()
+    return pipeline
+
+def extract_ufc_events_from_page(driver, soup, fights_index_by_id=None, date_cache=None, page_cache=None):
     """Extract all UFC events from the events page, with dates.
 
-    Uses static HTML via BeautifulSoup to avoid stale element references, then
-    optionally opens individual event pages to fetch accurate dates.
+    Uses static HTML via BeautifulSoup to avoid stale element references. When
+    the row has no date, resolve_event_date() tries the on-disk date cache and
+    the MMAFights.csv index before opening the event page.
     """
     ufc_events = {}
 
@@ -454,7 +676,7 @@ def extract_ufc_events_from_page(driver, soup):
                 except Exception:
                     pass
                 if not event_date:
-                    event_date = extract_event_date_from_event_page(driver, event_url) or extract_event_date(clean_name) or ''
+                    event_date = resolve_event_date(driver, event_id, event_url, fights_index_by_id, date_cache, page_cache) or extract_event_date(clean_name) or ''
 
                 if clean_name not in ufc_events:
                     ufc_events[clean_name] = {
@@ -511,7 +733,7 @@ def extract_ufc_events_from_page(driver, soup):
                     pass
 
                 if not event_date:
-                    event_date = extract_event_date_from_event_page(driver, event_url) or extract_event_date(clean_match) or ''
+                    event_date = resolve_event_date(driver, event_id, event_url, fights_index_by_id, date_cache, page_cache) or extract_event_date(clean_match) or ''
                 ufc_events[clean_match] = {
                     'event_url': event_url,
                     'odds_url': odds_url,
@@ -525,16 +747,97 @@ def extract_ufc_events_from_page(driver, soup):
 
     return ufc_events
 
-def extract_event_date_from_event_page(driver, event_url):
+class EventDateCache:
+    """On-disk cache of normalized event dates keyed by event_id, with a TTL.
+
+    Path and TTL come from EVENT_DATE_CACHE (default: event_date_cache.json) and
+    EVENT_DATE_CACHE_TTL_HOURS (default: 72).
+    """
+
+    def __init__(self, path=None, ttl_hours=None):
+        self.path = path or os.getenv('EVENT_DATE_CACHE', 'event_date_cache.json')
+        if ttl_hours is None:
+            try:
+                ttl_hours = float(os.getenv('EVENT_DATE_CACHE_TTL_HOURS', '72'))
+            except ValueError:
+                ttl_hours = 72.0
+        self.ttl_seconds = ttl_hours * 3600
+        self.entries = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except Exception:
+            self.entries = {}
+
+    def get(self, event_id):
+        """Return the cached date for event_id, or '' if missing or expired."""
+        if not event_id:
+            return ''
+        with self._lock:
+            entry = self.entries.get(str(event_id))
+        if not entry:
+            return ''
+        if time.time() - entry.get('cached_at', 0) > self.ttl_seconds:
+            return ''
+        return entry.get('event_date', '')
+
+    def put(self, event_id, event_date):
+        if not event_id or not event_date:
+            return
+        with self._lock:
+            self.entries[str(event_id)] = {'event_date': event_date, 'cached_at': time.time()}
+            self.dirty = True
+
+    def save(self):
+        """Persist the cache if anything changed (atomic replace)."""
+        with self._lock:
+            if not self.dirty:
+                return
+            try:
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.entries, f, indent=2)
+                os.replace(tmp_path, self.path)
+                self.dirty = False
+            except Exception as e:
+                print(f"   ⚠️  Event date cache save failed: {str(e)}")
+
+def resolve_event_date(driver, event_id, event_url, fights_index_by_id=None, date_cache=None, page_cache=None):
+    """Resolve an event's YYYY-MM-DD date as cheaply as possible.
+
+    Order: date cache → EventDate already in the MMAFights.csv index → event page
+    (full page load, last resort). Index and page results are written back to the cache.
+    """
+    if date_cache is not None:
+        cached = date_cache.get(event_id)
+        if cached:
+            return cached
+    if fights_index_by_id and event_id in fights_index_by_id:
+        raw = (fights_index_by_id[event_id].get('event_date') or '').strip()
+        # Only trust index dates that carry a year (MMAFights may hold 'JAN 25' or 'UFC 319')
+        indexed = normalize_event_date_string(raw) if re.search(r'\d{4}', raw) else ''
+        if indexed:
+            if date_cache is not None:
+                date_cache.put(event_id, indexed)
+            return indexed
+    if not event_url:
+        return ''
+    event_date = extract_event_date_from_event_page(driver, event_url, page_cache)
+    if event_date and date_cache is not None:
+        date_cache.put(event_id, event_date)
+    return event_date
+
+def extract_event_date_from_event_page(driver, event_url, page_cache=None):
     """Open an event page and try to extract a normalized YYYY-MM-DD date from JSON-LD/meta or header."""
     try:
-        driver.get(event_url)
-        time.sleep(5)
-        html = driver.page_source
-        soup = BeautifulSoup(html, 'html.parser')
+        html = cached_load(page_cache, driver, event_url, 'event')
+        # Steps 1-2 only need <script>/<meta>: build just those; full parse is deferred to step 3
+        meta_soup = cached_soup(page_cache, event_url, html, only='event_meta')
 
         # 1) JSON-LD datePublished/startDate
-        for script in soup.find_all('script', type='application/ld+json'):
+        for script in meta_soup.find_all('script', type='application/ld+json'):
             try:
                 data = json.loads(script.get_text(strip=True))
                 if isinstance(data, dict):
@@ -556,13 +859,14 @@ def extract_event_date_from_event_page(driver, event_url):
 
         # 2) Meta tags
         for meta_name in ['event_date', 'date', 'pubdate', 'og:pubdate', 'article:published_time']:
-            meta = soup.find('meta', attrs={'name': meta_name}) or soup.find('meta', attrs={'property': meta_name})
+            meta = meta_soup.find('meta', attrs={'name': meta_name}) or meta_soup.find('meta', attrs={'property': meta_name})
             if meta and meta.get('content'):
                 normalized = normalize_event_date_string(meta['content'])
                 if normalized:
                     return normalized
 
         # 3) Visible text patterns (header/subtitle)
+        soup = cached_soup(page_cache, event_url, html)
         header = soup.find(['h1','h2','h3'])
         header_text = header.get_text(' ', strip=True) if header else ''
         text_blob = ' '.join([header_text, soup.get_text(' ', strip=True)[:2000]])
@@ -648,103 +952,278 @@ def normalize_fighter_name_for_match(name: str) -> str:
     except Exception:
         return name.strip().lower()
 
-def match_name_to_roster(candidate_name: str, roster_names: set[str]) -> str | None:
+class RosterMatcher:
+    """Prebuilt fuzzy matcher for one event roster.
+
+    Each roster name is normalized once and indexed by token, so a candidate is
+    scored only against roster names that share at least one token with it.
+    Names sharing no token score 0 under the rule below and can never match, so
+    results are identical to a full scan; ties keep the first name in roster
+    iteration order, like the original loop.
+    """
+
+    def __init__(self, roster_names):
+        self.names = []
+        self.token_sets = []
+        self.index = {}
+        for roster_name in roster_names or ():
+            r_tokens = set(normalize_fighter_name_for_match(roster_name).split())
+            if not r_tokens:
+                continue
+            pos = len(self.names)
+            self.names.append(roster_name)
+            self.token_sets.append(r_tokens)
+            for tok in r_tokens:
+                self.index.setdefault(tok, []).append(pos)
+
+    def __len__(self):
+        return len(self.names)
+
+    def match(self, candidate_name: str) -> str | None:
+        if not candidate_name or not self.names:
+            return None
+        cand_tokens = set(normalize_fighter_name_for_match(candidate_name).split())
+        if not cand_tokens:
+            return None
+        positions = set()
+        for tok in cand_tokens:
+            positions.update(self.index.get(tok, ()))
+        best_name = None
+        best_score = 0.0
+        for pos in sorted(positions):
+            r_tokens = self.token_sets[pos]
+            inter = len(cand_tokens & r_tokens)
+            union = len(cand_tokens | r_tokens)
+            jacc = inter / union if union else 0.0
+            subset_ok = cand_tokens.issubset(r_tokens) or r_tokens.issubset(cand_tokens)
+            score = jacc + (0.2 if subset_ok else 0.0)
+            if score > best_score:
+                best_score = score
+                best_name = self.names[pos]
+        if best_score >= 0.6:
+            return best_name
+        return None
+
+def match_name_to_roster(candidate_name: str, roster_names) -> str | None:
     """Return the canonical roster name that best matches candidate_name, or None.
 
     Matching strategy: normalize both names and compare token overlap; accept if
-    one set is subset of the other, or Jaccard >= 0.6.
+    one set is subset of the other, or Jaccard >= 0.6. roster_names may be a
+    prebuilt RosterMatcher (preferred when matching many candidates) or any
+    collection of names.
     """
     if not candidate_name or not roster_names:
         return None
-    cand_norm = normalize_fighter_name_for_match(candidate_name)
-    cand_tokens = set(cand_norm.split())
-    if not cand_tokens:
-        return None
-    best_name = None
-    best_score = 0.0
-    for roster_name in roster_names:
-        r_norm = normalize_fighter_name_for_match(roster_name)
-        r_tokens = set(r_norm.split())
-        if not r_tokens:
-            continue
-        inter = len(cand_tokens & r_tokens)
-        union = len(cand_tokens | r_tokens)
-        jacc = inter / union if union else 0.0
-        subset_ok = cand_tokens.issubset(r_tokens) or r_tokens.issubset(cand_tokens)
-        score = jacc + (0.2 if subset_ok else 0.0)
-        if score > best_score:
-            best_score = score
-            best_name = roster_name
-    if best_score >= 0.6:
-        return best_name
-    return None
+    matcher = roster_names if isinstance(roster_names, RosterMatcher) else RosterMatcher(roster_names)
+    return matcher.match(candidate_name)
+
+def fetch_odds_page(driver, odds_url, page_cache=None):
+    """load_odds_page() through the run's page cache when one is given."""
+    if page_cache is not None:
+        return page_cache.fetch(odds_url, lambda: load_odds_page(driver, odds_url))
+    return load_odds_page(driver, odds_url)
+
+def load_odds_page(driver, odds_url):
+    """Load an event's /odds page, scroll and click expanders so every fight row is rendered; return page_source."""
+    with get_metrics().timer('page_load_seconds', url_class='odds'):
+        return _load_and_expand_odds_page(driver, odds_url)
+
+def _load_and_expand_odds_page(driver, odds_url):
+    driver.get(odds_url)
+    wait_for_page(driver, 'odds')
+    # Attempt to expand/scroll to load all fights/odds rows
+    try:
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        wait_for_dom_stable(driver, max_wait=2.0)
+        driver.execute_script("window.scrollTo(0, 0);")
+        wait_for_dom_stable(driver, max_wait=1.0)
+    except Exception:
+        pass
 
-def extract_event_fighters_from_odds(driver, odds_url, event_name, event_date='', event_url_hint='', event_id=None, fights_index_by_id=None):
-    """Extract fighter data from the odds page of an event, with fight order.
+    # Try clicking potential expanders to reveal all fights/odds
+    try:
+        def click_candidates():
+            clicked = 0
+            scripts = [
+                "return Array.from(document.querySelectorAll('button, a')).filter(el => /show|expand|more|lines|odds/i.test(el.innerText)).slice(0,50);",
+                'return Array.from(document.querySelectorAll("[aria-expanded=\'false\'], .expand, .toggle, .collapsed")).slice(0,50);'
+            ]
+            for js in scripts:
+                try:
+                    elements = driver.execute_script(js)
+                    for el in elements or []:
+                        try:
+                            el.click()
+                            clicked += 1
+                            time.sleep(0.2)
+                        except Exception:
+                            pass
+                except Exception:
+                    pass
+            return clicked
+
+        # Iterate a few rounds to progressively expand content
+        for _ in range(3):
+            num = click_candidates()
+            if num == 0:
+                break
+            wait_for_dom_stable(driver, max_wait=1.0)
+    except Exception:
+        pass
 
-    Fight order is inferred by reading the dedicated 'FIGHTS' tab card list in order
-    and assigning descending numbers with main event = 1, co-main = 2, etc.
-    Cancelled fights are tagged with FightOrder = 0.
+    return driver.page_source or ''
+
+def pair_link_tabs():
+    try:
+        return max(1, int(os.getenv('PAIR_LINK_TABS', '4')))
+    except ValueError:
+        return 4
+
+def load_pages_in_tabs(driver, urls, page_type='pair_odds', max_tabs=None, page_cache=None):
+    """Load urls concurrently in up to max_tabs browser tabs of driver; yield (index, url, html) as each is ready.
+
+    Pages already in page_cache are yielded first without a load. Each tab
+    is polled with the same readiness rules as wait_for_page and is read and
+    closed once ready (or at the page type's max wait). Replay drivers and
+    max_tabs=1 load sequentially. The original window is re-selected before
+    every yield and at the end, also if the caller stops early.
     """
+    if max_tabs is None:
+        max_tabs = pair_link_tabs()
+    pending = []
+    for i, url in enumerate(urls):
+        cached = page_cache.get(url) if page_cache is not None else None
+        if cached is not None:
+            yield i, url, cached
+        else:
+            pending.append((i, url))
+    if not pending:
+        return
+
+    def store(url, html):
+        if page_cache is not None:
+            page_cache.put(url, html)
+
+    metrics = get_metrics()
+    metrics.inc('pair_link_fetches_total', len(pending))
+    if getattr(driver, 'is_replay', False) or max_tabs <= 1 or len(pending) == 1:
+        for i, url in pending:
+            html = load_page(driver, url, page_type)
+            store(url, html)
+            yield i, url, html
+        return
+
+    max_wait = PAGE_MAX_WAIT.get(page_type, 5.0)
+    origin = driver.current_window_handle
+    open_tabs = {}  # handle -> (index, url, started, ReadinessTracker)
     try:
-        driver.get(odds_url)
-        time.sleep(5)
-        # Attempt to expand/scroll to load all fights/odds rows
+        while pending or open_tabs:
+            while pending and len(open_tabs) < max_tabs:
+                i, url = pending.pop(0)
+                handle = None
+                try:
+                    # new_window() hands back this session's own tab; diffing window_handles would race
+                    # with other sessions attached to the same browser (BROWSER_SERVICE + driver pool)
+                    driver.switch_to.new_window('tab')
+                    handle = driver.current_window_handle
+                    # Non-blocking navigation, unlike driver.get()
+                    driver.execute_script("window.location.href = arguments[0];", url)
+                except WebDriverException:
+                    # No tab: load this one in the original window
+                    if handle:
+                        driver.close()
+                    driver.switch_to.window(origin)
+                    html = load_page(driver, url, page_type)
+                    store(url, html)
+                    yield i, url, html
+                    continue
+                # Record mode: the tab never goes through driver.get(), so name its URL for the snapshot
+                track_window = getattr(driver, 'track_window', None)
+                if track_window:
+                    track_window(handle, url)
+                open_tabs[handle] = (i, url, time.monotonic(), ReadinessTracker(page_type))
+
+            done = []
+            for handle, (i, url, started, tracker) in list(open_tabs.items()):
+                driver.switch_to.window(handle)
+                ready = tracker.poll(driver)
+                elapsed = time.monotonic() - started
+                if ready or elapsed >= max_wait:
+                    html = driver.page_source or ''
+                    driver.close()
+                    del open_tabs[handle]
+                    record_wait(page_type, elapsed, ready)
+                    metrics.observe('page_load_seconds', elapsed, url_class=page_type)
+                    store(url, html)
+                    done.append((i, url, html))
+            driver.switch_to.window(origin)
+            for item in done:
+                yield item
+            if open_tabs:
+                time.sleep(POLL_INTERVAL)
+    finally:
+        for handle in list(open_tabs):
+            try:
+                driver.switch_to.window(handle)
+                driver.close()
+            except Exception:
+                pass
         try:
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-            driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(1)
+            driver.switch_to.window(origin)
         except Exception:
             pass
 
-        # Try clicking potential expanders to reveal all fights/odds
-        try:
-            def click_candidates():
-                clicked = 0
-                scripts = [
-                    "return Array.from(document.querySelectorAll('button, a')).filter(el => /show|expand|more|lines|odds/i.test(el.innerText)).slice(0,50);",
-                    'return Array.from(document.querySelectorAll("[aria-expanded=\'false\'], .expand, .toggle, .collapsed")).slice(0,50);'
-                ]
-                for js in scripts:
-                    try:
-                        elements = driver.execute_script(js)
-                        for el in elements or []:
-                            try:
-                                el.click()
-                                clicked += 1
-                                time.sleep(0.2)
-                            except Exception:
-                                pass
-                    except Exception:
-                        pass
-                return clicked
+def extract_event_fighters_from_odds(driver, odds_url, event_name, event_date='', event_url_hint='', event_id=None, fights_index_by_id=None, change_tracker=None, page_cache=None, page_source=None, driver_lock=None):
+    """Extract fighter data from the odds page of an event, with fight order.
 
-            # Iterate a few rounds to progressively expand content
-            for _ in range(3):
-                num = click_candidates()
-                if num == 0:
-                    break
-                time.sleep(1)
-        except Exception:
-            pass
-        
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
+    Fight order is inferred by reading the dedicated 'FIGHTS' tab card list in order
+    and assigning descending numbers with main event = 1, co-main = 2, etc.
+    Cancelled fights are tagged with FightOrder = 0.
+
+    With a change_tracker, the event's odds tables and fight card are hashed
+    first; if neither changed since the last run, last run's rows are returned
+    without parsing or roster matching.
+
+    page_cache: run-scoped PageCache; the /odds, /fights and pair-link pages
+    (and their parsed trees) are then loaded and parsed at most once per run.
+
+    page_source: the /odds page already fetched (staged pipeline). Any further
+    use of driver (/fights roster, pair links) then holds driver_lock.
+    """
+    driver_lock = driver_lock or nullcontext()
+    try:
+        if page_source is None:
+            with driver_lock:
+                page_source = fetch_odds_page(driver, odds_url, page_cache)
 
         # Attempt to load the FIGHTS page HTML via the same driver to capture card order and roster
         fight_order_map = {}
         event_fighter_roster = set()
+        fights_soup = None
         # If we have a prebuilt index for this event_id, prefer that roster and order
         if fights_index_by_id and event_id and event_id in fights_index_by_id:
             pre = fights_index_by_id[event_id]
             event_fighter_roster = set(pre['roster'])
             fight_order_map = pre.get('order_map', {})
+
+        # Change detection: unchanged odds tables + unchanged card → reuse last run's rows
+        change_key = event_id or event_name
+        change_signature = None
+        odds_signature = tables_signature(page_source) if change_tracker else None
+        index_date = fights_index_by_id.get(event_id, {}).get('event_date', '') if fights_index_by_id and event_id else ''
+        if change_tracker and event_fighter_roster:
+            change_signature = change_tracker.signature(odds_signature, roster_signature(event_fighter_roster, fight_order_map), event_name, event_date or index_date)
+            cached_rows = change_tracker.reuse(change_key, change_signature)
+            if cached_rows is not None:
+                print(f"      ♻️ Unchanged since last run - reusing {len(cached_rows)} rows")
+                return cached_rows
+
+        soup = cached_soup(page_cache, odds_url, page_source)
         try:
             fights_url = None
             # Construct directly by replacing '/odds' with '/fights'
             if odds_url.endswith('/odds'):
-                fights_url = odds_url[:-5] + 'fights'
+                fights_url = odds_url[:-len('odds')] + 'fights'
             if not fights_url:
                 # Fallback: discover via nav link
                 for a in soup.select('a[href]'):
@@ -757,16 +1236,21 @@ def extract_event_fighters_from_odds(driver, odds_url, event_name, event_date=''
                 last_err = None
                 for attempt in range(3):
                     try:
-                        driver.get(fights_url)
-                        time.sleep(5)
-                        fights_html = driver.page_source or ''
+                        with driver_lock:
+                            fights_html = cached_load(page_cache, driver, fights_url, 'fights')
                         if fights_html:
                             # Basic Cloudflare check
                             if 'cloudflare' in fights_html.lower() and 'checking your browser' in fights_html.lower():
                                 last_err = 'cloudflare challenge'
                                 time.sleep(5 + attempt * 5)
                                 continue
-                            fights_soup = BeautifulSoup(fights_html, 'html.parser')
+                            if change_tracker:
+                                change_signature = change_tracker.signature(odds_signature, page_signature(fights_html), event_name, event_date or index_date)
+                                cached_rows = change_tracker.reuse(change_key, change_signature)
+                                if cached_rows is not None:
+                                    print(f"      ♻️ Unchanged since last run - reusing {len(cached_rows)} rows")
+                                    return cached_rows
+                            fights_soup = cached_soup(page_cache, fights_url, fights_html)
                             fight_order_map = extract_fight_order_from_card(fights_soup)
                             event_fighter_roster = parse_fight_card_names(fights_soup)
                             # Debug sample of roster
@@ -784,7 +1268,8 @@ def extract_event_fighters_from_odds(driver, odds_url, event_name, event_date=''
                     time.sleep(2)
                 if not event_fighter_roster:
                     print(f"      ⚠️ FIGHTS roster missing for '{event_name}' ({last_err or 'no data'}) - skipping event")
-                    debug_save_html(event_id, 'fights_missing_roster', driver.page_source)
+                    with driver_lock:
+                        debug_save_html(event_id, 'fights_missing_roster', driver.page_source)
                     return []
         except Exception:
             print(f"      ⚠️ FIGHTS page parse error for '{event_name}' - skipping event")
@@ -810,9 +1295,6 @@ def extract_event_fighters_from_odds(driver, odds_url, event_name, event_date=''
             except Exception:
                 pass
         
-        # Extract sportsbook headers
-        sportsbooks = extract_sportsbook_headers(soup)
-
         # Prefer a table located via event header proximity to avoid cross-event bleed
         # Canonicalize event header token to help locate the correct table; prefer hint
         event_token = event_url_hint or event_name
@@ -821,14 +1303,14 @@ def extract_event_fighters_from_odds(driver, odds_url, event_name, event_date=''
             event_token = mnum.group(1)
         event_table = find_event_table_for_event(soup, event_token)
         if event_table is not None:
-            fighters = extract_fighter_odds_from_table(event_table, sportsbooks)
+            fighters = extract_fighter_odds_from_table(event_table)
         else:
             # No scoped table; scan all tables but keep strict roster filter afterwards
             debug_save_html(event_id, 'odds_no_scoped_table', page_source)
             fighters = []
             try:
                 for tbl in soup.find_all('table'):
-                    fighters.extend(extract_fighter_odds_from_table(tbl, sportsbooks))
+                    fighters.extend(extract_fighter_odds_from_table(tbl))
             except Exception:
                 pass
         # Remove any obviously non-fighter rows from global tables before matching
@@ -856,16 +1338,19 @@ def extract_event_fighters_from_odds(driver, odds_url, event_name, event_date=''
         # Filter scraped odds rows by roster using fuzzy token match; then merge into base entries
         pre_count = len(fighters)
         roster_set = set(event_fighter_roster)
+        roster_matcher = RosterMatcher(roster_set)
         filtered_with_odds = []
         for f in fighters:
             cand = f.get('fighter','')
-            match = match_name_to_roster(cand, roster_set)
+            match = match_name_to_roster(cand, roster_matcher)
             if match:
                 f['fighter'] = match
                 filtered_with_odds.append(f)
         kept = len(filtered_with_odds)
         skipped = pre_count - kept
         print(f"      📋 Roster size: {len(event_fighter_roster)} | Fighters kept: {kept} | Skipped (not on card): {skipped}")
+        get_metrics().inc('odds_rows_matched_total', kept)
+        get_metrics().inc('odds_rows_skipped_total', skipped)
 
         # Merge odds into base roster entries
         odds_by_name = { f['fighter']: f.get('odds', {}) for f in filtered_with_odds }
@@ -878,13 +1363,14 @@ def extract_event_fighters_from_odds(driver, odds_url, event_name, event_date=''
 
         # If we still have zero odds rows but the event page might have per-fight odds links, try pair-specific discovery within the fights page
         if not odds_by_name and fights_url:
+            # Pair pages are not part of the signature, so this event cannot be reused next run
+            change_signature = None
             try:
                 # Reuse fights_soup if available; otherwise fetch again quickly
-                if 'fights_soup' not in locals():
-                    driver.get(fights_url)
-                    time.sleep(3)
-                    fights_html2 = driver.page_source or ''
-                    fights_soup2 = BeautifulSoup(fights_html2, 'html.parser')
+                if fights_soup is None:
+                    with driver_lock:
+                        fights_html2 = cached_load(page_cache, driver, fights_url, 'fights', max_wait=3.0)
+                    fights_soup2 = cached_soup(page_cache, fights_url, fights_html2)
                 else:
                     fights_soup2 = fights_soup
 
@@ -898,27 +1384,32 @@ def extract_event_fighters_from_odds(driver, odds_url, event_name, event_date=''
                         pair_links.append(abs_url)
                 pair_links = list(dict.fromkeys(pair_links))[:12]
 
-                # For each pair link, try to parse a tiny scoped table and merge if fighters match roster
-                for link in pair_links:
-                    try:
-                        driver.get(link)
-                        time.sleep(2)
-                        sub_html = driver.page_source or ''
-                        sub_soup = BeautifulSoup(sub_html, 'html.parser')
-                        sub_table = sub_soup.find('table')
-                        if not sub_table:
-                            continue
-                        sub_sportsbooks = extract_sportsbook_headers(sub_soup)
-                        sub_fighters = extract_fighter_odds_from_table(sub_table, sub_sportsbooks)
-                        # Merge only if both fighters are in roster
-                        for sf in sub_fighters:
-                            match = match_name_to_roster(sf.get('fighter',''), roster_set)
-                            if match:
-                                entry = next((e for e in fighters if e['fighter']==match), None)
-                                if entry:
-                                    entry['odds'].update(sf.get('odds', {}))
-                    except Exception:
-                        continue
+                # Load the pair links in parallel tabs; parse and roster-match each page as it arrives.
+                # Matches are applied in link order (buffered until earlier links are in) so the
+                # merged odds and sportsbook order do not depend on which tab finished first.
+                entries_by_name = {e['fighter']: e for e in fighters}
+                matched_by_link = {}
+                next_link = 0
+                with driver_lock:
+                    for link_index, link, sub_html in load_pages_in_tabs(driver, pair_links, 'pair_odds', page_cache=page_cache):
+                        matched = []
+                        try:
+                            # Pair pages are only read for their odds table: build just the <table> subtrees
+                            sub_soup = cached_soup(page_cache, link, sub_html, only='tables')
+                            sub_table = sub_soup.find('table')
+                            if sub_table:
+                                # Merge only if both fighters are in roster
+                                for sf in extract_fighter_odds_from_table(sub_table):
+                                    match = match_name_to_roster(sf.get('fighter',''), roster_matcher)
+                                    if match and match in entries_by_name:
+                                        matched.append((match, sf.get('odds', {})))
+                        except Exception:
+                            pass
+                        matched_by_link[link_index] = matched
+                        while next_link in matched_by_link:
+                            for match, odds in matched_by_link.pop(next_link):
+                                entries_by_name[match]['odds'].update(odds)
+                            next_link += 1
             except Exception:
                 pass
 
@@ -953,6 +1444,12 @@ def extract_event_fighters_from_odds(driver, odds_url, event_name, event_date=''
                     order_counter += 1
         except Exception:
             pass
+
+        if change_tracker:
+            if change_signature:
+                change_tracker.store(change_key, change_signature, fighters)
+            else:
+                change_tracker.mark_changed(change_key)
         
         return fighters
     
@@ -982,13 +1479,7 @@ def extract_sportsbook_headers(soup):
     
     # If no headers found, try common sportsbook names
     if not sportsbooks:
-        common_sportsbooks = [
-            'BetOnline', 'Bovada', 'Bet105', 'Jazz', '4Cx', 'MyBookie', 
-            'Bookmaker', 'BetAnySports', 'BetUS', 'DraftKings', 'FanDuel',
-            'Pinnacle', 'Betway', 'ESPN', 'Circa', 'Stake', 'BetRivers',
-            'BetMGM', 'Caesars'
-        ]
-        sportsbooks = common_sportsbooks
+        sportsbooks = list(COMMON_SPORTSBOOKS)
     else:
         # Deduplicate while preserving order
         seen = set()
@@ -1042,26 +1533,133 @@ def find_event_table_for_event(soup, event_name):
             continue
     return None
 
-def extract_fighter_odds_from_table(table, sportsbooks):
-    fighter_data = []
+COMMON_SPORTSBOOKS = [
+    'BetOnline', 'Bovada', 'Bet105', 'Jazz', '4Cx', 'MyBookie',
+    'Bookmaker', 'BetAnySports', 'BetUS', 'DraftKings', 'FanDuel',
+    'Pinnacle', 'Betway', 'ESPN', 'Circa', 'Stake', 'BetRivers',
+    'BetMGM', 'Caesars'
+]
+
+AMERICAN_ODDS_RE = re.compile(r'([+-]\d+)')
+
+class OddsTable:
+    """Columnar odds for one table: fighters × books.
+
+    odds is a flat row-major array('h') of int16 American odds (odds[f * n_books + b]);
+    missing is a parallel bytearray, 1 where the cell had no odds (or odds outside int16).
+    """
+
+    __slots__ = ('books', 'fighters', 'odds', 'missing')
+
+    def __init__(self, books, fighters, odds, missing):
+        self.books = books
+        self.fighters = fighters
+        self.odds = odds
+        self.missing = missing
+
+    def get(self, fighter_idx, book_idx):
+        """Return the odds as int, or None when missing."""
+        pos = fighter_idx * len(self.books) + book_idx
+        return None if self.missing[pos] else self.odds[pos]
+
+    def to_records(self):
+        """Legacy row format: [{'fighter': name, 'odds': {book: '+155' | ''}}]."""
+        n_books = len(self.books)
+        records = []
+        for f_idx, name in enumerate(self.fighters):
+            base = f_idx * n_books
+            odds = {}
+            for b_idx, book in enumerate(self.books):
+                odds[book] = '' if self.missing[base + b_idx] else f"{self.odds[base + b_idx]:+d}"
+            records.append({'fighter': name, 'odds': odds})
+        return records
+
+def table_header_books(header_cells):
+    """Map column position → sportsbook name from one table's header row.
+
+    Uses header text, then logo alt text, then the common-sportsbooks list,
+    always aligned to the column the name sits in. Duplicate names keep the
+    first column.
+    """
+    def usable(name):
+        return bool(name) and name not in ['Fighters', ''] and len(name) > 1
+
+    columns = {}
+    seen = set()
+    for pos, cell in enumerate(header_cells[1:], 1):
+        text = cell.get_text(strip=True)
+        if usable(text) and text not in seen:
+            seen.add(text)
+            columns[pos] = text
+    if not columns:
+        for pos, cell in enumerate(header_cells[1:], 1):
+            img = cell.find('img', alt=True)
+            alt = img.get('alt', '').strip() if img else ''
+            if alt and alt.lower() not in ['fighters'] and alt not in seen:
+                seen.add(alt)
+                columns[pos] = alt
+    if not columns:
+        columns = {pos: name for pos, name in enumerate(COMMON_SPORTSBOOKS, 1)}
+    return columns
+
+def extract_odds_table_columns(table, sportsbooks=None):
+    """Single pass over one odds table → OddsTable.
+
+    The header row (first row) is read once and aligned per table; each data row
+    contributes one fighter with integer odds per book column. sportsbooks, if
+    given, overrides the header with a positional list (legacy callers).
+    """
     rows = table.find_all('tr')
+    if not rows:
+        return OddsTable([], [], array('h'), bytearray())
+    if sportsbooks:
+        columns = {pos: name for pos, name in enumerate(sportsbooks, 1)}
+    else:
+        columns = table_header_books(rows[0].find_all(['th', 'td']))
+
+    fighters = []
+    parsed_rows = []
     seen = set()
+    width = 0
     for row in rows[1:]:
-        cells = row.find_all(['td','th'])
-        if len(cells) > 1:
-            fighter_name = cells[0].get_text(strip=True)
-            if fighter_name and len(fighter_name) > 2 and fighter_name.lower() not in ['fighters','fighter']:
-                if fighter_name in seen:
-                    continue
-                seen.add(fighter_name)
-                record = {'fighter': fighter_name, 'odds': {}}
-                for i, sportsbook in enumerate(sportsbooks, 1):
-                    if i < len(cells):
-                        odds_cell = cells[i].get_text(strip=True)
-                        m = re.search(r'([+-]\d+)', odds_cell)
-                        record['odds'][sportsbook] = m.group(1) if m else ''
-                fighter_data.append(record)
-    return fighter_data
+        cells = row.find_all(['td', 'th'])
+        if len(cells) <= 1:
+            continue
+        fighter_name = cells[0].get_text(strip=True)
+        if not fighter_name or len(fighter_name) <= 2 or fighter_name.lower() in ['fighters', 'fighter']:
+            continue
+        if fighter_name in seen:
+            continue
+        seen.add(fighter_name)
+        fighters.append(fighter_name)
+        row_odds = {}
+        for pos in range(1, len(cells)):
+            if pos in columns:
+                m = AMERICAN_ODDS_RE.search(cells[pos].get_text(strip=True))
+                value = odds_to_int16(m.group(1)) if m else None
+                if value is not None:
+                    row_odds[pos] = value
+        parsed_rows.append(row_odds)
+        width = max(width, len(cells))
+
+    # Only book columns that actually exist in this table's rows
+    book_positions = [pos for pos in sorted(columns) if pos < width]
+    books = [columns[pos] for pos in book_positions]
+    odds = array('h')
+    missing = bytearray()
+    for row_odds in parsed_rows:
+        for pos in book_positions:
+            if pos in row_odds:
+                odds.append(row_odds[pos])
+                missing.append(0)
+            else:
+                odds.append(0)
+                missing.append(1)
+    return OddsTable(books, fighters, odds, missing)
+
+def extract_fighter_odds_from_table(table, sportsbooks=None):
+    """Fighter rows with odds from one table, using that table's own header."""
+    return extract_odds_table_columns(table, sportsbooks).to_records()
 
 def extract_fight_order_from_card(soup):
     """Parse the fight card page to determine fight order per fighter name.
@@ -1279,69 +1877,136 @@ def extract_event_date(event_name):
     
     return None
 
-def load_fights_index_from_csv(csv_path: str):
+def unified_pipeline_enabled():
+    return os.getenv('UNIFIED_PIPELINE', '0') == '1'
+
+def build_fights_index_in_session(driver, events_page_source, page_cache=None):
+    """Unified pipeline: run MMAFightScraper on this driver instead of its own Chrome.
+
+    The events page already loaded in driver is parsed in place, each /fights
+    card page is fetched and parsed once (into page_cache, where the odds pass
+    finds it again), MMAFights.csv/.json are written, and the fights index is
+    built from that file.
+    """
+    print("   🔗 Unified pipeline: building MMAFights in this browser session")
+    scraper = MMAFightScraper()
+    scraper.driver = driver
+    if page_cache is not None:
+        scraper.page_cache = page_cache
+    scraper.events_data = scraper.extract_ufc_events(page_source=events_page_source)
+    for event_name, event_data in scraper.events_data.items():
+        scraper.fights_data.extend(scraper.extract_event_fights(event_name, event_data['fights_url']))
+    scraper.create_output_files()
+    return load_fights_index_from_csv('MMAFights.csv')
+
+FIGHTS_INDEX_CACHE_VERSION = 2
+FIGHTS_INDEX_COLUMNS = ('Event', 'EventDate', 'Fighter1', 'Fighter2', 'FightURL')
+EVENT_ID_IN_URL = re.compile(r'/mma-events/(\d+)/')
+
+
+def fights_index_cache_path(csv_path):
+    """Cache file next to the CSV ({csv_path}.idx), FIGHTS_INDEX_CACHE overrides, FIGHTS_INDEX_CACHE=0 disables."""
+    override = os.getenv('FIGHTS_INDEX_CACHE', '').strip()
+    if override == '0':
+        return ''
+    return override or csv_path + '.idx'
+
+
+def _read_fights_index_cache(cache_path, key):
+    # Compact JSON, not pickle: the cache sits in a writable directory and must not be able to run code
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        return cached['index'] if cached.get('key') == list(key) else None
+    except Exception:
+        return None
+
+
+def _write_fights_index_cache(cache_path, key, index):
+    tmp_path = cache_path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'key': list(key), 'index': index}, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        print(f"   ⚠️  Fights index cache not written ({cache_path}): {str(e)}")
+
+
+def parse_fights_csv(csv_path: str):
+    """Build the fights index from MMAFights.csv in one streaming pass (see load_fights_index_from_csv)."""
+    index = {}
+    seen_by_event = {}
+    order_counter_by_event = {}
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader, [])]
+        if any(col not in header for col in FIGHTS_INDEX_COLUMNS):
+            return {}
+        i_event, i_date, i_f1, i_f2, i_url = (header.index(col) for col in FIGHTS_INDEX_COLUMNS)
+        last_col = max(i_event, i_date, i_f1, i_f2, i_url)
+        for parts in reader:
+            if last_col >= len(parts):
+                continue
+            fight_url = parts[i_url].strip()
+            m = EVENT_ID_IN_URL.search(fight_url)
+            if not m:
+                continue
+            eid = m.group(1)
+            entry = index.get(eid)
+            if entry is None:
+                # Derive canonical event_url/odds_url from the first fight_url seen
+                base_event_url = fight_url.rstrip('/')
+                if base_event_url.endswith('/fights'):
+                    base_event_url = base_event_url[:-7]
+                entry = index[eid] = {
+                    'event': parts[i_event].strip(),
+                    'event_date': parts[i_date].strip(),
+                    'roster': [],
+                    'order_map': {},
+                    'event_url': base_event_url,
+                    'odds_url': f"{base_event_url}/odds"
+                }
+                seen_by_event[eid] = set()
+                order_counter_by_event[eid] = 1
+            order_val = order_counter_by_event[eid]
+            order_counter_by_event[eid] = order_val + 1
+            seen = seen_by_event[eid]
+            for fn in (parts[i_f1].strip(), parts[i_f2].strip()):
+                if fn and fn not in seen:
+                    seen.add(fn)
+                    entry['roster'].append(fn)
+                    entry['order_map'][fn.lower()] = order_val
+    return index
+
+
+def load_fights_index_from_csv(csv_path: str, use_cache: bool = True):
     """Load MMAFights.csv to build an index by event_id containing:
     - roster: list of unique fighter names on that card
     - order_map: name(lower)->fight_order (1..N based on row order per event)
     - event_date: propagated date if present
+    - event_url / odds_url: derived from the first fight_url of the event
     Requires that fight_url contains /mma-events/{id}/.
+
+    The parsed index is kept in a compact JSON cache (fights_index_cache_path) keyed on
+    the CSV's mtime and size, so unchanged files load without re-parsing.
     """
     try:
-        if not os.path.exists(csv_path):
-            return {}
-        index = {}
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            header_line = f.readline()
-            if not header_line:
-                return {}
-            header = [h.strip() for h in header_line.strip().split(',')]
-            def idx(col):
-                return header.index(col) if col in header else -1
-            i_event = idx('Event')
-            i_date = idx('EventDate')
-            i_f1 = idx('Fighter1')
-            i_f2 = idx('Fighter2')
-            i_url = idx('FightURL')
-            order_counter_by_event = {}
-            for raw in f:
-                line = raw.rstrip('\n')
-                # naive CSV split that respects simple quoted commas
-                parts = [p.strip() for p in re.split(r',(?=(?:[^\"]*\"[^\"]*\")*[^\"]*$)', line)]
-                if max(i_event, i_date, i_f1, i_f2, i_url) >= len(parts):
-                    continue
-                fight_url = parts[i_url]
-                m = re.search(r'/mma-events/(\d+)/', fight_url)
-                if not m:
-                    continue
-                eid = m.group(1)
-                event_name = parts[i_event]
-                event_date = parts[i_date]
-                f1 = parts[i_f1]
-                f2 = parts[i_f2]
-                if eid not in index:
-                    # Derive canonical event_url/odds_url from the first fight_url seen
-                    base_event_url = fight_url.rstrip('/')
-                    if base_event_url.endswith('/fights'):
-                        base_event_url = base_event_url[:-7]
-                    odds_url = f"{base_event_url}/odds"
-                    index[eid] = {
-                        'event': event_name,
-                        'event_date': event_date,
-                        'roster': [],
-                        'order_map': {},
-                        'event_url': base_event_url,
-                        'odds_url': odds_url
-                    }
-                    order_counter_by_event[eid] = 1
-                order_val = order_counter_by_event[eid]
-                order_counter_by_event[eid] = order_val + 1
-                for fn in [f1, f2]:
-                    if fn and fn not in index[eid]['roster']:
-                        index[eid]['roster'].append(fn)
-                        index[eid]['order_map'][fn.strip().lower()] = order_val
+        stat = os.stat(csv_path)
+    except OSError:
+        return {}
+    cache_path = fights_index_cache_path(csv_path) if use_cache else ''
+    key = (FIGHTS_INDEX_CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+    if cache_path:
+        index = _read_fights_index_cache(cache_path, key)
+        if index is not None:
             return index
+    try:
+        index = parse_fights_csv(csv_path)
     except Exception:
         return {}
+    if cache_path:
+        _write_fights_index_cache(cache_path, key, index)
+    return index
 
 if __name__ == "__main__":
     # Check for debug mode from environment variable
@@ -1350,7 +2015,7 @@ if __name__ == "__main__":
     results = odds_market_combo(debug_mode=debug_mode)
     if results:
         print(f"\n🎯 FINAL RESULTS:")
-        print(f"   Total fighters: {len(results)}")
+        print(f"   Total fighters: {results}")
         print(f"   File: OddsMarketCombo.csv")
         print(f"   Debug mode: {debug_mode}")
         print("\nFor the lulz! 🏴‍☠️")
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Parser and matcher microbenchmarks over recorded pages, with stored baselines.
+
+Runs offline on a snapshot directory (see snapshot_store.py): every recorded
+page is classified by type, parsed once, and the extractors that consume that
+page type are timed over all of them:
+
+  extract_ufc_events_from_page     events listing (event pages served from a warm page cache)
+  extract_fight_order_from_card    /fights cards
+  parse_fight_card_names           /fights cards
+  MMAFightScraper.extract_event_fights  /fights cards
+  find_event_table_for_event       /odds pages
+  extract_fighter_odds_from_table  tables of /odds and pair-link pages
+  match_name_to_roster             odds-table names against the card roster
+  normalize_event_date_string      dates found on the listing, event pages and cards
+  parse_fights_csv                 an MMAFights.csv built from the recorded cards (no cache)
+  load_fights_index_from_csv       the same file through its binary index cache
+
+Each benchmark runs --rounds times; the best round is the reported time (per
+round and per call). --save writes the results to the baseline file
+(default: benchmarks/baselines/parsers.json). Without --save the run is
+compared against that baseline: a benchmark slower than baseline by more than
+--tolerance (default 25%, ignoring differences under 0.2 ms) is a regression and
+the script exits 1. A changed result checksum (a heuristic now extracts something
+different) is reported but does not fail the run; re-save the baseline once the
+change is intended.
+
+Run: python benchmarks/bench_parsers.py [snapshot_dir] [--save] [--rounds N] [--tolerance 0.25]
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import html_parsing  # noqa: E402
+from html_parsing import make_soup  # noqa: E402
+from page_cache import PageCache, page_cache_key  # noqa: E402
+from snapshot_store import SnapshotStore, ReplayDriver  # noqa: E402
+import OddsMarketCombo as omc  # noqa: E402
+from MMAFightScraper import MMAFightScraper  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'parsers.json')
+# Differences below this are timer noise, whatever the relative change
+NOISE_FLOOR_S = 0.0002
+
+DATE_RE = re.compile(r'(?:\d{4}-\d{2}-\d{2}|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4})')
+
+
+def classify_url(url):
+    if 'upcoming-mma-events' in url:
+        return 'events'
+    if re.search(r'/odds/.+', url):
+        return 'pair_odds'
+    if url.endswith('/odds'):
+        return 'odds'
+    if url.endswith('/fights'):
+        return 'fights'
+    return 'event'
+
+
+def checksum(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:12]
+
+
+class Fixtures:
+    """Recorded pages, parsed once, grouped by page type, plus the inputs derived from them."""
+
+    def __init__(self, directory, workdir):
+        self.store = SnapshotStore(directory)
+        self.pages = {}
+        self.page_cache = PageCache(max_bytes=1 << 40)
+        for url in self.store.urls():
+            html = self.store.load(url) or ''
+            self.page_cache.put(url, html)
+            self.pages.setdefault(classify_url(url), []).append((url, html, make_soup(html)))
+
+        # MMAFights.csv as the scraper would write it for the recorded cards
+        self.fights_csv = os.path.join(workdir, 'MMAFights.csv')
+        scraper = MMAFightScraper()
+        scraper.driver = ReplayDriver(self.store)
+        rows = []
+        with redirect_stdout(io.StringIO()):
+            for url, html, soup in self.pages.get('fights', []):
+                for fight in scraper.extract_event_fights(url, url, page_source=html, soup=soup):
+                    rows.append([fight.get('event_name', ''), fight.get('event_date', ''), fight['fighter1'], fight['fighter2'], url, ''])
+        with open(self.fights_csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Event', 'EventDate', 'Fighter1', 'Fighter2', 'FightURL', 'ExtractionDate'])
+            writer.writerows(rows)
+        with redirect_stdout(io.StringIO()):
+            self.fights_index = omc.load_fights_index_from_csv(self.fights_csv)
+
+        # Rosters and event names by event id, odds-table names and date strings
+        self.rosters = {}
+        for url, _html, soup in self.pages.get('fights', []):
+            self.rosters[page_cache_key(url)] = sorted(omc.parse_fight_card_names(soup))
+        self.odds_pages = []
+        for url, _html, soup in self.pages.get('odds', []):
+            key = page_cache_key(url)
+            event_id = key.split(':')[-1][:-len('/odds')]
+            entry = self.fights_index.get(event_id) or {}
+            event_name = entry.get('event') or (soup.title.get_text(strip=True) if soup.title else '')
+            self.odds_pages.append((url, soup, event_name, self.rosters.get(key[:-len('/odds')] + '/fights', [])))
+        self.tables = [tbl for kind in ('odds', 'pair_odds') for _u, _h, soup in self.pages.get(kind, []) for tbl in soup.find_all('table')]
+        self.name_queries = []
+        for _url, soup, _event, roster in self.odds_pages:
+            for tbl in soup.find_all('table'):
+                for fighter in omc.extract_fighter_odds_from_table(tbl):
+                    self.name_queries.append((fighter.get('fighter', ''), roster))
+        self.date_strings = []
+        for kind in ('events', 'event', 'fights'):
+            for _url, html, _soup in self.pages.get(kind, []):
+                self.date_strings.extend(DATE_RE.findall(html))
+        self.date_strings.extend(entry.get('event_date', '') for entry in self.fights_index.values())
+
+
+def benchmark_cases(fx, workdir):
+    """[(name, calls, fn)] - fn() runs the benchmark once over all its inputs and returns the results."""
+    driver = ReplayDriver(fx.store)
+    scraper = MMAFightScraper()
+    scraper.driver = driver
+    events_pages = fx.pages.get('events', [])
+    fights_pages = fx.pages.get('fights', [])
+    date_cache_path = os.path.join(workdir, 'event_date_cache.json')
+
+    def events():
+        return [omc.extract_ufc_events_from_page(driver, soup, fx.fights_index, omc.EventDateCache(path=date_cache_path), fx.page_cache)
+                for _u, _h, soup in events_pages]
+
+    def event_fights():
+        return [[(f['fighter1'], f['fighter2']) for f in scraper.extract_event_fights(url, url, page_source=html, soup=soup)]
+                for url, html, soup in fights_pages]
+
+    return [
+        ('extract_ufc_events_from_page', len(events_pages), events),
+        ('extract_fight_order_from_card', len(fights_pages),
+         lambda: [omc.extract_fight_order_from_card(soup) for _u, _h, soup in fights_pages]),
+        ('parse_fight_card_names', len(fights_pages),
+         lambda: [sorted(omc.parse_fight_card_names(soup)) for _u, _h, soup in fights_pages]),
+        ('MMAFightScraper.extract_event_fights', len(fights_pages), event_fights),
+        ('find_event_table_for_event', len(fx.odds_pages),
+         lambda: [omc.find_event_table_for_event(soup, event) is not None for _u, soup, event, _r in fx.odds_pages]),
+        ('extract_fighter_odds_from_table', len(fx.tables),
+         lambda: [omc.extract_fighter_odds_from_table(tbl) for tbl in fx.tables]),
+        ('match_name_to_roster', len(fx.name_queries),
+         lambda: [omc.match_name_to_roster(name, roster) for name, roster in fx.name_queries]),
+        ('normalize_event_date_string', len(fx.date_strings),
+         lambda: [omc.normalize_event_date_string(s) for s in fx.date_strings]),
+        ('parse_fights_csv', 1,
+         lambda: omc.parse_fights_csv(fx.fights_csv)),
+        ('load_fights_index_from_csv', 1,
+         lambda: omc.load_fights_index_from_csv(fx.fights_csv)),
+    ]
+
+
+def run_benchmarks(cases, rounds):
+    results = {}
+    for name, calls, fn in cases:
+        times = []
+        output = None
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                output = fn()
+            times.append(time.perf_counter() - t0)
+        times.sort()
+        best = times[0]
+        results[name] = {
+            'calls': calls,
+            'best_s': best,
+            'median_s': times[len(times) // 2],
+            'per_call_us': best / calls * 1e6 if calls else 0.0,
+            'checksum': checksum(output),
+        }
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'node': platform.node(),
+        'parser_backend': html_parsing.parser_backend(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print current vs baseline and return the names of regressed benchmarks."""
+    regressions = []
+    print(f"{'benchmark':38s} {'calls':>6s} {'best ms':>9s} {'us/call':>9s} {'baseline':>9s} {'change':>8s}")
+    for name, r in results.items():
+        base = (baseline.get('results') or {}).get(name)
+        line = f"{name:38s} {r['calls']:6d} {r['best_s'] * 1000:9.2f} {r['per_call_us']:9.1f}"
+        if not base:
+            print(line + f" {'-':>9s} {'new':>8s}")
+            continue
+        change = (r['best_s'] - base['best_s']) / base['best_s'] if base['best_s'] > 0 else 0.0
+        flag = ''
+        if change > tolerance and r['best_s'] - base['best_s'] > NOISE_FLOOR_S:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        if r['checksum'] != base.get('checksum') or r['calls'] != base.get('calls'):
+            flag += '  RESULTS CHANGED'
+        print(line + f" {base['best_s'] * 1000:9.2f} {change * 100:+7.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('snapshot_dir', nargs='?', default=os.getenv('SNAPSHOT_DIR', 'snapshots'))
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save', action='store_true', help='store this run as the baseline')
+    parser.add_argument('--rounds', type=int, default=7)
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    if not SnapshotStore(args.snapshot_dir).urls():
+        print(f"No snapshots in {args.snapshot_dir} - record some with SNAPSHOT_MODE=record first")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        fx = Fixtures(args.snapshot_dir, workdir)
+        results = run_benchmarks(benchmark_cases(fx, workdir), max(1, args.rounds))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    if baseline and baseline.get('environment') != environment():
+        print(f"note: baseline recorded on {baseline.get('environment')}, now {environment()}")
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        tmp_path = args.baseline + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'environment': environment(), 'snapshot_dir': os.path.abspath(args.snapshot_dir),
+                       'saved_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}, f, indent=2)
+        os.replace(tmp_path, args.baseline)
+        print(f"baseline saved: {args.baseline}")
+    elif not baseline:
+        print(f"no baseline at {args.baseline} - run with --save to store one")
+    elif regressions:
+        print(f"regressions (> {args.tolerance * 100:.0f}% slower): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Roster matching benchmark: legacy full-scan match_name_to_roster vs RosterMatcher.
+
+Builds a synthetic all-promotion roster (thousands of names) and a candidate
+list of odds-row names (exact, reordered, partial, and off-card noise), checks
+both implementations agree on every candidate, and prints the timings.
+
+Run: python benchmarks/bench_roster_matcher.py [roster_size] [candidates]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OddsMarketCombo import RosterMatcher, normalize_fighter_name_for_match  # noqa: E402
+
+FIRST = ['Alex', 'Jose', 'Khamzat', 'Dricus', 'Sean', 'Islam', 'Ilia', 'Tom', 'Jon', 'Max', 'Charles',
+         'Justin', 'Dustin', 'Kevin', 'Bruno', 'Caio', 'Johnny', 'Leon', 'Belal', 'Merab', 'Umar', 'Ciryl',
+         'Aaron', 'Lerone', 'Jared', 'Michal', 'Paulo', 'Israel', 'Robert', 'Derrick', 'Song', 'Zhang']
+LAST = ['Pereira', 'Aldo', 'Chimaev', 'Du Plessis', "O'Malley", 'Makhachev', 'Topuria', 'Aspinall',
+        'Jones', 'Holloway', 'Oliveira', 'Gaethje', 'Poirier', 'Holland', 'Silva', 'Borralho', 'Walker',
+        'Edwards', 'Muhammad', 'Dvalishvili', 'Nurmagomedov', 'Gane', 'Pico', 'Murphy', 'Cannonier',
+        'Oleksiejczuk', 'Costa', 'Adesanya', 'Whittaker', 'Lewis', 'Yadong', 'Mingyang', 'dos Santos',
+        'de la Cruz', 'van Zyl', 'Kowalski', 'Nakamura', 'Petrov', 'Ivanov', 'Garcia', 'Lopez']
+
+
+def legacy_match_name_to_roster(candidate_name, roster_names):
+    """The original O(roster) implementation, kept here as the reference."""
+    if not candidate_name or not roster_names:
+        return None
+    cand_tokens = set(normalize_fighter_name_for_match(candidate_name).split())
+    if not cand_tokens:
+        return None
+    best_name = None
+    best_score = 0.0
+    for roster_name in roster_names:
+        r_tokens = set(normalize_fighter_name_for_match(roster_name).split())
+        if not r_tokens:
+            continue
+        inter = len(cand_tokens & r_tokens)
+        union = len(cand_tokens | r_tokens)
+        jacc = inter / union if union else 0.0
+        subset_ok = cand_tokens.issubset(r_tokens) or r_tokens.issubset(cand_tokens)
+        score = jacc + (0.2 if subset_ok else 0.0)
+        if score > best_score:
+            best_score = score
+            best_name = roster_name
+    if best_score >= 0.6:
+        return best_name
+    return None
+
+
+def build_roster(size, rng):
+    roster = set()
+    while len(roster) < size:
+        name = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+        if rng.random() < 0.5:
+            name += f" {rng.choice(LAST)}{rng.randint(1, 9999)}"
+        roster.add(name)
+    return roster
+
+
+def build_candidates(roster, count, rng):
+    names = sorted(roster)
+    candidates = []
+    for _ in range(count):
+        pick = rng.random()
+        name = rng.choice(names)
+        if pick < 0.4:
+            candidates.append(name.upper())
+        elif pick < 0.6:
+            candidates.append(' '.join(reversed(name.split())))
+        elif pick < 0.8:
+            candidates.append(name.split()[-1])
+        else:
+            candidates.append(f"{rng.choice(['Upcoming Events', 'Widget', 'BetOnline'])} {rng.randint(1, 99)}")
+    return candidates
+
+
+def main():
+    roster_size = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    n_candidates = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    rng = random.Random(319)
+    roster = build_roster(roster_size, rng)
+    candidates = build_candidates(roster, n_candidates, rng)
+
+    t0 = time.perf_counter()
+    legacy = [legacy_match_name_to_roster(c, roster) for c in candidates]
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    matcher = RosterMatcher(roster)
+    t_build = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    indexed = [matcher.match(c) for c in candidates]
+    t_indexed = time.perf_counter() - t0
+
+    mismatches = sum(1 for a, b in zip(legacy, indexed) if a != b)
+    print(f"roster={roster_size} candidates={n_candidates} matched={sum(1 for m in indexed if m)}")
+    print(f"legacy full scan : {t_legacy * 1000:9.1f} ms")
+    print(f"RosterMatcher    : {t_indexed * 1000:9.1f} ms (+ {t_build * 1000:.1f} ms build)")
+    print(f"speedup          : {t_legacy / max(t_indexed + t_build, 1e-9):9.1f}x")
+    print(f"mismatches       : {mismatches}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
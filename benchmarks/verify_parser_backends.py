@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Verify that every HTML parser backend (and restricted parsing) gives the same
+extraction results on recorded pages.
+
+Walks a snapshot directory (see snapshot_store.py), classifies each URL by page
+type, runs the extractors that consume that page type once per backend, and
+reports any page whose results differ. Also prints parse+extract time per backend.
+
+Run: python benchmarks/verify_parser_backends.py [snapshot_dir]
+"""
+import io
+import os
+import re
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import html_parsing  # noqa: E402
+from html_parsing import make_soup  # noqa: E402
+from snapshot_store import SnapshotStore, ReplayDriver  # noqa: E402
+import OddsMarketCombo as omc  # noqa: E402
+from MMAFightScraper import MMAFightScraper  # noqa: E402
+
+
+def classify_url(url):
+    if 'upcoming-mma-events' in url:
+        return 'events'
+    if re.search(r'/odds/.+', url):
+        return 'pair_odds'
+    if url.endswith('/odds'):
+        return 'odds'
+    if url.endswith('/fights'):
+        return 'fights'
+    return 'event'
+
+
+def extract_tables(soup):
+    return [omc.extract_fighter_odds_from_table(tbl) for tbl in soup.find_all('table')]
+
+
+def run_extractors(store, url, page_type, html):
+    """Return a comparable result for one page under the currently selected backend."""
+    driver = ReplayDriver(store)
+    if page_type == 'events':
+        return omc.extract_ufc_events_from_page(driver, make_soup(html))
+    if page_type == 'odds':
+        soup = make_soup(html)
+        return {'tables': extract_tables(soup), 'scoped': bool(omc.find_event_table_for_event(soup, soup.title.get_text() if soup.title else ''))}
+    if page_type == 'pair_odds':
+        return {'full': extract_tables(make_soup(html)), 'restricted': extract_tables(make_soup(html, only='tables'))}
+    if page_type == 'fights':
+        soup = make_soup(html)
+        scraper = MMAFightScraper()
+        scraper.driver = driver
+        fights = [(f['fighter1'], f['fighter2']) for f in scraper.extract_event_fights('event', url)]
+        return {'order': omc.extract_fight_order_from_card(soup), 'names': sorted(omc.parse_fight_card_names(soup)), 'fights': fights}
+    return omc.extract_event_date_from_event_page(driver, url)
+
+
+def main():
+    directory = sys.argv[1] if len(sys.argv) > 1 else os.getenv('SNAPSHOT_DIR', 'snapshots')
+    store = SnapshotStore(directory)
+    urls = store.urls()
+    if not urls:
+        print(f"No snapshots in {directory} - record some with SNAPSHOT_MODE=record first")
+        sys.exit(1)
+    backends = [b for b in html_parsing.SUPPORTED_BACKENDS if b != 'lxml' or html_parsing.HAVE_LXML]
+    results = {b: {} for b in backends}
+    timings = {b: 0.0 for b in backends}
+    previous = os.environ.get('HTML_PARSER')
+    try:
+        for backend in backends:
+            os.environ['HTML_PARSER'] = backend
+            for url in urls:
+                html = store.load(url) or ''
+                page_type = classify_url(url)
+                t0 = time.perf_counter()
+                with redirect_stdout(io.StringIO()):
+                    results[backend][url] = run_extractors(store, url, page_type, html)
+                timings[backend] += time.perf_counter() - t0
+    finally:
+        if previous is None:
+            os.environ.pop('HTML_PARSER', None)
+        else:
+            os.environ['HTML_PARSER'] = previous
+
+    mismatches = 0
+    reference = backends[0]
+    for url in urls:
+        for backend in backends[1:]:
+            if results[backend][url] != results[reference][url]:
+                mismatches += 1
+                print(f"MISMATCH [{classify_url(url)}] {url}: {reference} != {backend}")
+        result = results[reference][url]
+        if isinstance(result, dict) and 'restricted' in result and result['restricted'] != result['full']:
+            mismatches += 1
+            print(f"MISMATCH [restricted] {url}: table-only parse differs from full parse")
+    for backend in backends:
+        print(f"{backend:12s}: {len(urls)} pages in {timings[backend] * 1000:.1f} ms")
+    print(f"mismatches: {mismatches}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
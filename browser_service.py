@@ -0,0 +1,273 @@
+"""
+LulSec browser service - one long-lived Chrome per host that both scrapers attach to
+
+    python browser_service.py start|stop|restart|status
+
+start launches Chrome once, detached, with a persistent profile and disk cache
+(BROWSER_PROFILE_DIR, default ~/.lulsec_browser/profile) and a DevTools endpoint on
+127.0.0.1:BROWSER_SERVICE_PORT (default 9333). Cloudflare clearance cookies, the
+HTTP cache and the browser process itself survive between runs, so scheduled
+runs skip the Chrome launch, the init retries and the cold-cache page loads.
+
+With BROWSER_SERVICE=1, OddsMarketCombo.create_chrome_driver() and
+MMAFightScraper.initialize_driver() attach to the running service instead of
+launching Chrome (chromedriver connects via debuggerAddress, using the
+undetected_chromedriver-patched binary). Each attached driver works in its own
+tab and quit() only closes that tab; the browser keeps running.
+BROWSER_SERVICE=auto starts the service first if it is not running;
+BROWSER_SERVICE=host:port attaches to an explicit endpoint. If the service
+cannot be reached the scrapers fall back to launching their own Chrome.
+"""
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime
+
+SERVICE_ROOT = os.path.join(os.path.expanduser('~'), '.lulsec_browser')
+DEFAULT_PORT = 9333
+START_TIMEOUT = 30.0
+
+CHROME_ARGS = [
+    '--no-sandbox', '--disable-dev-shm-usage', '--disable-gpu', '--disable-extensions',
+    '--disable-plugins', '--disable-images', '--disable-blink-features=AutomationControlled',
+    '--window-size=1920,1080', '--disable-background-timer-throttling', '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding', '--disable-features=TranslateUI', '--disable-ipc-flooding-protection',
+    '--hide-scrollbars', '--mute-audio', '--no-first-run', '--no-default-browser-check',
+    '--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.7204.169 Safari/537.36',
+]
+
+
+def service_mode():
+    """'' (off), 'attach', 'auto', or an explicit 'host:port' from BROWSER_SERVICE."""
+    value = os.getenv('BROWSER_SERVICE', '').strip()
+    if value.lower() in ('', '0', 'false'):
+        return ''
+    if value.lower() in ('1', 'true', 'attach'):
+        return 'attach'
+    if value.lower() == 'auto':
+        return 'auto'
+    return value
+
+
+def profile_dir():
+    return os.getenv('BROWSER_PROFILE_DIR', os.path.join(SERVICE_ROOT, 'profile'))
+
+
+def state_path():
+    return os.getenv('BROWSER_SERVICE_STATE', os.path.join(SERVICE_ROOT, 'service.json'))
+
+
+def service_port():
+    try:
+        return int(os.getenv('BROWSER_SERVICE_PORT', str(DEFAULT_PORT)))
+    except ValueError:
+        return DEFAULT_PORT
+
+
+def read_state():
+    try:
+        with open(state_path(), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def service_address():
+    mode = service_mode()
+    if mode and mode not in ('attach', 'auto'):
+        return mode
+    return read_state().get('address') or f"127.0.0.1:{service_port()}"
+
+
+def browser_version(address, timeout=2.0):
+    """Return the DevTools /json/version info of the browser at address, or None if it is not up."""
+    try:
+        with urllib.request.urlopen(f"http://{address}/json/version", timeout=timeout) as resp:
+            return json.loads(resp.read().decode('utf-8'))
+    except Exception:
+        return None
+
+
+def find_chrome_binary():
+    binary = os.getenv('CHROME_BINARY', '').strip()
+    if binary:
+        return binary
+    try:
+        import undetected_chromedriver as uc
+        return uc.find_chrome_executable()
+    except Exception:
+        return None
+
+
+def start_service():
+    """Launch the service browser if it is not already running. Returns its address or None."""
+    address = f"127.0.0.1:{service_port()}"
+    if browser_version(address):
+        print(f"   🌐 Browser service already running on {address}")
+        return address
+    binary = find_chrome_binary()
+    if not binary:
+        print("   ❌ Chrome binary not found (set CHROME_BINARY)")
+        return None
+
+    profile = profile_dir()
+    os.makedirs(os.path.join(profile, 'cache'), exist_ok=True)
+    args = [binary] + CHROME_ARGS + [
+        f"--user-data-dir={profile}",
+        f"--disk-cache-dir={os.path.join(profile, 'cache')}",
+        '--remote-debugging-host=127.0.0.1',
+        f"--remote-debugging-port={service_port()}",
+    ]
+    if os.getenv('GITHUB_ACTIONS', 'false').lower() == 'true' or os.getenv('HEADLESS', '0') == '1':
+        args.append('--headless=new')
+    args.append('about:blank')
+
+    print(f"   🚀 Starting browser service ({binary}) on {address}")
+    popen_kwargs = {'stdin': subprocess.DEVNULL, 'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}
+    if os.name == 'nt':
+        popen_kwargs['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        popen_kwargs['start_new_session'] = True
+    process = subprocess.Popen(args, **popen_kwargs)
+
+    deadline = time.monotonic() + START_TIMEOUT
+    info = None
+    while time.monotonic() < deadline and info is None:
+        if process.poll() is not None:
+            print(f"   ❌ Browser exited during startup (code {process.returncode})")
+            return None
+        time.sleep(0.5)
+        info = browser_version(address)
+    if info is None:
+        print(f"   ❌ Browser service did not come up within {START_TIMEOUT:.0f}s")
+        return None
+
+    os.makedirs(os.path.dirname(os.path.abspath(state_path())), exist_ok=True)
+    tmp_path = state_path() + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'pid': process.pid, 'address': address, 'profile_dir': profile,
+                   'browser': info.get('Browser', ''), 'started_at': datetime.now().isoformat()}, f, indent=2)
+    os.replace(tmp_path, state_path())
+    print(f"   ✅ Browser service up: {info.get('Browser', '')} (pid {process.pid}, profile {profile})")
+    return address
+
+
+def stop_service():
+    state = read_state()
+    pid = state.get('pid')
+    if not pid:
+        print("   ℹ️  No browser service state found")
+        return False
+    try:
+        os.kill(pid, signal.SIGTERM)
+        print(f"   🔒 Browser service stopped (pid {pid})")
+    except OSError as e:
+        print(f"   ⚠️  Could not stop pid {pid}: {str(e)}")
+    try:
+        os.remove(state_path())
+    except OSError:
+        pass
+    return True
+
+
+def _chrome_major(info):
+    try:
+        return int(info.get('Browser', '').split('/')[1].split('.')[0])
+    except Exception:
+        return None
+
+
+def attach_driver(address):
+    """Attach a new chromedriver session to the service browser, in a tab of its own."""
+    import undetected_chromedriver as uc
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
+    info = browser_version(address)
+    if info is None:
+        return None
+    patcher = uc.Patcher(version_main=_chrome_major(info) or 0)
+    patcher.auto()
+    options = webdriver.ChromeOptions()
+    options.debugger_address = address
+    driver = webdriver.Chrome(service=Service(patcher.executable_path), options=options)
+
+    driver.switch_to.new_window('tab')
+    own_handle = driver.current_window_handle
+    quit_session = driver.quit
+
+    def quit_tab():
+        # Close only this run's tab; the service browser keeps running
+        try:
+            if len(driver.window_handles) > 1:
+                driver.switch_to.window(own_handle)
+                driver.close()
+        except Exception:
+            pass
+        quit_session()
+
+    driver.quit = quit_tab
+    driver.attached_service = address
+    try:
+        driver.set_page_load_timeout(60)
+    except Exception:
+        pass
+    try:
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    except Exception:
+        pass
+    return driver
+
+
+def attach_browser_service():
+    """Driver attached to the browser service when BROWSER_SERVICE is set and reachable, else None."""
+    mode = service_mode()
+    if not mode:
+        return None
+    address = service_address()
+    if browser_version(address) is None and mode == 'auto':
+        address = start_service()
+    if not address or browser_version(address) is None:
+        print(f"   ⚠️  Browser service not reachable ({address}) - launching a local Chrome")
+        return None
+    try:
+        t0 = time.monotonic()
+        driver = attach_driver(address)
+        print(f"   🌐 Attached to browser service {address} in {time.monotonic() - t0:.1f}s")
+        return driver
+    except Exception as e:
+        print(f"   ⚠️  Browser service attach failed ({address}): {str(e)} - launching a local Chrome")
+        return None
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'status'
+    if command == 'start':
+        sys.exit(0 if start_service() else 1)
+    if command == 'stop':
+        stop_service()
+        return
+    if command == 'restart':
+        stop_service()
+        time.sleep(1)
+        sys.exit(0 if start_service() else 1)
+    if command == 'status':
+        address = service_address()
+        info = browser_version(address)
+        if info:
+            state = read_state()
+            print(f"   🌐 Browser service up on {address}: {info.get('Browser', '')}"
+                  f" (pid {state.get('pid', '?')}, since {state.get('started_at', '?')}, profile {state.get('profile_dir', profile_dir())})")
+            return
+        print(f"   💤 Browser service not running ({address})")
+        sys.exit(1)
+    print("Usage: python browser_service.py start|stop|restart|status")
+    sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
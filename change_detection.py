@@ -0,0 +1,147 @@
+"""
+LulSec change detection - skip events whose odds table and fight card did not move
+
+For each event we hash the normalized odds-table markup and the fight-card
+content (roster + order from MMAFights.csv, or the /fights page markup) and
+keep the hashes, plus the parsed rows, between runs in EVENT_HASH_STATE
+(default: event_hashes.json). When both hashes match last run, the event's
+rows are reused without parsing, roster matching or merging. If every event
+was reused and the event set is unchanged, Phase 4 leaves the output files
+alone. Entries of events no longer in the listing are pruned before saving,
+so the state file only holds the current card set.
+
+CHANGE_DETECTION=0 disables it.
+"""
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+STATE_VERSION = 1
+
+_TABLE_RE = re.compile(r'<table\b.*?</table>', re.I | re.S)
+_TAG_ATTRS_RE = re.compile(r'<(/?[a-zA-Z][a-zA-Z0-9]*)\b[^>]*>')
+_WS_RE = re.compile(r'\s+')
+_COMMENT_RE = re.compile(r'<!--.*?-->', re.S)
+_SCRIPT_STYLE_RE = re.compile(r'<(script|style)\b.*?</\1>', re.I | re.S)
+
+
+def change_detection_enabled():
+    return os.getenv('CHANGE_DETECTION', '1') != '0'
+
+
+def normalize_markup(html):
+    """Drop comments, scripts/styles and tag attributes (hashed class names, ids), collapse whitespace."""
+    html = _COMMENT_RE.sub('', html or '')
+    html = _SCRIPT_STYLE_RE.sub('', html)
+    html = _TAG_ATTRS_RE.sub(r'<\1>', html)
+    return _WS_RE.sub(' ', html).strip()
+
+
+def tables_signature(html):
+    """Hash of the normalized <table> markup of a page (regex only, no DOM parse)."""
+    tables = _TABLE_RE.findall(html or '')
+    return content_signature(*[normalize_markup(t) for t in tables])
+
+
+def page_signature(html):
+    """Hash of the normalized markup of a whole page (e.g. a /fights card)."""
+    return content_signature(normalize_markup(html))
+
+
+def content_signature(*parts):
+    h = hashlib.sha1()
+    for part in parts:
+        if not isinstance(part, str):
+            part = json.dumps(part, sort_keys=True, default=str)
+        h.update(part.encode('utf-8'))
+        h.update(b'\x1f')
+    return h.hexdigest()
+
+
+def roster_signature(roster, order_map):
+    return content_signature(sorted(roster or []), sorted((order_map or {}).items()))
+
+
+class EventChangeTracker:
+    """Per-event content hashes and cached rows, persisted between runs."""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('EVENT_HASH_STATE', 'event_hashes.json')
+        self._lock = threading.Lock()
+        self.events = {}
+        self.last_written_events = []
+        self.reused = set()
+        self.changed = set()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') == STATE_VERSION:
+                self.events = state.get('events', {})
+                self.last_written_events = state.get('last_written_events', [])
+        except Exception:
+            pass
+
+    @staticmethod
+    def signature(odds_signature, card_signature, event_name, event_date):
+        return content_signature(STATE_VERSION, odds_signature, card_signature, event_name, event_date or '')
+
+    def reuse(self, event_key, signature):
+        """Return a copy of last run's rows if the event's signature is unchanged, else None."""
+        with self._lock:
+            entry = self.events.get(str(event_key))
+            if not entry or entry.get('signature') != signature:
+                return None
+            self.reused.add(str(event_key))
+            return copy.deepcopy(entry.get('rows', []))
+
+    def store(self, event_key, signature, rows):
+        with self._lock:
+            self.events[str(event_key)] = {
+                'signature': signature,
+                'rows': copy.deepcopy(rows),
+                'updated_at': time.time(),
+            }
+            self.changed.add(str(event_key))
+
+    def mark_changed(self, event_key):
+        """Record that an event went through the full path without a storable signature."""
+        with self._lock:
+            self.changed.add(str(event_key))
+
+    def nothing_changed(self, event_keys):
+        """True when every event this run was reused and the event set equals the last written one."""
+        keys = sorted(str(k) for k in event_keys)
+        with self._lock:
+            return bool(keys) and not self.changed and set(keys) == self.reused and keys == sorted(self.last_written_events)
+
+    def mark_written(self, event_keys):
+        with self._lock:
+            self.last_written_events = sorted(str(k) for k in event_keys)
+
+    def prune(self, event_keys):
+        """Drop stored hashes/rows of events not in event_keys (e.g. past cards); returns how many were dropped."""
+        keep = {str(k) for k in event_keys}
+        with self._lock:
+            stale = [key for key in self.events if key not in keep]
+            for key in stale:
+                del self.events[key]
+            return len(stale)
+
+    def save(self):
+        with self._lock:
+            state = {
+                'version': STATE_VERSION,
+                'events': self.events,
+                'last_written_events': self.last_written_events,
+            }
+            try:
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"   ⚠️  Event hash state save failed: {str(e)}")
@@ -0,0 +1,115 @@
+"""
+LulSec change feed - line movement as append-only NDJSON
+
+Every run (and every watch-mode write) appends only what changed since the
+previous stored line, one compact JSON object per line:
+
+  {"ts":"2025-08-10T12:00:00","run_id":"lulsec_1754820000","type":"moved","event_id":"6488",
+   "event":"UFC 319: Du Plessis vs. Chimaev","fighter":"Khamzat Chimaev","book":"FanDuel",
+   "old":120,"new":110,"old_ts":"2025-08-10T11:00:00"}
+
+type is one of:
+  new             a line appeared (book never quoted this fighter, or it was pulled/blank before)
+  moved           odds changed
+  pulled          a live line disappeared or went blank (new = null)
+  roster_added    fighter now on the event's card (book/old/new = null)
+  roster_removed  fighter no longer on the card
+
+Odds are American odds as integers. old_ts is when the previous line was
+observed. The diff comes from the odds history store, so the feed needs
+ODDS_HISTORY_DB enabled.
+
+ODDS_CHANGE_FEED (default: OddsChanges.ndjson, 0 disables) sets the path. The
+file rotates at ODDS_CHANGE_FEED_MAX_MB (default 50) to .1 ... .N
+(ODDS_CHANGE_FEED_BACKUPS, default 5), like logging's RotatingFileHandler:
+consumers tail the current file and re-open it when its inode changes.
+"""
+import json
+import os
+import threading
+
+
+def change_type(old, new):
+    if new is None:
+        return 'pulled' if old is not None else None
+    return 'new' if old is None else 'moved'
+
+
+def line_change_records(run_id, observed_at, event_id, event_name, changes):
+    """Feed records for OddsHistoryStore.diff_event() changes (blank-to-blank entries are skipped)."""
+    records = []
+    for fighter, book, old, new, old_at in changes:
+        kind = change_type(old, new)
+        if kind is None:
+            continue
+        records.append({'ts': observed_at, 'run_id': run_id, 'type': kind, 'event_id': str(event_id),
+                        'event': event_name, 'fighter': fighter, 'book': book, 'old': old, 'new': new, 'old_ts': old_at})
+    return records
+
+
+def roster_change_records(run_id, observed_at, event_id, event_name, previous, current):
+    """roster_added/roster_removed records; nothing for an event seen for the first time (previous None)."""
+    if previous is None:
+        return []
+    records = []
+    for kind, names in (('roster_added', current - previous), ('roster_removed', previous - current)):
+        for fighter in sorted(names):
+            records.append({'ts': observed_at, 'run_id': run_id, 'type': kind, 'event_id': str(event_id),
+                            'event': event_name, 'fighter': fighter, 'book': None, 'old': None, 'new': None, 'old_ts': None})
+    return records
+
+
+class ChangeFeed:
+    """Size-rotated NDJSON append log."""
+
+    def __init__(self, path, max_bytes=50 * 1024 * 1024, backups=5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = max(0, backups)
+        self._lock = threading.Lock()
+        self.written = 0
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def emit(self, records):
+        if not records:
+            return
+        data = ''.join(json.dumps(r, ensure_ascii=False, separators=(',', ':')) + '\n' for r in records)
+        with self._lock:
+            if self.max_bytes and self._file.tell() and self._file.tell() + len(data) > self.max_bytes:
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+            self.written += len(records)
+
+    def _rotate(self):
+        self._file.close()
+        if self.backups:
+            for i in range(self.backups - 1, 0, -1):
+                src = f"{self.path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def open_change_feed():
+    """Open the configured change feed, or return None if disabled/unavailable."""
+    path = os.getenv('ODDS_CHANGE_FEED', 'OddsChanges.ndjson').strip()
+    if path in ('', '0'):
+        return None
+    try:
+        max_bytes = int(float(os.getenv('ODDS_CHANGE_FEED_MAX_MB', '50')) * 1024 * 1024)
+        backups = int(os.getenv('ODDS_CHANGE_FEED_BACKUPS', '5'))
+    except ValueError:
+        max_bytes, backups = 50 * 1024 * 1024, 5
+    try:
+        return ChangeFeed(path, max_bytes=max_bytes, backups=backups)
+    except Exception as e:
+        print(f"   ⚠️  Change feed unavailable ({path}): {str(e)}")
+        return None
@@ -0,0 +1,56 @@
+"""
+LulSec HTML parsing - one place to choose the BeautifulSoup backend
+
+HTML_PARSER=lxml|html.parser selects the backend (default: lxml when installed,
+it is several times faster than the pure-Python html.parser). make_soup() can
+also build only the subtrees a caller needs (SoupStrainer), e.g. just the
+<table> elements of a pair-link odds page or the JSON-LD/meta tags of an event
+page, instead of the whole document.
+
+Backend equivalence on recorded pages: benchmarks/verify_parser_backends.py
+"""
+import os
+import time
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from run_metrics import get_metrics
+
+try:
+    import lxml  # noqa: F401
+    HAVE_LXML = True
+except Exception:
+    HAVE_LXML = False
+
+SUPPORTED_BACKENDS = ('lxml', 'html.parser')
+
+# Named restricted-parse targets: only these subtrees are built
+PARSE_TARGETS = {
+    'tables': SoupStrainer('table'),
+    'anchors': SoupStrainer('a'),
+    'event_meta': SoupStrainer(['script', 'meta', 'title']),
+}
+
+
+def parser_backend():
+    """Return the configured backend name, falling back to html.parser if lxml is missing."""
+    backend = os.getenv('HTML_PARSER', '').strip().lower()
+    if backend not in SUPPORTED_BACKENDS:
+        backend = 'lxml' if HAVE_LXML else 'html.parser'
+    if backend == 'lxml' and not HAVE_LXML:
+        backend = 'html.parser'
+    return backend
+
+
+def make_soup(html, only=None, backend=None):
+    """Parse html with the configured backend.
+
+    only: optional PARSE_TARGETS key (or SoupStrainer) to build just those subtrees.
+    backend: override the configured backend for this call.
+    """
+    parse_only = PARSE_TARGETS.get(only, only) if only else None
+    started = time.monotonic()
+    soup = BeautifulSoup(html or '', backend or parser_backend(), parse_only=parse_only)
+    target = only if isinstance(only, str) else ('custom' if only else 'full')
+    get_metrics().observe('parse_seconds', time.monotonic() - started, target=target)
+    return soup
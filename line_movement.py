@@ -0,0 +1,445 @@
+"""
+LulSec line movement - per fighter/book line statistics over the odds history store
+
+    python line_movement.py [update|rebuild|steam [hours]]
+
+For every (event, fighter, book) line in OddsHistory.sqlite this keeps:
+
+  open      first live line ever observed (odds + time)
+  current   latest observation (NULL = pulled/blank)
+  high/low  best and worst payout seen (American odds, compared as decimal payout)
+  moves     number of times the live line changed
+  velocity  implied-probability change from open to current, in percentage points per hour
+            (elapsed time floored at one hour)
+  closing   last live line observed on or before the event date
+
+and detects steam: STEAM_MIN_BOOKS (default 3) books moving the same fighter in
+the same direction within STEAM_WINDOW_MINUTES (default 30). Direction +1 means
+the fighter shortened (implied probability up), -1 drifted.
+
+Statistics live in the same database (line_stats, line_moves, steam_signals)
+and are updated incrementally: update() reads only observations with an id
+above the last processed one, aggregates them with NumPy (group by line via
+np.unique, first/last/max per group via reduceat) and merges the result into
+the stored rows of the lines it touched. Large backlogs are processed in
+chunks of LINE_MOVEMENT_BATCH observations (default 200000).
+
+LINE_MOVEMENT=0 disables the end-of-run update; LINE_MOVEMENT_CSV (default
+OddsLineMovement.csv, 0 disables) gets the stats of the run's events.
+"""
+import csv
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except Exception:
+    np = None
+    HAVE_NUMPY = False
+
+LINE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS line_stats (
+    event_id TEXT NOT NULL,
+    fighter TEXT NOT NULL,
+    book TEXT NOT NULL,
+    event TEXT NOT NULL,
+    open_odds INTEGER,
+    open_at TEXT,
+    current_odds INTEGER,
+    current_at TEXT,
+    last_live_odds INTEGER,
+    high_odds INTEGER,
+    low_odds INTEGER,
+    moves INTEGER NOT NULL DEFAULT 0,
+    velocity REAL,
+    closing_odds INTEGER,
+    closing_at TEXT,
+    last_obs_id INTEGER NOT NULL,
+    PRIMARY KEY (event_id, fighter, book)
+);
+CREATE TABLE IF NOT EXISTS line_moves (
+    obs_id INTEGER PRIMARY KEY,
+    event_id TEXT NOT NULL,
+    fighter TEXT NOT NULL,
+    book TEXT NOT NULL,
+    observed_at TEXT NOT NULL,
+    ts REAL NOT NULL,
+    old_odds INTEGER NOT NULL,
+    new_odds INTEGER NOT NULL,
+    direction INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_line_moves_ts ON line_moves(ts);
+CREATE TABLE IF NOT EXISTS steam_signals (
+    obs_id INTEGER PRIMARY KEY,
+    event_id TEXT NOT NULL,
+    event TEXT NOT NULL,
+    fighter TEXT NOT NULL,
+    direction INTEGER NOT NULL,
+    books INTEGER NOT NULL,
+    window_start TEXT NOT NULL,
+    detected_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS analytics_state (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+STATS_COLUMNS = ['event_id', 'fighter', 'book', 'event', 'open_odds', 'open_at', 'current_odds', 'current_at',
+                 'last_live_odds', 'high_odds', 'low_odds', 'moves', 'velocity', 'closing_odds', 'closing_at', 'last_obs_id']
+CSV_COLUMNS = ['Event', 'EventID', 'EventDate', 'Fighter', 'Book', 'Open', 'OpenAt', 'Current', 'CurrentAt',
+               'High', 'Low', 'Moves', 'VelocityPerHour', 'Closing', 'ClosingAt']
+STATE_KEY = 'line_stats_last_id'
+KEY_SEP = '\x1f'
+
+
+def _env_number(name, default, cast=float):
+    try:
+        return cast(os.getenv(name, str(default)))
+    except ValueError:
+        return cast(default)
+
+
+def line_movement_enabled():
+    if os.getenv('LINE_MOVEMENT', '1').strip() == '0':
+        return False
+    if not HAVE_NUMPY:
+        print("   ⚠️  Line movement skipped: numpy is not installed")
+        return False
+    return True
+
+
+def to_decimal(odds):
+    """American odds (float array, NaN = no line) → decimal payout."""
+    return np.where(odds > 0, 1.0 + odds / 100.0, 1.0 + 100.0 / np.maximum(np.abs(odds), 1.0))
+
+
+def to_seconds(stamps):
+    """ISO timestamps (None allowed) → float epoch-like seconds, NaN for missing."""
+    parsed = np.array([s or 'NaT' for s in stamps], dtype='datetime64[us]')
+    seconds = parsed.astype(np.int64) / 1e6
+    seconds[np.isnat(parsed)] = np.nan
+    return seconds
+
+
+def _ints(values):
+    return [None if v != v else int(v) for v in values.tolist()]
+
+
+def _texts(values):
+    return [v if v else None for v in values.tolist()]
+
+
+class LineMovement:
+    """Incremental line statistics and steam detection on an OddsHistoryStore."""
+
+    def __init__(self, store):
+        self.store = store
+        self.steam_window = _env_number('STEAM_WINDOW_MINUTES', 30) * 60
+        self.steam_min_books = max(2, _env_number('STEAM_MIN_BOOKS', 3, int))
+        self.batch_size = max(1000, _env_number('LINE_MOVEMENT_BATCH', 200000, int))
+        with store._lock:
+            store.conn.executescript(LINE_SCHEMA)
+            store.conn.commit()
+
+    def _last_id(self):
+        row = self.store.conn.execute('SELECT value FROM analytics_state WHERE name = ?', (STATE_KEY,)).fetchone()
+        return row[0] if row else 0
+
+    def _event_dates(self, event_ids):
+        marks = ','.join('?' * len(event_ids))
+        rows = self.store.conn.execute(
+            f"SELECT event_id, event_date FROM run_fighters WHERE event_id IN ({marks}) ORDER BY rowid", list(event_ids)).fetchall()
+        return {event_id: event_date or '' for event_id, event_date in rows}
+
+    def _stored_stats(self, event_ids):
+        marks = ','.join('?' * len(event_ids))
+        rows = self.store.conn.execute(
+            f"SELECT {', '.join(STATS_COLUMNS)} FROM line_stats WHERE event_id IN ({marks})", list(event_ids)).fetchall()
+        return {KEY_SEP.join(row[:3]): row for row in rows}
+
+    def update(self):
+        """Fold every observation not processed yet into line_stats; returns (observations, lines, moves, steam)."""
+        totals = [0, 0, 0, 0]
+        with self.store._lock:
+            while True:
+                last_id = self._last_id()
+                rows = self.store.conn.execute(
+                    'SELECT id, observed_at, event_id, event, fighter, book, odds FROM observations WHERE id > ? ORDER BY id LIMIT ?',
+                    (last_id, self.batch_size)).fetchall()
+                if not rows:
+                    break
+                counts = self._apply_batch(rows)
+                totals = [a + b for a, b in zip(totals, counts)]
+                if len(rows) < self.batch_size:
+                    break
+        return tuple(totals)
+
+    def _apply_batch(self, rows):
+        conn = self.store.conn
+        obs_ids, stamps, event_ids, events, fighters, books, odds = zip(*rows)
+        n = len(rows)
+        ids = np.array(obs_ids, dtype=np.int64)
+        ts = to_seconds(stamps)
+        values = np.array([np.nan if v is None else v for v in odds], dtype=np.float64)
+        keys, inverse = np.unique(np.array([KEY_SEP.join(k) for k in zip(event_ids, fighters, books)]), return_inverse=True)
+        n_keys = len(keys)
+
+        # Rows grouped by line, oldest first within a line (ids are ascending, the sort is stable)
+        order = np.argsort(inverse, kind='stable')
+        group = inverse[order]
+        ids, ts, values = ids[order], ts[order], values[order]
+        stamps = np.array(stamps, dtype=object)[order]
+        starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+        ends = np.r_[starts[1:], n] - 1
+        live = ~np.isnan(values)
+        decimal = to_decimal(values)
+
+        key_parts = [key.split(KEY_SEP) for key in keys.tolist()]
+        key_events = np.array(events, dtype=object)[order][ends]
+        batch_event_ids = sorted({parts[0] for parts in key_parts})
+        stored = self._stored_stats(batch_event_ids)
+        stored_rows = [stored.get(key) for key in keys.tolist()]
+
+        def stored_column(name, numeric=True):
+            idx = STATS_COLUMNS.index(name)
+            column = [row[idx] if row else None for row in stored_rows]
+            if numeric:
+                return np.array([np.nan if v is None else v for v in column], dtype=np.float64)
+            return np.array([v or '' for v in column], dtype=object)
+
+        # Previous live line of every row: the last live row before it in its group, else the stored current line
+        positions = np.arange(n)
+        last_live = np.maximum.accumulate(np.where(live, positions, -1))
+        prev_pos = np.r_[-1, last_live[:-1]]
+        stored_last_live = stored_column('last_live_odds')
+        previous = np.where(prev_pos >= starts[group], values[np.maximum(prev_pos, 0)], stored_last_live[group])
+        moved = live & ~np.isnan(previous) & (values != previous)
+        with np.errstate(invalid='ignore'):
+            direction = np.where(moved, np.sign(to_decimal(previous) - decimal), 0).astype(np.int64)
+
+        # Per-line aggregates over the live rows of this batch
+        live_rows = np.flatnonzero(live)
+        live_groups = group[live_rows]
+        has_live, first_in_live = np.unique(live_groups, return_index=True)
+        last_in_live = np.r_[first_in_live[1:], live_rows.size] - 1
+        batch_open = np.full(n_keys, np.nan)
+        batch_open_at = np.full(n_keys, '', dtype=object)
+        batch_last_live = np.full(n_keys, np.nan)
+        batch_high = np.full(n_keys, np.nan)
+        batch_low = np.full(n_keys, np.nan)
+        if live_rows.size:
+            batch_open[has_live] = values[live_rows[first_in_live]]
+            batch_open_at[has_live] = stamps[live_rows[first_in_live]]
+            batch_last_live[has_live] = values[live_rows[last_in_live]]
+            # Sorted by payout within each line: first = lowest, last = highest (keeps the quoted odds, e.g. -100 vs +100)
+            by_payout = live_rows[np.lexsort((decimal[live_rows], live_groups))]
+            batch_low[has_live] = values[by_payout[first_in_live]]
+            batch_high[has_live] = values[by_payout[last_in_live]]
+
+        event_dates = self._event_dates(batch_event_ids)
+        key_dates = np.array([event_dates.get(parts[0], '') for parts in key_parts], dtype=object)
+        obs_dates = np.array([s[:10] for s in stamps.tolist()], dtype=object)
+        closing_rows = np.flatnonzero(live & (key_dates[group] != '') & (obs_dates <= key_dates[group]))
+        batch_closing = np.full(n_keys, np.nan)
+        batch_closing_at = np.full(n_keys, '', dtype=object)
+        if closing_rows.size:
+            closing_groups = group[closing_rows]
+            last_of_group = np.r_[np.flatnonzero(closing_groups[1:] != closing_groups[:-1]), closing_rows.size - 1]
+            batch_closing[closing_groups[last_of_group]] = values[closing_rows[last_of_group]]
+            batch_closing_at[closing_groups[last_of_group]] = stamps[closing_rows[last_of_group]]
+
+        # Merge with the stored rows of the same lines
+        stored_open = stored_column('open_odds')
+        keep_open = ~np.isnan(stored_open)
+        open_odds = np.where(keep_open, stored_open, batch_open)
+        open_at = np.where(keep_open, stored_column('open_at', False), batch_open_at)
+        current = values[ends]
+        current_at = stamps[ends]
+        stored_high, stored_low = stored_column('high_odds'), stored_column('low_odds')
+        high = np.where(np.isnan(batch_high) | (to_decimal(stored_high) >= to_decimal(batch_high)), stored_high, batch_high)
+        high = np.where(np.isnan(high), batch_high, high)
+        low = np.where(np.isnan(batch_low) | (to_decimal(stored_low) <= to_decimal(batch_low)), stored_low, batch_low)
+        low = np.where(np.isnan(low), batch_low, low)
+        last_live_odds = np.where(np.isnan(batch_last_live), stored_last_live, batch_last_live)
+        moves = np.nan_to_num(stored_column('moves')).astype(np.int64) + np.bincount(group[moved], minlength=n_keys)
+        new_closing = ~np.isnan(batch_closing)
+        closing = np.where(new_closing, batch_closing, stored_column('closing_odds'))
+        closing_at = np.where(new_closing, batch_closing_at, stored_column('closing_at', False))
+
+        # Elapsed time is floored at one hour so back-to-back runs do not blow the rate up
+        hours = np.fmax((ts[ends] - to_seconds(open_at.tolist())) / 3600.0, 1.0)
+        with np.errstate(invalid='ignore'):
+            velocity = np.where(~np.isnan(current) & ~np.isnan(open_odds),
+                                (1.0 / to_decimal(current) - 1.0 / to_decimal(open_odds)) * 100.0 / hours, np.nan)
+
+        stats_rows = list(zip(
+            [p[0] for p in key_parts], [p[1] for p in key_parts], [p[2] for p in key_parts], key_events.tolist(),
+            _ints(open_odds), _texts(open_at), _ints(current), _texts(current_at), _ints(last_live_odds), _ints(high), _ints(low),
+            moves.tolist(), [None if v != v else round(v, 4) for v in velocity.tolist()],
+            _ints(closing), _texts(closing_at), ids[ends].tolist(),
+        ))
+        move_rows = np.flatnonzero(moved)
+        move_records = list(zip(
+            ids[move_rows].tolist(), [key_parts[g][0] for g in group[move_rows]], [key_parts[g][1] for g in group[move_rows]],
+            [key_parts[g][2] for g in group[move_rows]], stamps[move_rows].tolist(), ts[move_rows].tolist(),
+            _ints(previous[move_rows]), _ints(values[move_rows]), direction[move_rows].tolist(),
+        ))
+
+        conn.executemany(f"INSERT OR REPLACE INTO line_stats ({', '.join(STATS_COLUMNS)}) "
+                         f"VALUES ({', '.join('?' * len(STATS_COLUMNS))})", stats_rows)
+        conn.executemany('INSERT OR REPLACE INTO line_moves VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', move_records)
+        steam = self._detect_steam(ts[move_rows], ids[move_rows]) if move_rows.size else 0
+        conn.execute('INSERT OR REPLACE INTO analytics_state (name, value) VALUES (?, ?)', (STATE_KEY, int(ids.max())))
+        conn.commit()
+        return n, n_keys, int(move_rows.size), steam
+
+    def _detect_steam(self, new_ts, new_ids):
+        """Record a steam signal when a new move is the one that brings a fighter to steam_min_books same-direction books in the window."""
+        conn = self.store.conn
+        moves = conn.execute(
+            'SELECT obs_id, event_id, fighter, book, observed_at, ts, direction FROM line_moves WHERE ts >= ? ORDER BY ts, obs_id',
+            (float(np.nanmin(new_ts)) - self.steam_window,)).fetchall()
+        if not moves:
+            return 0
+        obs_ids, event_ids, fighters, books, stamps, ts, directions = zip(*moves)
+        ts = np.array(ts, dtype=np.float64)
+        side = np.unique(np.array([f"{e}{KEY_SEP}{f}{KEY_SEP}{d}" for e, f, d in zip(event_ids, fighters, directions)]),
+                         return_inverse=True)[1]
+        side_book = np.unique(np.array([f"{e}{KEY_SEP}{f}{KEY_SEP}{d}{KEY_SEP}{b}"
+                                        for e, f, d, b in zip(event_ids, fighters, directions, books)]), return_inverse=True)[1]
+
+        # A book moving the same side again within the window is counted once
+        order = np.lexsort((ts, side_book))
+        sb, sb_ts = side_book[order], ts[order]
+        repeat = np.zeros(len(ts), dtype=bool)
+        repeat[order[1:]] = (sb[1:] == sb[:-1]) & (sb_ts[1:] - sb_ts[:-1] <= self.steam_window)
+        kept = np.flatnonzero(~repeat)
+
+        # Same-direction books in [t - window, t] per side, via searchsorted on (side, ts)
+        order = kept[np.lexsort((ts[kept], side[kept]))]
+        span = float(np.nanmax(ts) - np.nanmin(ts)) + self.steam_window + 1.0
+        position = side[order] * span + (ts[order] - np.nanmin(ts))
+        window_lo = np.searchsorted(position, position - self.steam_window, side='left')
+        books_in_window = np.arange(len(order)) - window_lo + 1
+        new_id_set = np.isin(np.array(obs_ids)[order], new_ids)
+        hits = np.flatnonzero(new_id_set & (books_in_window == self.steam_min_books))
+        if not hits.size:
+            return 0
+        names = dict(conn.execute('SELECT event_id, event FROM line_stats WHERE event_id IN ({})'.format(
+            ','.join('?' * len(set(event_ids)))), sorted(set(event_ids))).fetchall())
+        signals = []
+        for i in hits.tolist():
+            row = order[i]
+            signals.append((obs_ids[row], event_ids[row], names.get(event_ids[row], ''), fighters[row], directions[row],
+                            int(books_in_window[i]), stamps[order[window_lo[i]]], stamps[row]))
+        conn.executemany('INSERT OR IGNORE INTO steam_signals VALUES (?, ?, ?, ?, ?, ?, ?, ?)', signals)
+        return len(signals)
+
+    def rebuild(self):
+        """Drop the derived tables and recompute them from the whole observation log."""
+        with self.store._lock:
+            for table in ('line_stats', 'line_moves', 'steam_signals'):
+                self.store.conn.execute(f'DELETE FROM {table}')
+            self.store.conn.execute('DELETE FROM analytics_state WHERE name = ?', (STATE_KEY,))
+            self.store.conn.commit()
+        return self.update()
+
+    def stats_for_events(self, event_ids):
+        """line_stats rows (dicts) of the given events, ordered by event, fighter, book."""
+        event_ids = [str(e) for e in event_ids]
+        if not event_ids:
+            return []
+        with self.store._lock:
+            rows = self.store.conn.execute(
+                f"SELECT {', '.join(STATS_COLUMNS)} FROM line_stats WHERE event_id IN ({','.join('?' * len(event_ids))}) "
+                f"ORDER BY event_id, fighter, book", event_ids).fetchall()
+        return [dict(zip(STATS_COLUMNS, row)) for row in rows]
+
+    def recent_steam(self, hours=24):
+        since = (datetime.now() - timedelta(hours=hours)).isoformat()
+        with self.store._lock:
+            return self.store.conn.execute(
+                'SELECT detected_at, event, fighter, direction, books, window_start FROM steam_signals '
+                'WHERE detected_at >= ? ORDER BY detected_at', (since,)).fetchall()
+
+
+def write_line_movement_csv(movement, ufc_events, path):
+    """Write the line stats of the run's events (event order, then fighter/book) via a temp file + atomic rename."""
+    from odds_output import replace_atomically
+    by_id = {str(data.get('event_id') or name): (name, data.get('event_date', '')) for name, data in ufc_events.items()}
+    stats = movement.stats_for_events(list(by_id))
+    position = {event_id: i for i, event_id in enumerate(by_id)}
+    stats.sort(key=lambda s: position.get(s['event_id'], len(position)))
+    fmt = lambda v: '' if v is None else f"{v:+d}"
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        for s in stats:
+            event_name, event_date = by_id.get(s['event_id'], (s['event'], ''))
+            writer.writerow([event_name, s['event_id'], event_date, s['fighter'], s['book'],
+                             fmt(s['open_odds']), s['open_at'] or '', fmt(s['current_odds']), s['current_at'] or '',
+                             fmt(s['high_odds']), fmt(s['low_odds']), s['moves'],
+                             '' if s['velocity'] is None else s['velocity'], fmt(s['closing_odds']), s['closing_at'] or ''])
+    replace_atomically(tmp_path, path)
+    return len(stats)
+
+
+def update_line_movement(history, ufc_events=None):
+    """End-of-run hook: incremental update, then the run's events to LINE_MOVEMENT_CSV. Returns (moves, steam) or None."""
+    if history is None or not line_movement_enabled():
+        return None
+    try:
+        t0 = time.perf_counter()
+        movement = LineMovement(history)
+        observations, lines, moves, steam = movement.update()
+        print(f"   📈 Line movement: {observations} new observation(s) over {lines} line(s), {moves} move(s), "
+              f"{steam} steam signal(s) ({(time.perf_counter() - t0) * 1000:.1f} ms)")
+        csv_path = os.getenv('LINE_MOVEMENT_CSV', 'OddsLineMovement.csv').strip()
+        if ufc_events and csv_path not in ('', '0'):
+            write_line_movement_csv(movement, ufc_events, csv_path)
+        return moves, steam
+    except Exception as e:
+        print(f"   ⚠️  Line movement update failed: {str(e)}")
+        return None
+
+
+def main():
+    from odds_history import history_db_path, open_history_store
+    command = sys.argv[1] if len(sys.argv) > 1 else 'update'
+    if not HAVE_NUMPY:
+        print("   ❌ numpy is required for line movement analytics")
+        sys.exit(1)
+    store = open_history_store()
+    if store is None:
+        print(f"   ❌ Odds history store not available ({history_db_path() or 'ODDS_HISTORY_DB disabled'})")
+        sys.exit(1)
+    try:
+        movement = LineMovement(store)
+        if command in ('update', 'rebuild'):
+            t0 = time.perf_counter()
+            observations, lines, moves, steam = movement.rebuild() if command == 'rebuild' else movement.update()
+            print(f"   📈 {command}: {observations} observation(s), {lines} line(s), {moves} move(s), "
+                  f"{steam} steam signal(s) in {time.perf_counter() - t0:.2f}s")
+            return
+        if command == 'steam':
+            hours = float(sys.argv[2]) if len(sys.argv) > 2 else 24
+            movement.update()
+            signals = movement.recent_steam(hours)
+            for detected_at, event, fighter, direction, books, window_start in signals:
+                arrow = '⬆️ shortening' if direction > 0 else '⬇️ drifting'
+                print(f"   🚂 {detected_at}  {event} - {fighter}: {books} books {arrow} since {window_start}")
+            print(f"   {len(signals)} steam signal(s) in the last {hours:g}h")
+            return
+        print("Usage: python line_movement.py [update|rebuild|steam [hours]]")
+        sys.exit(2)
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
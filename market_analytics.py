@@ -0,0 +1,270 @@
+"""
+LulSec market analytics - whole-card pricing metrics over the odds matrix
+
+Fighters are paired into fights by (event, fight order): the FightOrder from
+extract_fight_order_from_card / the MMAFights.csv order_map, with the fights
+index filling rows that have none. For every fight × book the sides' American
+odds become vectors over all fights at once (NumPy, no per-fight loops):
+
+  implied probability   100 / (odds + 100) for underdogs, -odds / (-odds + 100) for favourites
+  overround             p_a + p_b - 1 per book (the book's margin on that fight)
+  no-vig probability    p_a / (p_a + p_b) per book; fair line = mean over the books quoting both sides
+  best price            highest decimal payout per side across books, and which book has it
+  arbitrage             1/best_a + 1/best_b < 1: margin and stake split across the two best books
+
+Results go out as OddsMarketAnalytics.csv (one row per fight) and a
+"market_analytics" section in OddsMarketCombo.json.
+MARKET_ANALYTICS=0 disables; NumPy missing disables it with a warning.
+"""
+import csv
+import os
+import time
+
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except Exception:
+    np = None
+    HAVE_NUMPY = False
+
+from odds_matrix import INT16_MAX, NO_ORDER
+
+ANALYTICS_CSV = 'OddsMarketAnalytics.csv'
+ANALYTICS_COLUMNS = [
+    'Event', 'EventDate', 'FightOrder', 'FighterA', 'FighterB', 'Books',
+    'BestOddsA', 'BestBookA', 'BestOddsB', 'BestBookB',
+    'FairProbA', 'FairProbB', 'FairOddsA', 'FairOddsB',
+    'MinOverround', 'MedianOverround', 'ArbMargin', 'ArbStakeA', 'ArbStakeB',
+]
+
+
+def market_analytics_enabled():
+    if os.getenv('MARKET_ANALYTICS', '1').strip() == '0':
+        return False
+    if not HAVE_NUMPY:
+        print("   ⚠️  Market analytics skipped: numpy is not installed")
+        return False
+    return True
+
+
+def implied_probability(odds):
+    odds = odds.astype(np.float64)
+    return np.where(odds > 0, 100.0 / (np.maximum(odds, 0.0) + 100.0), -odds / (100.0 - np.minimum(odds, 0.0)))
+
+
+def decimal_odds(odds):
+    odds = odds.astype(np.float64)
+    # odds of 0 only appear in cells without a line; keep them finite instead of dividing by zero
+    return np.where(odds > 0, 1.0 + odds / 100.0, 1.0 + 100.0 / np.maximum(-odds, 1.0))
+
+
+def probability_to_american(prob):
+    """Fair American odds for probabilities in (0, 1); NaN elsewhere."""
+    prob = np.asarray(prob, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fav = -100.0 * prob / (1.0 - prob)
+        dog = 100.0 * (1.0 - prob) / prob
+    out = np.where(prob >= 0.5, fav, dog)
+    return np.where((prob > 0) & (prob < 1), np.round(out), np.nan)
+
+
+def pair_fights(matrix, fights_index_by_id=None, ufc_events=None):
+    """(side_a_rows, side_b_rows) int arrays: two rows per (event, fight order), in output order."""
+    order_maps = {}
+    if fights_index_by_id and ufc_events:
+        for event_name, data in ufc_events.items():
+            meta = fights_index_by_id.get(str(data.get('event_id', '')))
+            if meta:
+                order_maps[event_name] = meta.get('order_map') or {}
+    orders = np.frombuffer(matrix.fight_orders, dtype=np.int16).astype(np.int64)
+    event_ids = np.frombuffer(matrix.event_ids, dtype=np.int32).astype(np.int64)
+    for row in np.flatnonzero(orders == NO_ORDER) if order_maps else ():
+        event = matrix.events.names[event_ids[row]]
+        fighter = matrix.fighters.names[matrix.fighter_ids[row]].strip().lower()
+        orders[row] = order_maps.get(event, {}).get(fighter, NO_ORDER)
+
+    # Group rows by (event, order); keep groups of exactly two, sides in row order
+    rows = np.flatnonzero(orders > 0)
+    keys = event_ids[rows] * (INT16_MAX + 1) + orders[rows]
+    sort = np.argsort(keys, kind='stable')
+    rows, keys = rows[sort], keys[sort]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    sizes = np.diff(np.r_[starts, len(keys)])
+    pair_starts = starts[sizes == 2]
+    side_a, side_b = rows[pair_starts], rows[pair_starts + 1]
+    first_seen = np.argsort(side_a, kind='stable')
+    return side_a[first_seen].astype(np.intp), side_b[first_seen].astype(np.intp)
+
+
+class MarketAnalytics:
+    """Per-fight × per-book pricing arrays for one card set."""
+
+    def __init__(self, matrix, fights_index_by_id=None, ufc_events=None):
+        self.matrix = matrix
+        self.books = matrix.sportsbooks
+        self.side_a, self.side_b = pair_fights(matrix, fights_index_by_id, ufc_events)
+        odds, has = matrix.to_numpy()
+        n_fights = len(self.side_a)
+
+        self.odds_a, self.odds_b = odds[self.side_a], odds[self.side_b]
+        self.has_a, self.has_b = has[self.side_a], has[self.side_b]
+        both = self.has_a & self.has_b
+        self.both = both
+
+        p_a = np.where(self.has_a, implied_probability(self.odds_a), np.nan)
+        p_b = np.where(self.has_b, implied_probability(self.odds_b), np.nan)
+        self.implied_a, self.implied_b = p_a, p_b
+        self.overround = np.where(both, p_a + p_b - 1.0, np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.novig_a = np.where(both, p_a / (p_a + p_b), np.nan)
+        self.books_quoted = both.sum(axis=1)
+        self.fair_a = np.full(n_fights, np.nan)
+        if n_fights:
+            quoted = self.books_quoted > 0
+            self.fair_a[quoted] = np.nanmean(self.novig_a[quoted], axis=1)
+        self.fair_b = 1.0 - self.fair_a
+
+        dec_a = np.where(self.has_a, decimal_odds(self.odds_a), -np.inf)
+        dec_b = np.where(self.has_b, decimal_odds(self.odds_b), -np.inf)
+        if n_fights and len(self.books):
+            self.best_book_a = dec_a.argmax(axis=1)
+            self.best_book_b = dec_b.argmax(axis=1)
+            rows = np.arange(n_fights)
+            self.best_dec_a = dec_a[rows, self.best_book_a]
+            self.best_dec_b = dec_b[rows, self.best_book_b]
+            self.best_odds_a = self.odds_a[rows, self.best_book_a]
+            self.best_odds_b = self.odds_b[rows, self.best_book_b]
+        else:
+            self.best_book_a = self.best_book_b = np.zeros(n_fights, dtype=np.intp)
+            self.best_dec_a = self.best_dec_b = np.full(n_fights, -np.inf)
+            self.best_odds_a = self.best_odds_b = np.zeros(n_fights, dtype=np.int16)
+        self.has_best = np.isfinite(self.best_dec_a) & np.isfinite(self.best_dec_b)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inv = 1.0 / self.best_dec_a + 1.0 / self.best_dec_b
+            self.arb_margin = np.where(self.has_best & (inv < 1.0), 1.0 - inv, np.nan)
+            self.arb_stake_a = np.where(np.isfinite(self.arb_margin), (1.0 / self.best_dec_a) / inv, np.nan)
+        self.arb_stake_b = 1.0 - self.arb_stake_a
+        quoted = self.books_quoted > 0
+        margins = np.where(both, self.overround, np.nan)[quoted]
+        self.min_overround = np.full(n_fights, np.nan)
+        self.median_overround = np.full(n_fights, np.nan)
+        if margins.size:
+            self.min_overround[quoted] = np.nanmin(margins, axis=1)
+            self.median_overround[quoted] = np.nanmedian(margins, axis=1)
+
+    def __len__(self):
+        return len(self.side_a)
+
+    def arbitrage_count(self):
+        return int(np.isfinite(self.arb_margin).sum())
+
+    def _fight_label(self, i):
+        fighter_a, event, event_date, order, _source = self.matrix.row_label(int(self.side_a[i]))
+        fighter_b = self.matrix.row_label(int(self.side_b[i]))[0]
+        return event, event_date, order, fighter_a, fighter_b
+
+    def fight_records(self):
+        """JSON section: one dict per fight."""
+        fair_odds_a = probability_to_american(self.fair_a)
+        fair_odds_b = probability_to_american(self.fair_b)
+        records = []
+        for i in range(len(self)):
+            event, event_date, order, fighter_a, fighter_b = self._fight_label(i)
+            per_book = {}
+            for b in np.flatnonzero(self.both[i]):
+                per_book[self.books[b]] = {'overround': _round(self.overround[i, b]), 'novig_a': _round(self.novig_a[i, b])}
+            records.append({
+                'event': event,
+                'event_date': event_date,
+                'fight_order': order,
+                'fighter_a': fighter_a,
+                'fighter_b': fighter_b,
+                'books_quoted': int(self.books_quoted[i]),
+                'best_a': self._best(i, self.best_book_a, self.best_odds_a, self.has_a),
+                'best_b': self._best(i, self.best_book_b, self.best_odds_b, self.has_b),
+                'fair_prob_a': _round(self.fair_a[i]),
+                'fair_prob_b': _round(self.fair_b[i]),
+                'fair_odds_a': _int_or_none(fair_odds_a[i]),
+                'fair_odds_b': _int_or_none(fair_odds_b[i]),
+                'min_overround': _round(self.min_overround[i]),
+                'median_overround': _round(self.median_overround[i]),
+                'arbitrage': None if not np.isfinite(self.arb_margin[i]) else {
+                    'margin': _round(self.arb_margin[i]),
+                    'stake_a': _round(self.arb_stake_a[i]),
+                    'stake_b': _round(self.arb_stake_b[i]),
+                },
+                'books': per_book,
+            })
+        return records
+
+    def _best(self, i, best_book, best_odds, has):
+        b = int(best_book[i])
+        if not len(self.books) or not has[i, b]:
+            return None
+        return {'book': self.books[b], 'odds': f"{int(best_odds[i]):+d}"}
+
+    def csv_rows(self):
+        for record in self.fight_records():
+            best_a = record['best_a'] or {}
+            best_b = record['best_b'] or {}
+            arb = record['arbitrage'] or {}
+            yield [
+                record['event'], record['event_date'], record['fight_order'], record['fighter_a'], record['fighter_b'],
+                record['books_quoted'], best_a.get('odds', ''), best_a.get('book', ''), best_b.get('odds', ''), best_b.get('book', ''),
+                _blank(record['fair_prob_a']), _blank(record['fair_prob_b']),
+                '' if record['fair_odds_a'] is None else f"{record['fair_odds_a']:+d}",
+                '' if record['fair_odds_b'] is None else f"{record['fair_odds_b']:+d}",
+                _blank(record['min_overround']), _blank(record['median_overround']),
+                _blank(arb.get('margin')), _blank(arb.get('stake_a')), _blank(arb.get('stake_b')),
+            ]
+
+    def summary(self):
+        return {
+            'fights': len(self),
+            'books': len(self.books),
+            'fights_with_prices': int((self.books_quoted > 0).sum()),
+            'arbitrage_opportunities': self.arbitrage_count(),
+        }
+
+    def json_section(self):
+        return {'summary': self.summary(), 'fights': self.fight_records()}
+
+
+def _round(value, digits=4):
+    value = float(value)
+    return None if value != value or value in (float('inf'), float('-inf')) else round(value, digits)
+
+
+def _int_or_none(value):
+    value = float(value)
+    return None if value != value else int(value)
+
+
+def _blank(value):
+    return '' if value is None else value
+
+
+def compute_market_analytics(matrix, fights_index_by_id=None, ufc_events=None):
+    """MarketAnalytics for the matrix, or None when disabled/unavailable."""
+    if not market_analytics_enabled():
+        return None
+    try:
+        t0 = time.perf_counter()
+        analytics = MarketAnalytics(matrix, fights_index_by_id, ufc_events)
+        print(f"   📐 Market analytics: {len(analytics)} fights × {len(analytics.books)} books, "
+              f"{analytics.arbitrage_count()} arbitrage opportunit(ies) ({(time.perf_counter() - t0) * 1000:.1f} ms)")
+        return analytics
+    except Exception as e:
+        print(f"   ⚠️  Market analytics failed: {str(e)}")
+        return None
+
+
+def write_analytics_csv(analytics, path=ANALYTICS_CSV):
+    """Write OddsMarketAnalytics.csv via a temp file + atomic rename."""
+    from odds_output import replace_atomically
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(ANALYTICS_COLUMNS)
+        writer.writerows(analytics.csv_rows())
+    replace_atomically(tmp_path, path)
@@ -0,0 +1,188 @@
+"""
+LulSec odds history - append-only SQLite store of line observations
+
+Every run appends only the (event_id, fighter, book, odds) observations that
+differ from the latest stored line, tagged with extraction_run_id and a
+timestamp. A NULL odds value means the line is blank or was pulled. Nothing
+is ever updated or deleted, so line movement across runs is preserved.
+
+Each run's roster (run_fighters, in output order) and sportsbook header (runs)
+are stored too; the change feed reads previous rosters from it. The CSV/JSON
+are written from the run's odds matrix (odds_output.py), which holds the same
+lines this store just recorded.
+
+ODDS_HISTORY_DB (default: OddsHistory.sqlite) sets the path; ODDS_HISTORY_DB=0 disables.
+"""
+import json
+import os
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    sportsbooks TEXT NOT NULL DEFAULT '[]',
+    events TEXT NOT NULL DEFAULT '{}',
+    total_fighters INTEGER,
+    total_events INTEGER
+);
+CREATE TABLE IF NOT EXISTS observations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    observed_at TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    event TEXT NOT NULL,
+    fighter TEXT NOT NULL,
+    book TEXT NOT NULL,
+    odds INTEGER
+);
+-- Latest line per fighter/book (and per event): MAX(id) over this index
+CREATE INDEX IF NOT EXISTS idx_obs_line ON observations(event_id, fighter, book, id);
+CREATE INDEX IF NOT EXISTS idx_obs_fighter_book ON observations(fighter, book, id);
+CREATE INDEX IF NOT EXISTS idx_obs_run ON observations(run_id);
+CREATE TABLE IF NOT EXISTS run_fighters (
+    run_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    event_id TEXT NOT NULL,
+    event TEXT NOT NULL,
+    event_date TEXT,
+    fight_order TEXT,
+    fighter TEXT NOT NULL,
+    source TEXT,
+    books TEXT NOT NULL DEFAULT '[]',
+    PRIMARY KEY (run_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_run_fighters_event ON run_fighters(event_id);
+CREATE VIEW IF NOT EXISTS latest_lines AS
+    SELECT o.event_id, o.event, o.fighter, o.book, o.odds, o.run_id, o.observed_at
+    FROM observations o
+    JOIN (SELECT MAX(id) AS id FROM observations GROUP BY event_id, fighter, book) m ON m.id = o.id;
+"""
+
+
+def odds_to_int(value):
+    """'+155' / '-200' / '' → 155 / -200 / None."""
+    try:
+        text = str(value).strip()
+        return int(text) if text else None
+    except (TypeError, ValueError):
+        return None
+
+
+def history_db_path():
+    path = os.getenv('ODDS_HISTORY_DB', 'OddsHistory.sqlite').strip()
+    return '' if path in ('', '0') else path
+
+
+class OddsHistoryStore:
+    """Append-only odds line history in SQLite (WAL mode)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def _latest_line_rows(self, event_id):
+        with self._lock:
+            return self.conn.execute(
+                """SELECT o.fighter, o.book, o.odds, o.observed_at FROM observations o
+                   JOIN (SELECT MAX(id) AS id FROM observations WHERE event_id = ? GROUP BY fighter, book) m
+                   ON m.id = o.id""",
+                (str(event_id),),
+            ).fetchall()
+
+    def diff_event(self, event_id, fighters):
+        """Return [(fighter, book, old, new, old_observed_at)] for lines that differ from the latest stored line.
+
+        Books the fighter had a live line for but which are absent now are
+        reported as pulled (new = None), and so is every live line of a fighter
+        no longer in fighters (dropped from the card). old_observed_at is None
+        for a line never seen before.
+        """
+        latest = {}
+        latest_by_fighter = {}
+        for l_name, l_book, old, old_at in self._latest_line_rows(event_id):
+            latest[(l_name, l_book)] = (old, old_at)
+            latest_by_fighter.setdefault(l_name, []).append((l_book, old, old_at))
+        changes = []
+        for f in fighters:
+            name = f.get('fighter', '')
+            odds = f.get('odds', {}) or {}
+            for book, value in odds.items():
+                new = odds_to_int(value)
+                old, old_at = latest.get((name, book), (None, None))
+                if (name, book) not in latest or old != new:
+                    changes.append((name, book, old, new, old_at))
+            for l_book, old, old_at in latest_by_fighter.get(name, ()):
+                if l_book not in odds and old is not None:
+                    changes.append((name, l_book, old, None, old_at))
+        current = {f.get('fighter', '') for f in fighters}
+        for name, lines in latest_by_fighter.items():
+            if name not in current:
+                changes.extend((name, l_book, old, None, old_at) for l_book, old, old_at in lines if old is not None)
+        return changes
+
+    def record_event(self, run_id, observed_at, event_id, event_name, fighters):
+        """Append the changed observations of one event; returns the list of changes."""
+        event_id = str(event_id or event_name)
+        with self._lock:
+            changes = self.diff_event(event_id, fighters)
+            self.conn.executemany(
+                'INSERT INTO observations (run_id, observed_at, event_id, event, fighter, book, odds) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(run_id, observed_at, event_id, event_name, name, book, new) for name, book, _old, new, _old_at in changes],
+            )
+            self.conn.commit()
+        return changes
+
+    def record_run_meta(self, run_id, started_at, ufc_events, sportsbooks, total_fighters):
+        with self._lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO runs (run_id, started_at, sportsbooks, events, total_fighters, total_events) VALUES (?, ?, ?, ?, ?, ?)',
+                (run_id, started_at, json.dumps(sportsbooks), json.dumps(ufc_events), total_fighters, len(ufc_events)),
+            )
+            self.conn.commit()
+
+    def append_run_fighters(self, run_id, seq_start, fighters, ufc_events):
+        """Append emitted fighters to the run's roster snapshot, numbered from seq_start (output order)."""
+        rows = []
+        for seq, f in enumerate(fighters, start=seq_start):
+            event_name = f.get('event', '')
+            event_id = str((ufc_events.get(event_name) or {}).get('event_id') or event_name)
+            rows.append((run_id, seq, event_id, event_name, f.get('event_date', ''),
+                         str(f.get('fight_order', '')), f.get('fighter', ''), f.get('source', ''),
+                         json.dumps(list((f.get('odds') or {}).keys()))))
+        with self._lock:
+            self.conn.executemany('INSERT OR REPLACE INTO run_fighters VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            self.conn.commit()
+
+    def previous_roster(self, event_id, run_id):
+        """Fighters of the event in the latest earlier run that had it, or None if no run had it."""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT run_id FROM run_fighters WHERE event_id = ? AND run_id != ? ORDER BY rowid DESC LIMIT 1',
+                (str(event_id), run_id)).fetchone()
+            if row is None:
+                return None
+            return {name for (name,) in self.conn.execute(
+                'SELECT fighter FROM run_fighters WHERE event_id = ? AND run_id = ?', (str(event_id), row[0]))}
+
+
+def open_history_store():
+    """Open the configured history store, or return None if disabled/unavailable."""
+    path = history_db_path()
+    if not path:
+        return None
+    try:
+        return OddsHistoryStore(path)
+    except Exception as e:
+        print(f"   ⚠️  Odds history store unavailable ({path}): {str(e)}")
+        return None
@@ -0,0 +1,209 @@
+"""
+LulSec odds matrix - compact typed odds for a run: fighters × sportsbooks
+
+Rows are fighter entries (one per fighter per event), columns are sportsbooks
+in first-seen order (the union header of OddsMarketCombo.csv). Each book column
+is an array('h') of int16 American odds plus a bytearray state per cell:
+
+    HAS_ODDS  the book quotes this fighter
+    BLANK     the book is listed for the fighter but has no line (CSV/JSON '')
+    ABSENT    the book is not listed for the fighter (no key in the JSON odds)
+
+Fighter, event, book and source names are interned to integer ids, so a row
+costs a few bytes per book instead of a dict of '+155' strings. Columns are
+contiguous typed buffers: numpy.frombuffer(matrix.columns[b], dtype=numpy.int16)
+gives a whole-card vector without copying (see column_view()).
+
+Odds outside the int16 range (beyond ±32767) are stored as BLANK.
+"""
+from array import array
+
+HAS_ODDS = 0
+BLANK = 1
+ABSENT = 2
+
+INT16_MIN = -32768
+INT16_MAX = 32767
+NO_ORDER = -1
+
+
+def odds_to_int16(value):
+    """'+155' / '-200' / 155 → int, or None for blank, unparsable or out-of-range values."""
+    if value is None:
+        return None
+    if isinstance(value, int):
+        number = value
+    else:
+        text = str(value).strip()
+        if not text:
+            return None
+        try:
+            number = int(text)
+        except ValueError:
+            return None
+    return number if INT16_MIN <= number <= INT16_MAX else None
+
+
+def format_odds(value):
+    return f"{value:+d}"
+
+
+class Interner:
+    """name ↔ dense integer id."""
+
+    __slots__ = ('ids', 'names')
+
+    def __init__(self, names=()):
+        self.ids = {}
+        self.names = []
+        for name in names:
+            self.id(name)
+
+    def id(self, name):
+        idx = self.ids.get(name)
+        if idx is None:
+            idx = len(self.names)
+            self.ids[name] = idx
+            self.names.append(name)
+        return idx
+
+    def get(self, name):
+        return self.ids.get(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        return iter(self.names)
+
+
+class OddsMatrix:
+    """Columnar int16 odds with per-cell state and interned row labels."""
+
+    def __init__(self):
+        self.books = Interner()
+        self.fighters = Interner()
+        self.events = Interner()
+        self.sources = Interner()
+        self.event_dates = []
+        self.fighter_ids = array('i')
+        self.event_ids = array('i')
+        self.source_ids = array('i')
+        self.fight_orders = array('h')
+        self.columns = []
+        self.states = []
+
+    def __len__(self):
+        return len(self.fighter_ids)
+
+    @property
+    def sportsbooks(self):
+        return list(self.books.names)
+
+    def _book_column(self, book):
+        idx = self.books.get(book)
+        if idx is None:
+            idx = self.books.id(book)
+            self.columns.append(array('h', bytes(2 * len(self))))
+            self.states.append(bytearray([ABSENT]) * len(self))
+        return idx
+
+    def add_row(self, fighter, event, event_date='', fight_order=None, source='', odds=None):
+        """Append one fighter entry; odds is the legacy {book: '+155' | ''} dict."""
+        event_id = self.events.id(event)
+        if event_id == len(self.event_dates):
+            self.event_dates.append(event_date or '')
+        elif event_date and not self.event_dates[event_id]:
+            self.event_dates[event_id] = event_date
+        self.fighter_ids.append(self.fighters.id(fighter))
+        self.event_ids.append(event_id)
+        self.source_ids.append(self.sources.id(source or ''))
+        try:
+            order = int(fight_order)
+        except (TypeError, ValueError):
+            order = NO_ORDER
+        self.fight_orders.append(order if 0 <= order <= INT16_MAX else NO_ORDER)
+
+        for column in self.columns:
+            column.append(0)
+        for state in self.states:
+            state.append(ABSENT)
+        row = len(self) - 1
+        for book, value in (odds or {}).items():
+            b = self._book_column(book)
+            number = odds_to_int16(value)
+            if number is None:
+                self.states[b][row] = BLANK
+            else:
+                self.columns[b][row] = number
+                self.states[b][row] = HAS_ODDS
+        return row
+
+    def add_record(self, record):
+        return self.add_row(record.get('fighter', ''), record.get('event', ''), record.get('event_date', ''),
+                            record.get('fight_order'), record.get('source', ''), record.get('odds'))
+
+    def get(self, row, book_idx):
+        """Odds as int, or None when blank/absent."""
+        return self.columns[book_idx][row] if self.states[book_idx][row] == HAS_ODDS else None
+
+    def column_view(self, book_idx):
+        """(odds, has_odds) for one book as numpy arrays over the row axis (zero-copy odds)."""
+        import numpy as np
+        odds = np.frombuffer(self.columns[book_idx], dtype=np.int16)
+        states = np.frombuffer(self.states[book_idx], dtype=np.uint8)
+        return odds, states == HAS_ODDS
+
+    def to_numpy(self):
+        """(odds int16[rows, books], has_odds bool[rows, books]) for whole-card vectorized work."""
+        import numpy as np
+        rows, n_books = len(self), len(self.books)
+        odds = np.zeros((rows, n_books), dtype=np.int16)
+        has = np.zeros((rows, n_books), dtype=bool)
+        for b in range(n_books):
+            odds[:, b], has[:, b] = self.column_view(b)
+        return odds, has
+
+    def row_label(self, row):
+        """(fighter, event, event_date, fight_order or '', source) of one row."""
+        event_id = self.event_ids[row]
+        order = self.fight_orders[row]
+        return (self.fighters.names[self.fighter_ids[row]], self.events.names[event_id], self.event_dates[event_id],
+                '' if order == NO_ORDER else order, self.sources.names[self.source_ids[row]])
+
+    def csv_rows(self):
+        """Rows in the OddsMarketCombo.csv layout: Fighter, Event, EventDate, FightOrder, Source, then one cell per book."""
+        cell_text = [
+            ['' if state[r] != HAS_ODDS else format_odds(column[r]) for r in range(len(self))]
+            for column, state in zip(self.columns, self.states)
+        ]
+        for row in range(len(self)):
+            yield list(self.row_label(row)) + [cells[row] for cells in cell_text]
+
+    def record(self, row):
+        """One row in the legacy fighter-dict format (books in column order, ABSENT books omitted)."""
+        fighter, event, event_date, order, source = self.row_label(row)
+        odds = {}
+        for b, book in enumerate(self.books.names):
+            state = self.states[b][row]
+            if state == HAS_ODDS:
+                odds[book] = format_odds(self.columns[b][row])
+            elif state == BLANK:
+                odds[book] = ''
+        record = {'fighter': fighter, 'odds': odds}
+        if order != '':
+            record['fight_order'] = order
+        record['event'] = event
+        record['event_date'] = event_date
+        record['source'] = source
+        return record
+
+    def records(self):
+        for row in range(len(self)):
+            yield self.record(row)
+
+    def nbytes(self):
+        """Bytes held by the typed buffers (labels are shared via the interners)."""
+        per_row = (self.fighter_ids.itemsize + self.event_ids.itemsize + self.source_ids.itemsize
+                   + self.fight_orders.itemsize + 3 * len(self.books))
+        return per_row * len(self)
@@ -0,0 +1,219 @@
+"""
+LulSec odds output - streaming, crash-safe writer for OddsMarketCombo.csv/.json
+
+Phase 3 hands each event's fighters to OddsOutputWriter.add_event() as soon as
+the event finishes (in event order). The writer applies the (Event, Fighter)
+de-dup and the cross-event bleed guard online, adds the kept rows to the run's
+OddsMatrix (int16 odds per book column, interned names - see odds_matrix.py),
+appends them to a spool file (NDJSON, one fighter per line, flushed per event)
+for crash recovery and, when the history store is enabled, records the event's
+changed lines right away (and, with a change feed, appends them as NDJSON
+records, see change_feed.py).
+
+finalize() writes the matrix into OddsMarketCombo.csv.tmp /
+OddsMarketCombo.json.tmp with the final union sportsbook header and swaps
+them in with os.replace(), so readers only ever see a complete previous or
+complete new file. The market analytics over the matrix (market_analytics.py)
+are written alongside, and the long-format Parquet partitions (odds_parquet.py).
+If the run dies mid-way the previous outputs are untouched
+and the events finished so far are left in the spool (OddsMarketCombo.csv.partial).
+"""
+import csv
+import json
+import os
+
+from change_feed import line_change_records, roster_change_records
+from market_analytics import ANALYTICS_CSV, compute_market_analytics, write_analytics_csv
+from odds_matrix import OddsMatrix
+from odds_parquet import write_odds_parquet
+
+CSV_FIXED_COLUMNS = ['Fighter', 'Event', 'EventDate', 'FightOrder', 'Source']
+
+
+def _nested_json(value, level):
+    """json.dumps(value, indent=2) as it appears `level` levels deep in an indent=2 document."""
+    return json.dumps(value, indent=2).replace('\n', '\n' + '  ' * level)
+
+
+def replace_atomically(tmp_path, path):
+    with open(tmp_path, 'rb+') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class OddsOutputWriter:
+    """Incremental OddsMarketCombo writer: spool per event, atomic swap at the end."""
+
+    def __init__(self, csv_path='OddsMarketCombo.csv', json_path='OddsMarketCombo.json',
+                 run_id=None, started_at=None, history=None, feed=None, analytics_csv_path=ANALYTICS_CSV):
+        self.csv_path = csv_path
+        self.json_path = json_path
+        self.analytics_csv_path = analytics_csv_path
+        self.spool_path = csv_path + '.partial'
+        self.run_id = run_id
+        self.started_at = started_at
+        self.history = history
+        self.feed = feed
+        self.matrix = OddsMatrix()
+        self._seen_pairs = set()
+        self._fighter_event = {}
+        self.total_fighters = 0
+        self.history_appended = 0
+        self.feed_records = 0
+        self.analytics = None
+        self.analytics_csv_written = False
+        self.parquet_files = []
+        self.closed = False
+        self._spool = open(self.spool_path, 'w', encoding='utf-8')
+
+    def add_event(self, event_name, fighters, ufc_events):
+        """De-dup, bleed-guard and spool one finished event's fighters. Returns the rows kept."""
+        kept = []
+        for f in fighters:
+            name = f.get('fighter', '')
+            ev = f.get('event', '')
+            pair = (ev, name)
+            if pair in self._seen_pairs:
+                continue
+            self._seen_pairs.add(pair)
+            if name in self._fighter_event:
+                if self._fighter_event[name] != ev:
+                    print(f"   🚫 Cross-event bleed: '{name}' already under '{self._fighter_event[name]}', dropping from '{ev}'")
+                continue
+            self._fighter_event[name] = ev
+            kept.append(f)
+            self.matrix.add_record(f)
+        if not kept:
+            return kept
+
+        for f in kept:
+            self._spool.write(json.dumps(f) + '\n')
+        self._spool.flush()
+        os.fsync(self._spool.fileno())
+
+        if self.history:
+            try:
+                by_event = {}
+                for f in kept:
+                    by_event.setdefault(f.get('event', ''), []).append(f)
+                for ev, ev_rows in by_event.items():
+                    event_id = (ufc_events.get(ev) or {}).get('event_id')
+                    changes = self.history.record_event(self.run_id, self.started_at, event_id, ev, ev_rows)
+                    self.history_appended += len(changes)
+                    if self.feed:
+                        self._emit_changes(str(event_id or ev), ev, ev_rows, changes)
+                self.history.append_run_fighters(self.run_id, self.total_fighters, kept, ufc_events)
+            except Exception as e:
+                print(f"   ⚠️  History store error, continuing without it: {str(e)}")
+                self.history = None
+        self.total_fighters += len(kept)
+        return kept
+
+    def _emit_changes(self, event_id, event_name, rows, changes):
+        try:
+            previous = self.history.previous_roster(event_id, self.run_id)
+            current = {f.get('fighter', '') for f in rows}
+            records = roster_change_records(self.run_id, self.started_at, event_id, event_name, previous, current)
+            # Lines of fighters dropped from the card are summarized by their roster_removed record
+            changes = [c for c in changes if c[0] in current]
+            records += line_change_records(self.run_id, self.started_at, event_id, event_name, changes)
+            self.feed.emit(records)
+            self.feed_records += len(records)
+        except Exception as e:
+            print(f"   ⚠️  Change feed error, continuing without it: {str(e)}")
+            self.feed = None
+
+    @property
+    def sportsbooks(self):
+        """Union of sportsbooks in first-seen order (the CSV header after the fixed columns)."""
+        return self.matrix.sportsbooks
+
+    def iter_rows(self):
+        """Yield the run's rows in output order (legacy fighter-dict format)."""
+        return self.matrix.records()
+
+    def finalize(self, ufc_events, fights_index_by_id=None):
+        """Write both outputs from the odds matrix to temp files and swap them in atomically.
+
+        With market analytics enabled, the fight-level pricing goes to OddsMarketAnalytics.csv
+        and a trailing "market_analytics" section of the JSON.
+        """
+        self._spool.close()
+        self.closed = True
+        if self.history:
+            try:
+                self.history.record_run_meta(self.run_id, self.started_at, ufc_events, self.sportsbooks, self.total_fighters)
+            except Exception as e:
+                print(f"   ⚠️  History store error: {str(e)}")
+                self.history = None
+
+        self.analytics = compute_market_analytics(self.matrix, fights_index_by_id, ufc_events)
+
+        csv_tmp = self.csv_path + '.tmp'
+        with open(csv_tmp, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_FIXED_COLUMNS + self.sportsbooks)
+            writer.writerows(self.matrix.csv_rows())
+
+        # Same layout as json.dump(json_data, f, indent=2), with the fighters streamed
+        json_tmp = self.json_path + '.tmp'
+        with open(json_tmp, 'w', encoding='utf-8') as f:
+            f.write('{\n')
+            head = [
+                ('extraction_timestamp', self.started_at),
+                ('extraction_run_id', self.run_id),
+                ('total_fighters', self.total_fighters),
+                ('total_events', len(ufc_events)),
+                ('sportsbooks', self.sportsbooks),
+                ('events', ufc_events),
+            ]
+            for key, value in head:
+                f.write(f'  {json.dumps(key)}: {_nested_json(value, 1)},\n')
+            f.write('  "fighters": [')
+            count = 0
+            for fighter_data in self.iter_rows():
+                f.write(',\n' if count else '\n')
+                f.write('    ' + _nested_json(fighter_data, 2))
+                count += 1
+            f.write('\n  ]' if count else ']')
+            if self.analytics is not None:
+                f.write(f',\n  "market_analytics": {_nested_json(self.analytics.json_section(), 1)}')
+            f.write('\n}')
+
+        replace_atomically(csv_tmp, self.csv_path)
+        replace_atomically(json_tmp, self.json_path)
+        if self.analytics is not None:
+            try:
+                write_analytics_csv(self.analytics, self.analytics_csv_path)
+                self.analytics_csv_written = True
+            except Exception as e:
+                print(f"   ⚠️  Market analytics CSV failed: {str(e)}")
+        try:
+            self.parquet_files = write_odds_parquet(self.matrix, ufc_events, self.run_id, self.started_at)
+        except Exception as e:
+            print(f"   ⚠️  Parquet output failed: {str(e)}")
+        self._remove_spool()
+
+    def discard(self):
+        """Drop this run's spool and keep the existing outputs (e.g. nothing changed)."""
+        self._spool.close()
+        self.closed = True
+        self._remove_spool()
+
+    def abort(self):
+        """Close the spool but keep it, so the events finished before a crash are not lost."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._spool.close()
+        except Exception:
+            pass
+        if self.total_fighters:
+            print(f"   💾 Partial output kept: {self.total_fighters} fighter row(s) in {self.spool_path}")
+
+    def _remove_spool(self):
+        try:
+            os.remove(self.spool_path)
+        except OSError:
+            pass
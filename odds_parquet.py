@@ -0,0 +1,138 @@
+"""
+LulSec odds Parquet - long-format columnar output partitioned by event date and run
+
+Each finalized run (and each watch-mode write) also writes its odds matrix as
+one row per fighter × listed book, with a fixed schema that does not depend on
+which sportsbooks showed up in the run:
+
+    event_id     string
+    event        string
+    event_date   string        partition key
+    fight_order  int16         null when the card order is unknown
+    fighter      string
+    book         string
+    odds_int     int16         American odds, null = book listed without a line
+    run_id       string        partition key
+    ts           timestamp[us] run start time
+
+Files land in a Hive-style layout; event_date and run_id live only in the
+directory names (as Spark/Trino/DuckDB/pyarrow.dataset expect for partition
+columns) and come back as columns when the dataset is read with hive
+partitioning:
+
+    OddsParquet/event_date=2025-08-16/run_id=lulsec_1754820000/part-0.parquet
+    pyarrow.dataset.dataset('OddsParquet', schema=odds_schema(), partitioning='hive')
+
+Undated events go to event_date=__HIVE_DEFAULT_PARTITION__. Files are written
+to a dot-prefixed temp name and renamed, zstd-compressed
+(ODDS_PARQUET_COMPRESSION).
+
+ODDS_PARQUET (default: OddsParquet, 0 disables) sets the dataset root. Needs
+pyarrow; without it the run skips the Parquet output with a warning.
+"""
+import os
+from datetime import datetime
+
+try:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAVE_PYARROW = True
+except Exception:
+    np = pa = pq = None
+    HAVE_PYARROW = False
+
+from odds_matrix import ABSENT, NO_ORDER
+
+DEFAULT_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+PART_FILE = 'part-0.parquet'
+PARTITION_COLUMNS = ['event_date', 'run_id']
+
+
+def odds_schema():
+    """Dataset schema (the part files hold it minus PARTITION_COLUMNS)."""
+    return pa.schema([
+        ('event_id', pa.string()),
+        ('event', pa.string()),
+        ('event_date', pa.string()),
+        ('fight_order', pa.int16()),
+        ('fighter', pa.string()),
+        ('book', pa.string()),
+        ('odds_int', pa.int16()),
+        ('run_id', pa.string()),
+        ('ts', pa.timestamp('us')),
+    ])
+
+
+def parquet_root():
+    root = os.getenv('ODDS_PARQUET', 'OddsParquet').strip()
+    return '' if root in ('', '0') else root
+
+
+def _partition_value(value):
+    """Partition directory value with Hive-style %XX escaping of path and key separators."""
+    if not value:
+        return DEFAULT_PARTITION
+    return ''.join(f"%{ord(c):02X}" if c in '/\\=%:' else c for c in str(value))
+
+
+def matrix_to_table(matrix, ufc_events, run_id, started_at):
+    """Long-format pyarrow Table of every listed (row, book) cell of the matrix, books in column order per row."""
+    n_rows = len(matrix)
+    rows_parts, books_parts = [], []
+    for b in range(len(matrix.books)):
+        listed = np.flatnonzero(np.frombuffer(matrix.states[b], dtype=np.uint8) != ABSENT)
+        rows_parts.append(listed)
+        books_parts.append(np.full(listed.size, b, dtype=np.int32))
+    rows = np.concatenate(rows_parts) if rows_parts else np.zeros(0, dtype=np.intp)
+    books = np.concatenate(books_parts) if books_parts else np.zeros(0, dtype=np.int32)
+    order = np.lexsort((books, rows))
+    rows, books = rows[order], books[order]
+
+    odds, has = matrix.to_numpy() if n_rows else (np.zeros((0, 0), np.int16), np.zeros((0, 0), bool))
+    cell_odds = odds[rows, books] if rows.size else np.zeros(0, dtype=np.int16)
+    cell_has = has[rows, books] if rows.size else np.zeros(0, dtype=bool)
+
+    event_ids_by_name = [str((ufc_events.get(name) or {}).get('event_id') or name) for name in matrix.events.names]
+    row_events = np.frombuffer(matrix.event_ids, dtype=np.int32)[rows]
+    fight_orders = np.frombuffer(matrix.fight_orders, dtype=np.int16)[rows]
+    ts = datetime.fromisoformat(started_at) if started_at else datetime.now()
+
+    columns = [
+        pa.DictionaryArray.from_arrays(pa.array(row_events), pa.array(event_ids_by_name, pa.string())).cast(pa.string()),
+        pa.DictionaryArray.from_arrays(pa.array(row_events), pa.array(matrix.events.names, pa.string())).cast(pa.string()),
+        pa.DictionaryArray.from_arrays(pa.array(row_events), pa.array(matrix.event_dates, pa.string())).cast(pa.string()),
+        pa.array(fight_orders, pa.int16(), mask=fight_orders == NO_ORDER),
+        pa.DictionaryArray.from_arrays(pa.array(np.frombuffer(matrix.fighter_ids, dtype=np.int32)[rows]),
+                                       pa.array(matrix.fighters.names, pa.string())).cast(pa.string()),
+        pa.DictionaryArray.from_arrays(pa.array(books), pa.array(matrix.books.names, pa.string())).cast(pa.string()),
+        pa.array(cell_odds, pa.int16(), mask=~cell_has),
+        pa.repeat(pa.scalar(run_id or '', pa.string()), rows.size),
+        pa.repeat(pa.scalar(ts, pa.timestamp('us')), rows.size),
+    ]
+    return pa.Table.from_arrays(columns, schema=odds_schema())
+
+
+def write_odds_parquet(matrix, ufc_events, run_id, started_at, root=None):
+    """Write one part file per event_date partition of this run; returns the paths written."""
+    root = root or parquet_root()
+    if not root or not len(matrix):
+        return []
+    if not HAVE_PYARROW:
+        print("   ⚠️  Parquet output skipped: pyarrow is not installed")
+        return []
+    compression = os.getenv('ODDS_PARQUET_COMPRESSION', 'zstd').strip() or 'zstd'
+    table = matrix_to_table(matrix, ufc_events, run_id, started_at)
+    dates = table.column('event_date').to_numpy(zero_copy_only=False)
+    paths = []
+    for event_date in sorted(set(dates.tolist())):
+        part = table.filter(pa.array(dates == event_date)).drop_columns(PARTITION_COLUMNS)
+        directory = os.path.join(root, f"event_date={_partition_value(event_date)}", f"run_id={_partition_value(run_id)}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, PART_FILE)
+        # Dot-prefixed so dataset scans skip it until the rename
+        tmp_path = os.path.join(directory, f".{PART_FILE}.tmp")
+        pq.write_table(part, tmp_path, compression=compression)
+        os.replace(tmp_path, path)
+        paths.append(path)
+    return paths
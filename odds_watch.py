@@ -0,0 +1,386 @@
+"""
+LulSec odds watch - long-running mode that re-polls each event on its own interval
+
+    python odds_watch.py [max_polls]
+
+Instead of cron re-running the whole extractor every N minutes, one process
+keeps the driver, the fights index and every event's last rows in memory and
+re-polls events from a priority queue ordered by next-due time. Each event's
+interval comes from:
+
+  - time to the card (event_date): hourly weeks out, every 15-30 min in fight
+    week, every 5 min the day before, every 90 s on fight night;
+  - line movement: each poll that saw the odds move halves the interval (up to 8x
+    faster), quiet polls relax it again;
+  - blank odds: events with no lines posted yet back off (up to 8x slower);
+  - failed polls: an empty result for an event that had rows (timeout,
+    Cloudflare page - extract_single_event returns [] on any error) keeps the
+    last rows, writes nothing and backs off (up to 8x slower) until a poll
+    returns rows again.
+
+Intervals are clamped to WATCH_MIN_INTERVAL / WATCH_MAX_INTERVAL seconds (default
+60 / 10800). Discovery (events listing + fights index) is re-run every
+WATCH_DISCOVERY_MINUTES (default 30): new cards are polled right away, cards that
+left the listing are dropped. OddsMarketCombo.csv/.json (and the history store,
+change feed, analytics and Parquet output) are written only after a poll that
+changed something, and only once every watched event has been polled, so
+startup never swaps in a partial card set.
+"""
+import heapq
+import json
+import os
+import signal
+import sys
+import time
+from datetime import datetime
+
+from OddsMarketCombo import (
+    EventDateCache,
+    build_fights_index_in_session,
+    cached_soup,
+    create_chrome_driver,
+    discover_events,
+    expand_events_listing,
+    extract_single_event,
+    load_fights_index_from_csv,
+    unified_pipeline_enabled,
+)
+from change_feed import open_change_feed
+from line_movement import update_line_movement
+from odds_history import open_history_store
+from odds_output import OddsOutputWriter
+from page_cache import PageCache, load_page
+from run_metrics import get_metrics, reset_metrics
+
+EVENTS_URL = "https://fightodds.io/upcoming-mma-events/ufc"
+
+# (hours until the card's date, seconds between polls); the first matching tier wins
+INTERVAL_TIERS = [
+    (12, 90),
+    (48, 300),
+    (7 * 24, 900),
+    (21 * 24, 1800),
+]
+FAR_OUT_INTERVAL = 3600
+UNDATED_INTERVAL = 1800
+MAX_MOVEMENT_STREAK = 3
+MAX_BLANK_STREAK = 3
+MAX_FAILURE_STREAK = 3
+# Per-event records kept in the metrics of one output-write window
+WATCH_REPORT_EVENTS = 500
+
+
+def _env_float(name, default):
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return float(default)
+
+
+def hours_until(event_date, now=None):
+    """Hours from now until the start (local midnight) of event_date 'YYYY-MM-DD', or None if undated."""
+    try:
+        start = datetime.strptime(event_date or '', '%Y-%m-%d')
+    except ValueError:
+        return None
+    return (start - (now or datetime.now())).total_seconds() / 3600
+
+
+def base_interval(event_date, now=None):
+    """Polling interval from the time left until the card."""
+    hours = hours_until(event_date, now)
+    if hours is None:
+        return UNDATED_INTERVAL
+    for max_hours, seconds in INTERVAL_TIERS:
+        if hours <= max_hours:
+            return seconds
+    return FAR_OUT_INTERVAL
+
+
+def odds_signature(fighters):
+    return json.dumps(sorted((f.get('fighter', ''), sorted((f.get('odds') or {}).items())) for f in fighters))
+
+
+def has_posted_odds(fighters):
+    return any(str(v).strip() for f in fighters for v in (f.get('odds') or {}).values())
+
+
+class EventSchedule:
+    """Polling state of one event."""
+
+    def __init__(self, event_name, event_data):
+        self.event_name = event_name
+        self.event_data = event_data
+        self.fighters = []
+        self.signature = None
+        self.movement_streak = 0
+        self.blank_streak = 0
+        self.failures = 0
+        self.polls = 0
+        self.interval = 0.0
+        self.next_due = 0.0
+
+    def update(self, fighters):
+        """Fold one poll's result into the state; returns True when the rows changed."""
+        signature = odds_signature(fighters)
+        changed = signature != self.signature
+        moved = changed and self.signature is not None
+        self.polls += 1
+        self.movement_streak = min(self.movement_streak + 1, MAX_MOVEMENT_STREAK) if moved else max(self.movement_streak - 1, 0)
+        self.blank_streak = 0 if has_posted_odds(fighters) else min(self.blank_streak + 1, MAX_BLANK_STREAK)
+        self.failures = 0
+        self.signature = signature
+        self.fighters = fighters
+        return changed
+
+    def is_failed_poll(self, fighters):
+        """An empty result for an event that had rows is a failed load, not a card with no fighters."""
+        return not fighters and bool(self.fighters)
+
+    def fail(self):
+        """Count a failed poll; the last rows, signature and streaks are kept."""
+        self.polls += 1
+        self.failures = min(self.failures + 1, MAX_FAILURE_STREAK)
+
+    def next_interval(self, now=None, min_interval=60, max_interval=10800):
+        seconds = base_interval(self.event_data.get('event_date', ''), now)
+        seconds *= 0.5 ** self.movement_streak
+        seconds *= 2 ** self.blank_streak
+        seconds *= 2 ** self.failures
+        return max(min_interval, min(max_interval, seconds))
+
+
+class OddsWatcher:
+    """Priority-queue scheduler that keeps re-polling events on one driver."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.min_interval = _env_float('WATCH_MIN_INTERVAL', 60)
+        self.max_interval = _env_float('WATCH_MAX_INTERVAL', 10800)
+        self.discovery_interval = _env_float('WATCH_DISCOVERY_MINUTES', 30) * 60
+        self.events = {}
+        self.queue = []
+        self.seq = 0
+        self.fights_index_by_id = {}
+        self.fights_index_mtime = None
+        self.next_discovery = 0.0
+        self.history = open_history_store()
+        self.feed = open_change_feed()
+        self.stopping = False
+        self.polls = 0
+        self.writes = 0
+        reset_metrics('odds_watch', max_events=WATCH_REPORT_EVENTS)
+
+    def schedule(self, state, due):
+        state.next_due = due
+        self.seq += 1
+        heapq.heappush(self.queue, (due, self.seq, state.event_name))
+
+    def refresh_fights_index(self, page_source, page_cache):
+        if unified_pipeline_enabled():
+            self.fights_index_by_id = build_fights_index_in_session(self.driver, page_source, page_cache)
+            return
+        try:
+            mtime = os.path.getmtime('MMAFights.csv')
+        except OSError:
+            mtime = None
+        if mtime != self.fights_index_mtime:
+            self.fights_index_by_id = load_fights_index_from_csv('MMAFights.csv')
+            self.fights_index_mtime = mtime
+
+    def discover(self):
+        """Re-run discovery; add new events (due now), drop events no longer listed."""
+        print(f"\n🔍 Watch discovery ({datetime.now().strftime('%H:%M:%S')})")
+        page_cache = PageCache()
+        try:
+            load_page(self.driver, EVENTS_URL, 'events')
+            expand_events_listing(self.driver)
+            page_source = self.driver.page_source
+            page_cache.put(EVENTS_URL, page_source)
+            soup = cached_soup(page_cache, EVENTS_URL, page_source)
+            self.refresh_fights_index(page_source, page_cache)
+            date_cache = EventDateCache()
+            found = discover_events(self.driver, soup, self.fights_index_by_id, date_cache, page_cache)
+        except Exception as e:
+            print(f"   ❌ Discovery failed, keeping {len(self.events)} known events: {str(e)}")
+            return
+        if not found:
+            print(f"   ⚠️  Discovery found no events, keeping {len(self.events)} known events")
+            return
+
+        now = time.time()
+        events = {}
+        for name, data in found.items():
+            state = self.events.get(name)
+            if state is None:
+                state = EventSchedule(name, data)
+                self.schedule(state, now)
+            else:
+                state.event_data = data
+            events[name] = state
+        dropped = [name for name in self.events if name not in events]
+        self.events = events
+        if dropped:
+            print(f"   🗑️  Dropped {len(dropped)} event(s) no longer listed: {', '.join(dropped)}")
+            self.write_outputs()
+        print(f"   📅 Watching {len(self.events)} events")
+
+    def poll(self, state):
+        page_cache = PageCache()
+        fighters = extract_single_event(self.driver, state.event_name, state.event_data, self.fights_index_by_id,
+                                        page_cache=page_cache)
+        self.polls += 1
+        if state.is_failed_poll(fighters):
+            state.fail()
+            interval = state.next_interval(min_interval=self.min_interval, max_interval=self.max_interval)
+            self.schedule(state, time.time() + interval)
+            print(f"   ⚠️  {state.event_name}: poll returned no fighters, keeping last {len(state.fighters)} - retry in {interval:.0f}s")
+            return False
+        changed = state.update(fighters)
+        interval = state.next_interval(min_interval=self.min_interval, max_interval=self.max_interval)
+        self.schedule(state, time.time() + interval)
+        status = 'changed' if changed else 'unchanged'
+        if state.blank_streak:
+            status += ', no lines yet'
+        print(f"   ⏱️  {state.event_name}: {len(fighters)} fighters, {status} - next poll in {interval:.0f}s")
+        return changed
+
+    def write_outputs(self):
+        """Rewrite OddsMarketCombo.csv/.json from every event's latest rows (discovery order).
+
+        Skipped while any watched event has not been polled yet: its first poll
+        always counts as a change and triggers the write with the full card set.
+        """
+        unpolled = sum(1 for state in self.events.values() if not state.polls)
+        if unpolled:
+            print(f"   ⏳ Outputs not written yet: {unpolled} event(s) still waiting for their first poll")
+            return
+        if self.history is None:
+            self.history = open_history_store()
+        if self.feed is None:
+            self.feed = open_change_feed()
+        ufc_events = {name: state.event_data for name, state in self.events.items()}
+        writer = OddsOutputWriter(run_id=f"lulsec_watch_{int(time.time() * 1000)}", started_at=datetime.now().isoformat(),
+                                  history=self.history, feed=self.feed)
+        try:
+            for name, state in self.events.items():
+                writer.add_event(name, state.fighters, ufc_events)
+            if not writer.total_fighters:
+                writer.discard()
+                return
+            writer.finalize(ufc_events, self.fights_index_by_id)
+            self.release_dropped(writer)
+            movement = update_line_movement(self.history, ufc_events)
+            self.writes += 1
+            print(f"   💾 Outputs updated: {writer.total_fighters} fighters ({writer.history_appended} changed line(s))")
+            self.write_metrics(writer, movement)
+        finally:
+            writer.abort()
+            self.release_dropped(writer)
+
+    def release_dropped(self, writer):
+        """Close a history store / change feed the writer gave up on after an error; the next write reopens it."""
+        if self.history is not None and writer.history is None:
+            print("   ⚠️  History store dropped after an error - reopening it on the next write")
+            try:
+                self.history.close()
+            except Exception:
+                pass
+            self.history = None
+        if self.feed is not None and writer.feed is None:
+            print("   ⚠️  Change feed dropped after an error - reopening it on the next write")
+            try:
+                self.feed.close()
+            except Exception:
+                pass
+            self.feed = None
+
+    def write_metrics(self, writer, movement):
+        """Write the run report / Prometheus textfile for the polls since the last write, then start a new window."""
+        metrics = get_metrics()
+        metrics.set('events_discovered', len(self.events))
+        metrics.set('fighters_written', writer.total_fighters)
+        if writer.history:
+            metrics.set('history_lines_appended', writer.history_appended)
+        if writer.feed:
+            metrics.set('change_feed_records', writer.feed_records)
+        if writer.analytics is not None:
+            metrics.set('arbitrage_opportunities', writer.analytics.arbitrage_count())
+        if movement:
+            metrics.set('line_moves', movement[0])
+            metrics.set('steam_signals', movement[1])
+        metrics.finish(True)
+        metrics.write_outputs()
+        reset_metrics('odds_watch', max_events=WATCH_REPORT_EVENTS)
+
+    def next_ready(self):
+        """Pop the next due event (skipping stale queue entries) or None if the queue is empty."""
+        while self.queue:
+            due, _seq, name = self.queue[0]
+            state = self.events.get(name)
+            if state is None or state.next_due != due:
+                heapq.heappop(self.queue)
+                continue
+            return state
+        return None
+
+    def sleep_until(self, deadline):
+        while not self.stopping:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, 1.0))
+
+    def run(self, max_polls=None):
+        while not self.stopping and (max_polls is None or self.polls < max_polls):
+            if time.time() >= self.next_discovery:
+                self.discover()
+                self.next_discovery = time.time() + self.discovery_interval
+            state = self.next_ready()
+            deadline = min(state.next_due, self.next_discovery) if state else self.next_discovery
+            if deadline > time.time():
+                self.sleep_until(deadline)
+                continue
+            heapq.heappop(self.queue)
+            if self.poll(state):
+                self.write_outputs()
+
+    def stop(self, *_args):
+        self.stopping = True
+
+
+def odds_watch(max_polls=None):
+    print("🏴‍☠️ LulSec Odds Watch - adaptive per-event polling")
+    print("=" * 50)
+    driver = create_chrome_driver()
+    if not driver:
+        print("   ❌ Chrome driver initialization failed - cannot proceed")
+        return False
+    watcher = OddsWatcher(driver)
+    signal.signal(signal.SIGINT, watcher.stop)
+    try:
+        signal.signal(signal.SIGTERM, watcher.stop)
+    except (AttributeError, ValueError):
+        pass
+    try:
+        watcher.run(max_polls=max_polls)
+        return True
+    except Exception as e:
+        print(f"\n💥 Watch error: {str(e)}")
+        return False
+    finally:
+        print(f"\n🛑 Watch stopped: {watcher.polls} polls, {watcher.writes} output writes")
+        if watcher.history:
+            watcher.history.close()
+        if watcher.feed:
+            watcher.feed.close()
+        try:
+            driver.quit()
+            print("   🔒 Chrome driver closed")
+        except Exception as cleanup_error:
+            print(f"   ⚠️  Driver cleanup warning: {str(cleanup_error)}")
+
+
+if __name__ == "__main__":
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    sys.exit(0 if odds_watch(max_polls=limit) else 1)
@@ -0,0 +1,198 @@
+"""
+LulSec page cache - run-scoped URL -> (HTML, parsed soup) cache
+
+Every page fetch in a run goes through one PageCache, so a URL is loaded and
+parsed at most once per run: event pages opened for dates during discovery,
+/odds pages of events found by both the UFC and the generic listing, /fights
+cards shared by the unified pipeline, the roster fallback and the pair-link
+fallback.
+
+fightodds.io routes event pages by id, so /mma-events/{id}/{slug}/{tab} URLs
+are keyed by id + tab: a card reached through two different slugs is one entry.
+
+Entries are evicted least-recently-used once the estimated size (HTML plus
+parsed trees) exceeds PAGE_CACHE_MB (default 256). Failed loads and Cloudflare
+interstitials are never cached. Hit/miss counts are printed at the end of the run.
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from html_parsing import make_soup
+from page_waits import wait_for_page
+from run_metrics import get_metrics
+
+# Rough in-memory size of a parsed BeautifulSoup tree relative to its HTML
+SOUP_SIZE_FACTOR = 8
+
+_EVENT_URL_RE = re.compile(r'^https?://(?:www\.)?fightodds\.io/mma-events/(\d+)(?:/[^/?#]*)?(/[^?#]*)?')
+
+
+def page_cache_key(url):
+    """Canonical cache key: slug-independent for fightodds event pages, else the URL without trailing slash."""
+    url = (url or '').strip()
+    m = _EVENT_URL_RE.match(url)
+    if m:
+        tab = (m.group(2) or '').rstrip('/')
+        return f"fightodds:event:{m.group(1)}{tab}"
+    return url.rstrip('/')
+
+
+def is_cacheable_html(html):
+    if not html:
+        return False
+    lowered = html.lower()
+    return not ('cloudflare' in lowered and 'checking your browser' in lowered)
+
+
+def load_page(driver, url, page_type, max_wait=None):
+    """Plain driver load: get, wait for readiness, return page_source."""
+    with get_metrics().timer('page_load_seconds', url_class=page_type):
+        driver.get(url)
+        wait_for_page(driver, page_type, max_wait=max_wait)
+    return driver.page_source or ''
+
+
+class CachedPage:
+    __slots__ = ('url', 'html', 'soups', 'size')
+
+    def __init__(self, url, html):
+        self.url = url
+        self.html = html
+        self.soups = {}
+        self.size = len(html)
+
+
+class PageCache:
+    """Thread-safe, size-bounded LRU of fetched pages and their parsed trees."""
+
+    def __init__(self, max_bytes=None):
+        if max_bytes is None:
+            try:
+                max_bytes = int(float(os.getenv('PAGE_CACHE_MB', '256')) * 1024 * 1024)
+            except ValueError:
+                max_bytes = 256 * 1024 * 1024
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.parses = 0
+
+    def get(self, url):
+        """Return the cached html for url (counted as a hit) or None (counted as a miss)."""
+        key = page_cache_key(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.html
+
+    def put(self, url, html, soup=None, only=None):
+        """Store a fetched page (and optionally its parsed tree); uncacheable pages are ignored."""
+        if not is_cacheable_html(html):
+            return
+        key = page_cache_key(url)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old.size
+            entry = CachedPage(url, html)
+            self._entries[key] = entry
+            self.total_bytes += entry.size
+            if soup is not None:
+                self._add_soup(entry, only, soup)
+            self._evict()
+
+    def fetch(self, url, fetch_html):
+        """Return html for url, calling fetch_html() only on a miss."""
+        html = self.get(url)
+        if html is not None:
+            return html
+        html = fetch_html() or ''
+        self.put(url, html)
+        return html
+
+    def load(self, driver, url, page_type, max_wait=None):
+        """Cached equivalent of driver.get(url) + readiness wait + page_source."""
+        return self.fetch(url, lambda: load_page(driver, url, page_type, max_wait=max_wait))
+
+    def soup(self, url, html=None, only=None):
+        """Parsed tree of a page, built once per (url, only) and kept with the cached entry.
+
+        html is used (and cached) when the url is not cached yet.
+        """
+        key = page_cache_key(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                cached = entry.soups.get(only)
+                if cached is not None:
+                    return cached
+                html = entry.html
+        parsed = make_soup(html or '', only=only)
+        with self._lock:
+            self.parses += 1
+            entry = self._entries.get(key)
+            if entry is None:
+                if not is_cacheable_html(html):
+                    return parsed
+                self.put(url, html)
+                entry = self._entries.get(key)
+                if entry is None:
+                    return parsed
+            existing = entry.soups.get(only)
+            if existing is not None:
+                return existing
+            self._add_soup(entry, only, parsed)
+            self._evict()
+        return parsed
+
+    def _add_soup(self, entry, only, soup):
+        entry.soups[only] = soup
+        added = len(entry.html) * SOUP_SIZE_FACTOR
+        entry.size += added
+        self.total_bytes += added
+
+    def _evict(self):
+        # Never evict the entry just touched (the last one), even if it alone exceeds the budget
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            _key, entry = self._entries.popitem(last=False)
+            self.total_bytes -= entry.size
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'parses': self.parses,
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+            }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"   🗃️  Page cache: {s['hits']} hits | {s['misses']} misses | {s['parses']} parses"
+              f" | {s['evictions']} evictions | {s['entries']} pages (~{s['bytes'] / 1048576:.1f} MB)")
+
+
+def cached_load(page_cache, driver, url, page_type, max_wait=None):
+    """page_cache.load() when a cache is given, else a plain driver load."""
+    if page_cache is not None:
+        return page_cache.load(driver, url, page_type, max_wait=max_wait)
+    return load_page(driver, url, page_type, max_wait=max_wait)
+
+
+def cached_soup(page_cache, url, html, only=None):
+    """page_cache.soup() when a cache is given, else a fresh parse."""
+    if page_cache is not None:
+        return page_cache.soup(url, html, only=only)
+    return make_soup(html, only=only)
@@ -0,0 +1,150 @@
+"""
+LulSec page readiness waits - shared by OddsMarketCombo.py and MMAFightScraper.py
+
+Replaces fixed time.sleep() page waits: after driver.get() we poll the DOM and
+return as soon as the content we parse is present (odds table, fight card,
+JSON-LD block, event links) and the DOM has stopped changing. Each page type
+keeps its old sleep as the maximum wait, so worst case is unchanged.
+
+Every wait is recorded so the latency cut can be measured per page type.
+"""
+import threading
+import time
+
+# page_type -> (css selector that must match, text marker regex or None)
+PAGE_READY_CONDITIONS = {
+    'events': ("a[href*='/mma-events/']", None),
+    'odds': ('table', None),
+    'fights': ('a[href], table', r'main card|prelim|\bvs\b'),
+    'event': ('script[type="application/ld+json"], h1, h2', None),
+    'pair_odds': ('table', None),
+    'dom_settle': (None, None),
+}
+
+# page_type -> maximum seconds to wait (the fixed sleeps this layer replaced)
+PAGE_MAX_WAIT = {
+    'events': 10.0,
+    'odds': 5.0,
+    'fights': 5.0,
+    'event': 5.0,
+    'pair_odds': 2.0,
+    'dom_settle': 2.0,
+}
+
+POLL_INTERVAL = 0.25
+STABLE_POLLS = 2
+
+_READY_PROBE_JS = """
+var sel = arguments[0], pattern = arguments[1];
+var body = document.body;
+var text = body ? (body.innerText || '') : '';
+var matched = 0;
+try { matched = sel ? document.querySelectorAll(sel).length : 1; } catch (e) { matched = 0; }
+var marker = true;
+if (pattern) { try { marker = new RegExp(pattern, 'i').test(text); } catch (e) { marker = true; } }
+var challenge = text.toLowerCase().indexOf('checking your browser') >= 0;
+return [document.readyState, matched, marker, challenge,
+        body ? body.getElementsByTagName('*').length : 0, body ? body.innerHTML.length : 0];
+"""
+
+_stats_lock = threading.Lock()
+_wait_stats = []
+
+
+def wait_for_page(driver, page_type, max_wait=None):
+    """Block until the page of the given type is ready, or max_wait elapses.
+
+    Ready means: document loaded, the page type's selector/text marker is
+    present, no Cloudflare interstitial, and the DOM signature (element count,
+    markup length) unchanged for STABLE_POLLS consecutive polls.
+    Returns True if the page became ready, False on timeout.
+    """
+    if getattr(driver, 'is_replay', False):
+        # Recorded snapshots are static: nothing to wait for
+        return True
+    if max_wait is None:
+        max_wait = PAGE_MAX_WAIT.get(page_type, 5.0)
+    started = time.monotonic()
+    ready = False
+    tracker = ReadinessTracker(page_type)
+    while True:
+        if tracker.poll(driver):
+            ready = True
+            break
+        if time.monotonic() - started >= max_wait:
+            break
+        time.sleep(POLL_INTERVAL)
+    record_wait(page_type, time.monotonic() - started, ready)
+    return ready
+
+
+class ReadinessTracker:
+    """Non-blocking form of wait_for_page: call poll() once per POLL_INTERVAL.
+
+    Lets one thread watch several pages (e.g. browser tabs) at once; poll()
+    returns True once the page is ready by the same rules as wait_for_page.
+    """
+
+    def __init__(self, page_type):
+        self.page_type = page_type
+        self.selector, self.pattern = PAGE_READY_CONDITIONS.get(page_type, (None, None))
+        self.last_signature = None
+        self.stable = 0
+
+    def poll(self, driver):
+        try:
+            state, matched, marker, challenge, n_nodes, html_len = driver.execute_script(_READY_PROBE_JS, self.selector, self.pattern)
+            signature = (n_nodes, html_len)
+            if state == 'complete' and matched and marker and not challenge:
+                self.stable = self.stable + 1 if signature == self.last_signature else 0
+            else:
+                self.stable = 0
+            self.last_signature = signature
+        except Exception:
+            # Probe failed (navigation in flight, replay driver, ...); keep polling until the cap
+            self.stable = 0
+        return self.stable >= STABLE_POLLS
+
+
+def wait_for_dom_stable(driver, max_wait=2.0):
+    """Wait for the DOM to stop changing after an interaction (scroll, expander click)."""
+    return wait_for_page(driver, 'dom_settle', max_wait=max_wait)
+
+
+def record_wait(page_type, seconds, ready):
+    with _stats_lock:
+        _wait_stats.append((page_type, seconds, ready))
+
+
+def wait_stats_summary():
+    """Return {page_type: {count, total_s, avg_s, max_s, budget_s, timeouts}} for all waits so far."""
+    with _stats_lock:
+        stats = list(_wait_stats)
+    summary = {}
+    for page_type, seconds, ready in stats:
+        entry = summary.setdefault(page_type, {'count': 0, 'total_s': 0.0, 'max_s': 0.0, 'timeouts': 0})
+        entry['count'] += 1
+        entry['total_s'] += seconds
+        entry['max_s'] = max(entry['max_s'], seconds)
+        if not ready:
+            entry['timeouts'] += 1
+    for page_type, entry in summary.items():
+        entry['avg_s'] = entry['total_s'] / entry['count']
+        entry['budget_s'] = PAGE_MAX_WAIT.get(page_type, 0.0) * entry['count']
+    return summary
+
+
+def print_wait_stats():
+    """Print per-page-type wait latency against the old fixed-sleep budget."""
+    summary = wait_stats_summary()
+    if not summary:
+        return
+    print("   ⏱️  Page waits (actual vs old fixed sleeps):")
+    for page_type, entry in sorted(summary.items()):
+        print(f"      {page_type}: {entry['count']} waits | avg {entry['avg_s']:.2f}s | max {entry['max_s']:.2f}s"
+              f" | total {entry['total_s']:.1f}s vs {entry['budget_s']:.1f}s | timeouts {entry['timeouts']}")
+
+
+def reset_wait_stats():
+    with _stats_lock:
+        _wait_stats.clear()
@@ -0,0 +1,213 @@
+"""
+LulSec run metrics - per-phase telemetry, JSON run report and Prometheus textfile
+
+One RunMetrics per process run (get_metrics()), filled from the places that
+do the work: phase timers in odds_market_combo(), page loads per URL class
+(page_cache.load_page, load_odds_page, pair-link tabs, MMAFightScraper loads),
+BeautifulSoup parse time per parse target (html_parsing.make_soup), roster
+rows matched/skipped, pair-link fetches, page-cache hits and the output totals.
+
+At the end of a run:
+  RUN_REPORT (default: run_report.json, 0 disables)  full JSON report, incl. per-event timings
+  PROM_TEXTFILE (default: off)                        Prometheus textfile-collector file
+Both are written to a temp file and renamed, so collectors never read a partial file.
+
+Watch mode (odds_watch.py) has no end of run: it writes both after every output
+write and starts a fresh RunMetrics (job odds_watch) for the next window, with
+the per-event list capped.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+METRIC_PREFIX = 'lulsec_odds_'
+
+METRIC_HELP = {
+    'phase_seconds': 'Wall time of each phase of the last run.',
+    'page_load_seconds': 'Browser page load time (get + readiness wait) by URL class.',
+    'parse_seconds': 'BeautifulSoup parse time by parse target.',
+    'event_extract_seconds': 'Per-event odds extraction time.',
+    'odds_rows_matched_total': 'Odds table rows matched to a roster fighter.',
+    'odds_rows_skipped_total': 'Odds table rows skipped (not on the card).',
+    'pair_link_fetches_total': 'Per-fight odds pages loaded by the pair-link fallback.',
+    'events_total': 'Events by extraction outcome.',
+    'events_reused': 'Events reused unchanged by change detection.',
+    'page_cache_requests_total': 'Run page cache lookups by result.',
+    'page_cache_evictions_total': 'Run page cache evictions.',
+    'fighters_written': 'Fighter rows written to the outputs.',
+    'events_discovered': 'Events found in discovery.',
+    'history_lines_appended': 'Changed odds lines appended to the history store.',
+    'change_feed_records': 'Records appended to the NDJSON change feed.',
+    'line_moves': 'Line moves folded into the line-movement stats this run.',
+    'steam_signals': 'Steam signals (several books moving a fighter the same way within the window) detected this run.',
+    'validation_failures': 'Output validation thresholds failed (dups, bleed, coverage).',
+    'arbitrage_opportunities': 'Fights whose best prices across books sum to under 100% implied probability.',
+    'run_success': '1 if the last run wrote its outputs, else 0.',
+    'run_duration_seconds': 'Wall time of the last run.',
+    'last_run_timestamp_seconds': 'Unix time the last run finished.',
+}
+
+
+def _labels_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key):
+    if not key:
+        return ''
+    body = ','.join('{}="{}"'.format(k, v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k, v in key)
+    return '{' + body + '}'
+
+
+def _format_value(value):
+    if isinstance(value, bool) or isinstance(value, int):
+        return str(int(value))
+    return repr(float(value))
+
+
+class RunMetrics:
+    """Thread-safe counters, gauges and timing summaries for one run."""
+
+    def __init__(self, job='odds_market_combo', max_events=None):
+        self.job = job
+        self.started_at = time.time()
+        self._started = time.monotonic()
+        self._last_lap = self._started
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.summaries = {}
+        self.phases = []
+        # Per-event records; long-lived jobs (watch mode) keep only the last max_events
+        self.events = deque(maxlen=max_events) if max_events else []
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.gauges[(name, _labels_key(labels))] = value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            entry = self.summaries.setdefault(key, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - started, **labels)
+
+    def add_phase(self, name, seconds):
+        with self._lock:
+            self.phases.append((name, seconds))
+        self.set('phase_seconds', seconds, phase=name)
+
+    def lap(self, name):
+        """Close phase `name`: the time since the previous lap (or the run start)."""
+        now = time.monotonic()
+        seconds, self._last_lap = now - self._last_lap, now
+        self.add_phase(name, seconds)
+
+    @contextmanager
+    def phase(self, name):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.monotonic() - started)
+            self._last_lap = time.monotonic()
+
+    def record_event(self, **fields):
+        with self._lock:
+            self.events.append(fields)
+
+    def finish(self, success):
+        self.set('run_success', 1 if success else 0)
+        self.set('run_duration_seconds', time.monotonic() - self._started)
+        self.set('last_run_timestamp_seconds', time.time())
+
+    def to_report(self):
+        with self._lock:
+            counters = [{'name': n, 'labels': dict(k), 'value': v} for (n, k), v in sorted(self.counters.items())]
+            gauges = [{'name': n, 'labels': dict(k), 'value': v} for (n, k), v in sorted(self.gauges.items())]
+            timings = [{'name': n, 'labels': dict(k), 'count': c, 'total_s': s, 'avg_s': s / c if c else 0.0, 'max_s': m}
+                       for (n, k), (c, s, m) in sorted(self.summaries.items())]
+            return {
+                'job': self.job,
+                'started_at': self.started_at,
+                'phases': [{'phase': p, 'seconds': s} for p, s in self.phases],
+                'counters': counters,
+                'gauges': gauges,
+                'timings': timings,
+                'events': list(self.events),
+            }
+
+    def to_prometheus(self):
+        lines = []
+        with self._lock:
+            by_name = {}
+            for (name, key), value in self.counters.items():
+                by_name.setdefault((name, 'counter'), []).append((name, key, value))
+            for (name, key), value in self.gauges.items():
+                by_name.setdefault((name, 'gauge'), []).append((name, key, value))
+            for (name, key), (count, total, _max) in self.summaries.items():
+                rows = by_name.setdefault((name, 'summary'), [])
+                rows.append((name + '_sum', key, total))
+                rows.append((name + '_count', key, count))
+        for (name, kind), rows in sorted(by_name.items()):
+            full = METRIC_PREFIX + name
+            lines.append(f"# HELP {full} {METRIC_HELP.get(name, name.replace('_', ' '))}")
+            lines.append(f"# TYPE {full} {kind}")
+            for sample, key, value in sorted(rows):
+                key = key + (('job', self.job),)
+                lines.append(f"{METRIC_PREFIX}{sample}{_format_labels(key)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def write_outputs(self):
+        """Write the JSON report and Prometheus textfile configured via RUN_REPORT / PROM_TEXTFILE."""
+        report_path = os.getenv('RUN_REPORT', 'run_report.json').strip()
+        if report_path and report_path != '0':
+            _write_atomically(report_path, json.dumps(self.to_report(), indent=2))
+            print(f"   📈 Run report: {report_path}")
+        prom_path = os.getenv('PROM_TEXTFILE', '').strip()
+        if prom_path and prom_path != '0':
+            _write_atomically(prom_path, self.to_prometheus())
+            print(f"   📈 Prometheus textfile: {prom_path}")
+
+
+def _write_atomically(path, text):
+    try:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"   ⚠️  Metrics write failed ({path}): {str(e)}")
+
+
+_metrics = RunMetrics()
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    return _metrics
+
+
+def reset_metrics(job='odds_market_combo', max_events=None):
+    """Start a fresh RunMetrics (call at the start of a run)."""
+    global _metrics
+    with _metrics_lock:
+        _metrics = RunMetrics(job, max_events=max_events)
+        return _metrics
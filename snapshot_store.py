@@ -0,0 +1,228 @@
+"""
+LulSec snapshot store - record/replay of every page the scrapers fetch
+
+SNAPSHOT_MODE=record  wraps the Chrome driver and saves the final page_source of
+                      every URL it loads to SNAPSHOT_DIR (default: snapshots/).
+SNAPSHOT_MODE=replay  swaps Chrome for a ReplayDriver that serves those files, so
+                      odds_market_combo() and MMAFightScraper.run_scraper() run
+                      offline at parsing speed (profiling, benchmarks, reprocessing
+                      old captures).
+
+Layout: one HTML file per URL named by a hash of the URL, plus index.json
+mapping URL -> {file, fetched_at}.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from urllib.parse import urljoin
+
+from html_parsing import make_soup
+
+
+def snapshot_mode():
+    """Return 'record', 'replay' or '' from the SNAPSHOT_MODE env var."""
+    mode = os.getenv('SNAPSHOT_MODE', '').strip().lower()
+    return mode if mode in ('record', 'replay') else ''
+
+
+def snapshot_dir():
+    return os.getenv('SNAPSHOT_DIR', 'snapshots')
+
+
+def normalize_snapshot_url(url):
+    return (url or '').strip().rstrip('/')
+
+
+class SnapshotStore:
+    """URL-keyed HTML snapshots on disk."""
+
+    def __init__(self, directory=None):
+        self.directory = directory or snapshot_dir()
+        self.index_path = os.path.join(self.directory, 'index.json')
+        self._lock = threading.Lock()
+        self.index = {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except Exception:
+            self.index = {}
+
+    @staticmethod
+    def key_for(url):
+        return hashlib.sha1(normalize_snapshot_url(url).encode('utf-8')).hexdigest()[:20]
+
+    def save(self, url, html):
+        """Store html for url, replacing any earlier capture of the same URL."""
+        if not url or html is None:
+            return
+        key = normalize_snapshot_url(url)
+        filename = f"{self.key_for(url)}.html"
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, filename)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(html)
+            os.replace(tmp_path, path)
+            self.index[key] = {'file': filename, 'fetched_at': datetime.now().isoformat()}
+            tmp_index = self.index_path + '.tmp'
+            with open(tmp_index, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, indent=2)
+            os.replace(tmp_index, self.index_path)
+
+    def load(self, url):
+        """Return the recorded html for url, or None if it was never captured."""
+        entry = self.index.get(normalize_snapshot_url(url))
+        if not entry:
+            return None
+        try:
+            with open(os.path.join(self.directory, entry['file']), 'r', encoding='utf-8') as f:
+                return f.read()
+        except Exception:
+            return None
+
+    def urls(self):
+        return list(self.index.keys())
+
+
+class RecordingDriver:
+    """Transparent driver proxy that snapshots page_source under the requested URL.
+
+    Every read of page_source overwrites the capture for the current URL, so the
+    stored page is the final state the pipeline parsed (after scrolling/expanding).
+    The URL is tracked per window handle: get() sets it for the current window,
+    track_window() for tabs opened without get() (window.open).
+    """
+
+    def __init__(self, driver, store):
+        self._driver = driver
+        self._store = store
+        self._requested_urls = {}  # window handle -> URL loaded in it
+
+    def _window(self):
+        try:
+            return self._driver.current_window_handle
+        except Exception:
+            return None
+
+    def get(self, url):
+        self._requested_urls[self._window()] = url
+        return self._driver.get(url)
+
+    def track_window(self, handle, url):
+        """Save captures read while handle is selected under url."""
+        self._requested_urls[handle] = url
+
+    def close(self):
+        self._requested_urls.pop(self._window(), None)
+        return self._driver.close()
+
+    @property
+    def page_source(self):
+        html = self._driver.page_source
+        url = self._requested_urls.get(self._window())
+        if url:
+            try:
+                self._store.save(url, html)
+            except Exception as e:
+                print(f"      ⚠️ Snapshot save failed for {url}: {e}")
+        return html
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+class ReplayElement:
+    """Minimal stand-in for a selenium WebElement backed by a parsed anchor."""
+
+    def __init__(self, tag, base_url):
+        self._tag = tag
+        self._base_url = base_url
+
+    @property
+    def text(self):
+        return self._tag.get_text(' ', strip=True)
+
+    def get_attribute(self, name):
+        value = self._tag.get(name)
+        if name == 'href' and value:
+            return urljoin(self._base_url, value)
+        return value
+
+    def click(self):
+        pass
+
+
+class ReplayDriver:
+    """Chrome-free driver that serves recorded snapshots.
+
+    Supports the subset of the WebDriver API the scrapers use: get, page_source,
+    current_url, execute_script (no-op), find_elements for '/mma-events/' anchors.
+    """
+
+    is_replay = True
+
+    def __init__(self, store):
+        self._store = store
+        self.current_url = ''
+        self._html = ''
+        self.misses = []
+
+    def get(self, url):
+        self.current_url = url
+        html = self._store.load(url)
+        if html is None:
+            self.misses.append(url)
+            print(f"      📼 No snapshot for {url}")
+            html = ''
+        self._html = html
+
+    @property
+    def page_source(self):
+        return self._html
+
+    def execute_script(self, script, *args):
+        return None
+
+    def find_elements(self, by=None, value=None):
+        if value and '/mma-events/' in value and '@href' in value:
+            soup = make_soup(self._html, only='anchors')
+            return [ReplayElement(a, self.current_url) for a in soup.select("a[href*='/mma-events/']")]
+        return []
+
+    def set_page_load_timeout(self, seconds):
+        pass
+
+    def quit(self):
+        if self.misses:
+            print(f"   📼 Replay finished with {len(self.misses)} missing snapshot(s)")
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def get_snapshot_store():
+    """Process-wide SnapshotStore so pooled drivers share one index."""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None or _shared_store.directory != snapshot_dir():
+            _shared_store = SnapshotStore()
+        return _shared_store
+
+
+def create_replay_driver():
+    store = get_snapshot_store()
+    print(f"   📼 Replay mode: serving {len(store.urls())} snapshot(s) from {store.directory} (no Chrome)")
+    return ReplayDriver(store)
+
+
+def wrap_for_recording(driver):
+    """Wrap driver in a RecordingDriver when SNAPSHOT_MODE=record, else return it unchanged."""
+    if driver is None or snapshot_mode() != 'record':
+        return driver
+    store = get_snapshot_store()
+    print(f"   📼 Record mode: saving fetched pages to {store.directory}")
+    return RecordingDriver(driver, store)
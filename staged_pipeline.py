@@ -0,0 +1,167 @@
+"""
+LulSec staged pipeline - overlap page fetching with parsing/matching and writing
+
+    fetch (one thread per driver) -> [bounded queue] -> extract (worker pool)
+        -> [bounded queue] -> write (single thread, delivers in item order)
+
+The fetch stage only drives the browser; the extract stage parses, roster
+matches and merges while the drivers are already loading the next pages.
+Bounded queues give back-pressure: a driver stops fetching ahead when the
+extract workers fall behind, so at most queue_size fetched pages wait per queue.
+
+Each stage reports items processed, busy seconds, throughput and the depth
+of the queue feeding it (max / average at enqueue time).
+"""
+import queue
+import threading
+import time
+
+_DONE = object()
+
+
+class StageStats:
+    """Counters for one pipeline stage and the queue in front of it."""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.errors = 0
+        self.busy_s = 0.0
+        self.depth_samples = 0
+        self.depth_total = 0
+        self.max_depth = 0
+
+    def sample_depth(self, depth):
+        with self._lock:
+            self.depth_samples += 1
+            self.depth_total += depth
+            self.max_depth = max(self.max_depth, depth)
+
+    def record(self, seconds, ok=True):
+        with self._lock:
+            self.processed += 1
+            self.busy_s += seconds
+            if not ok:
+                self.errors += 1
+
+    def summary(self, wall_s):
+        with self._lock:
+            return {
+                'stage': self.name,
+                'processed': self.processed,
+                'errors': self.errors,
+                'busy_s': self.busy_s,
+                'throughput_per_s': self.processed / wall_s if wall_s > 0 else 0.0,
+                'max_queue_depth': self.max_depth,
+                'avg_queue_depth': self.depth_total / self.depth_samples if self.depth_samples else 0.0,
+            }
+
+
+class StagedPipeline:
+    """Run items through fetch -> extract -> write with bounded queues between stages.
+
+    fetch(worker, item) runs on the fetch thread owning `worker` (e.g. a driver);
+    extract(worker, item, fetched) runs in the extract pool with the worker that
+    fetched the item; deliver(item, result) runs on the write thread, in item order.
+    A failing fetch/extract yields result None for that item.
+    """
+
+    def __init__(self, fetch, extract, deliver, extract_workers=2, queue_size=2):
+        self.fetch = fetch
+        self.extract = extract
+        self.deliver = deliver
+        self.extract_workers = max(1, extract_workers)
+        self.queue_size = max(1, queue_size)
+        self.stats = {name: StageStats(name) for name in ('fetch', 'extract', 'write')}
+        self.wall_s = 0.0
+
+    def _put(self, q, stage, item):
+        q.put(item)
+        self.stats[stage].sample_depth(q.qsize())
+
+    def run(self, items, fetch_workers):
+        items = list(items)
+        started = time.monotonic()
+        todo = queue.Queue()
+        for entry in enumerate(items):
+            todo.put(entry)
+        fetched_q = queue.Queue(maxsize=self.queue_size)
+        results_q = queue.Queue(maxsize=self.queue_size)
+        self.stats['fetch'].sample_depth(todo.qsize())
+
+        def fetch_loop(worker):
+            while True:
+                try:
+                    index, item = todo.get_nowait()
+                except queue.Empty:
+                    return
+                t0 = time.monotonic()
+                try:
+                    fetched, ok = self.fetch(worker, item), True
+                except Exception as e:
+                    print(f"      ❌ Fetch error: {str(e)}")
+                    fetched, ok = None, False
+                self.stats['fetch'].record(time.monotonic() - t0, ok)
+                self._put(fetched_q, 'extract', (index, item, worker, fetched, ok))
+
+        def extract_loop():
+            while True:
+                job = fetched_q.get()
+                if job is _DONE:
+                    return
+                index, item, worker, fetched, ok = job
+                t0 = time.monotonic()
+                result = None
+                if ok:
+                    try:
+                        result = self.extract(worker, item, fetched)
+                    except Exception as e:
+                        print(f"      ❌ Extract error: {str(e)}")
+                        ok = False
+                self.stats['extract'].record(time.monotonic() - t0, ok)
+                self._put(results_q, 'write', (index, item, result))
+
+        def write_loop():
+            finished = {}
+            next_index = 0
+            while next_index < len(items):
+                job = results_q.get()
+                if job is _DONE:
+                    return
+                index, item, result = job
+                finished[index] = (item, result)
+                while next_index in finished:
+                    ready_item, ready_result = finished.pop(next_index)
+                    t0 = time.monotonic()
+                    ok = True
+                    try:
+                        self.deliver(ready_item, ready_result)
+                    except Exception as e:
+                        print(f"      ❌ Write error: {str(e)}")
+                        ok = False
+                    self.stats['write'].record(time.monotonic() - t0, ok)
+                    next_index += 1
+
+        fetchers = [threading.Thread(target=fetch_loop, args=(w,), daemon=True) for w in fetch_workers]
+        extractors = [threading.Thread(target=extract_loop, daemon=True) for _ in range(self.extract_workers)]
+        writer = threading.Thread(target=write_loop, daemon=True)
+        for t in fetchers + extractors + [writer]:
+            t.start()
+        for t in fetchers:
+            t.join()
+        for _ in extractors:
+            fetched_q.put(_DONE)
+        for t in extractors:
+            t.join()
+        writer.join()
+        self.wall_s = time.monotonic() - started
+
+    def summary(self):
+        return [self.stats[name].summary(self.wall_s) for name in ('fetch', 'extract', 'write')]
+
+    def print_stats(self):
+        print(f"   🏭 Staged pipeline: {self.wall_s:.1f}s wall | {self.extract_workers} extract worker(s) | queue size {self.queue_size}")
+        for s in self.summary():
+            print(f"      {s['stage']}: {s['processed']} done ({s['errors']} errors) | busy {s['busy_s']:.1f}s"
+                  f" | {s['throughput_per_s']:.2f}/s | queue max {s['max_queue_depth']} avg {s['avg_queue_depth']:.1f}")
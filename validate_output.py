@@ -1,73 +1,340 @@
 #!/usr/bin/env python3
+"""
+Streaming validator for OddsMarketCombo.csv/.json
+
+    python validate_output.py [csv_path] [json_path] [--max-dups N] [--max-bleed N]
+                              [--min-coverage F] [--max-mismatches N] [--no-json] [--report]
+
+One pass over the CSV rows (and, in lockstep, the JSON fighters) computes:
+
+  dups_by_event_fighter   rows repeating an (Event, Fighter) pair
+  cross_event_bleed       rows whose fighter was first seen under another event
+  events                  per-event fighters, fighters with at least one line, coverage
+  json                    CSV/JSON consistency: row counts, total_fighters,
+                          sportsbooks header and row-by-row fields and odds
+
+Memory stays constant apart from the (Event, Fighter) key set and the
+fighter → first event map: the CSV is read with csv.reader, the JSON with an
+incremental decoder that holds one fighter at a time, so multi-GB files
+validate without loading them.
+
+The result is a dict (see validate_rows()); failures lists every threshold that
+failed and the CLI exits 1 when it is not empty. Phase 4 calls validate_matrix()
+on the in-memory odds matrix right after writing (validate_run(): VALIDATE_OUTPUT=0
+disables, VALIDATE_MIN_COVERAGE sets the coverage threshold), so the files are
+not re-read.
+"""
+import argparse
 import csv
 import json
-from collections import defaultdict
+import os
+import sys
+from itertools import zip_longest
 
 CSV_PATH = 'OddsMarketCombo.csv'
 JSON_PATH = 'OddsMarketCombo.json'
+EXAMPLE_LIMIT = 10
+JSON_HEAD_KEYS = ('extraction_run_id', 'total_fighters', 'total_events', 'sportsbooks')
+JSON_FIELDS = {'Fighter': 'fighter', 'Event': 'event', 'EventDate': 'event_date', 'FightOrder': 'fight_order', 'Source': 'source'}
+DEFAULT_THRESHOLDS = {'max_dups': 0, 'max_bleed': 0, 'min_coverage': 0.0, 'max_mismatches': 0}
 
-def main():
-    rows = list(csv.reader(open(CSV_PATH, encoding='utf-8')))
-    if not rows:
-        print('CSV empty')
-        return
-    hdr = rows[0]
-    data = [dict(zip(hdr, r)) for r in rows[1:]]
 
-    # columns
-    try:
-        col_source = hdr.index('Source')
-    except ValueError:
-        print('Missing Source column')
-        return
-    book_idx = list(range(col_source + 1, len(hdr)))
+class _JsonStream:
+    """Incremental reader over a JSON document: one value decoded at a time from a sliding buffer."""
+
+    def __init__(self, f, chunk_size=1 << 20):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        if self.eof:
+            return False
+        data = self.f.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character ('' at end of input)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"JSON: expected {char!r}, found {found!r}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A value ending exactly at the buffer edge may be cut (e.g. a number): read on first
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def iter_json_fighters(json_path, head):
+    """Yield the "fighters" entries of an OddsMarketCombo.json one by one; JSON_HEAD_KEYS values go into head."""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        stream = _JsonStream(f)
+        stream.expect('{')
+        if stream.peek() == '}':
+            return
+        while True:
+            key = stream.value()
+            stream.expect(':')
+            if key == 'fighters':
+                stream.expect('[')
+                if stream.peek() == ']':
+                    stream.pos += 1
+                else:
+                    while True:
+                        yield stream.value()
+                        sep = stream.peek()
+                        stream.pos += 1
+                        if sep == ']':
+                            break
+                        if sep != ',':
+                            raise ValueError(f"JSON: expected ',' or ']' in fighters, found {sep!r}")
+            else:
+                value = stream.value()
+                if key in JSON_HEAD_KEYS:
+                    head[key] = value
+            sep = stream.peek()
+            stream.pos += 1
+            if sep == '}':
+                return
+            if sep != ',':
+                raise ValueError(f"JSON: expected ',' or '}}', found {sep!r}")
+
+
+def _example(examples, item):
+    if len(examples) < EXAMPLE_LIMIT:
+        examples.append(item)
+
+
+def _row_mismatch(row, fighter, header, i_source, book_set):
+    """First differing column between a CSV row and a JSON fighter, or None."""
+    for column, cell in zip(header[:i_source + 1], row):
+        want = fighter.get(JSON_FIELDS.get(column, column), '')
+        if cell != want and str(cell) != ('' if want is None else str(want)):
+            return column
+    books = header[i_source + 1:]
+    odds = fighter.get('odds') or {}
+    cells = row[i_source + 1:]
+    if cells != [odds.get(book, '') for book in books]:
+        for book, cell in zip(books, cells):
+            if str(cell) != str(odds.get(book, '')):
+                return book
+    if not odds.keys() <= book_set:
+        return next(book for book in odds if book not in book_set)
+    return None
+
+
+def validate_rows(header, rows, json_fighters=None, json_head=None, max_dups=0, max_bleed=0,
+                  min_coverage=0.0, max_mismatches=0):
+    """Validate CSV-layout rows (header + row iterable) in one pass.
+
+    json_fighters (optional) is compared against the rows in lockstep; json_head is
+    filled with the JSON head values while it is consumed. Returns the result dict.
+    """
+    header = [str(h) for h in header]
+    if 'Source' not in header or 'Event' not in header or 'Fighter' not in header:
+        raise ValueError('Missing Fighter/Event/Source column')
+    i_source = header.index('Source')
+    i_event = header.index('Event')
+    i_fighter = header.index('Fighter')
+    books = header[i_source + 1:]
+    book_set = set(books)
 
-    # Duplicates by (Event, Fighter)
     seen_pairs = set()
-    dups = 0
-    for d in data:
-        k = (d.get('Event',''), d.get('Fighter',''))
-        if k in seen_pairs:
+    fighter_to_event = {}
+    dups = bleed = rows_total = 0
+    dup_examples, bleed_examples = [], []
+    event_counts = {}
+    json_result = None
+    if json_fighters is not None:
+        json_result = {'fighters': 0, 'missing_rows': 0, 'extra_rows': 0, 'row_mismatches': 0, 'mismatch_examples': []}
+    json_head = {} if json_head is None else json_head
+
+    pairs = zip_longest(rows, json_fighters) if json_fighters is not None else ((row, None) for row in rows)
+    for row, fighter in pairs:
+        if fighter is not None:
+            json_result['fighters'] += 1
+        if row is None:
+            json_result['extra_rows'] += 1
+            continue
+        rows_total += 1
+        event, name = row[i_event], row[i_fighter]
+
+        key = (event, name)
+        if key in seen_pairs:
             dups += 1
+            _example(dup_examples, [event, name])
         else:
-            seen_pairs.add(k)
-    print('dups_by_event_fighter =', dups)
+            seen_pairs.add(key)
 
-    # Cross-event bleed
-    fighter_to_event = {}
-    cross = []
-    for d in data:
-        f = d.get('Fighter','')
-        e = d.get('Event','')
-        if f in fighter_to_event and fighter_to_event[f] != e:
-            cross.append((f, fighter_to_event[f], e))
-        else:
-            fighter_to_event[f] = e
-    print('cross_event_bleed =', len(cross))
-
-    # Per-event counts and odds coverage
-    event_to_rows = defaultdict(list)
-    for d in data:
-        event_to_rows[d.get('Event','')].append(d)
-    events = sorted(event_to_rows.keys())
-    print('events_total =', len(events))
-    for e in events:
-        erows = event_to_rows[e]
-        with_odds = 0
-        for d in erows:
-            if any(d.get(hdr[i], '').strip() for i in book_idx):
-                with_odds += 1
-        print(f'event: {e} | fighters: {len(erows)} | with_odds: {with_odds}')
-
-    # JSON sanity
+        first_event = fighter_to_event.get(name)
+        if first_event is None:
+            fighter_to_event[name] = event
+        elif first_event != event:
+            bleed += 1
+            _example(bleed_examples, [name, first_event, event])
+
+        counts = event_counts.get(event)
+        if counts is None:
+            counts = event_counts[event] = [0, 0]
+        counts[0] += 1
+        if any(str(cell).strip() for cell in row[i_source + 1:]):
+            counts[1] += 1
+
+        if json_result is not None:
+            if fighter is None:
+                json_result['missing_rows'] += 1
+                continue
+            field = _row_mismatch(row, fighter, header, i_source, book_set)
+            if field is not None:
+                json_result['row_mismatches'] += 1
+                _example(json_result['mismatch_examples'], {'row': rows_total, 'fighter': name, 'field': field})
+
+    events = [{'event': event, 'fighters': total, 'with_odds': with_odds, 'coverage': round(with_odds / total, 4)}
+              for event, (total, with_odds) in sorted(event_counts.items())]
+    failures = []
+    if not rows_total:
+        failures.append('no rows')
+    if dups > max_dups:
+        failures.append(f"dups_by_event_fighter {dups} > {max_dups}")
+    if bleed > max_bleed:
+        failures.append(f"cross_event_bleed {bleed} > {max_bleed}")
+    if min_coverage > 0:
+        for e in events:
+            if e['coverage'] < min_coverage:
+                failures.append(f"coverage {e['coverage']:.2f} < {min_coverage:.2f} for {e['event']}")
+
+    if json_result is not None:
+        json_result['total_fighters'] = json_head.get('total_fighters')
+        json_result['total_events'] = json_head.get('total_events')
+        json_result['sportsbooks_match'] = json_head.get('sportsbooks') == books
+        mismatches = json_result['row_mismatches'] + json_result['missing_rows'] + json_result['extra_rows']
+        if mismatches > max_mismatches:
+            failures.append(f"csv/json row mismatches {mismatches} > {max_mismatches}")
+        if json_result['total_fighters'] != rows_total:
+            failures.append(f"json total_fighters {json_result['total_fighters']} != csv rows {rows_total}")
+        if not json_result['sportsbooks_match']:
+            failures.append('json sportsbooks != csv book columns')
+
+    return {
+        'rows': rows_total,
+        'events_total': len(events),
+        'dups_by_event_fighter': dups,
+        'dup_examples': dup_examples,
+        'cross_event_bleed': bleed,
+        'bleed_examples': bleed_examples,
+        'events': events,
+        'json': json_result,
+        'failures': failures,
+        'ok': not failures,
+    }
+
+
+def validate_files(csv_path=CSV_PATH, json_path=JSON_PATH, check_json=True, **thresholds):
+    """Stream-validate the written CSV (and JSON) files."""
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return {'rows': 0, 'failures': ['CSV empty'], 'ok': False}
+        json_head = {}
+        fighters = iter_json_fighters(json_path, json_head) if check_json and json_path else None
+        return validate_rows(header, reader, fighters, json_head, **thresholds)
+
+
+def validate_matrix(matrix, **thresholds):
+    """Validate a run's OddsMatrix in-process (same rows as the CSV it was written to)."""
+    from odds_output import CSV_FIXED_COLUMNS
+    return validate_rows(CSV_FIXED_COLUMNS + matrix.sportsbooks, matrix.csv_rows(), **thresholds)
+
+
+def validate_run(matrix):
+    """Phase 4 hook: validate the run's matrix in-process (VALIDATE_OUTPUT=0 disables) and print a summary line."""
+    if os.getenv('VALIDATE_OUTPUT', '1').strip() == '0':
+        return None
     try:
-        j = json.load(open(JSON_PATH, encoding='utf-8'))
-        print('json_total_events =', j.get('total_events'))
-        print('json_total_fighters =', j.get('total_fighters'))
+        min_coverage = float(os.getenv('VALIDATE_MIN_COVERAGE', '0'))
+    except ValueError:
+        min_coverage = 0.0
+    try:
+        result = validate_matrix(matrix, min_coverage=min_coverage)
     except Exception as e:
-        print('json read error:', e)
+        print(f"   ⚠️  Output validation error: {str(e)}")
+        return None
+    status = 'OK' if result['ok'] else f"{len(result['failures'])} failure(s)"
+    print(f"   🔎 Validation: {result['rows']} rows, {result['events_total']} events, "
+          f"{result['dups_by_event_fighter']} dups, {result['cross_event_bleed']} bleed - {status}")
+    for failure in result['failures']:
+        print(f"   ⚠️  Validation failed: {failure}")
+    return result
 
-if __name__ == '__main__':
-    main()
 
+def print_result(result):
+    print('dups_by_event_fighter =', result.get('dups_by_event_fighter', 0))
+    print('cross_event_bleed =', result.get('cross_event_bleed', 0))
+    print('events_total =', result.get('events_total', 0))
+    for e in result.get('events', []):
+        print(f"event: {e['event']} | fighters: {e['fighters']} | with_odds: {e['with_odds']}")
+    json_result = result.get('json')
+    if json_result:
+        print('json_total_events =', json_result['total_events'])
+        print('json_total_fighters =', json_result['total_fighters'])
+        print('json_row_mismatches =', json_result['row_mismatches'] + json_result['missing_rows'] + json_result['extra_rows'])
+    for failure in result.get('failures', []):
+        print('FAIL:', failure)
 
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Validate OddsMarketCombo.csv/.json in one streaming pass')
+    parser.add_argument('csv_path', nargs='?', default=CSV_PATH)
+    parser.add_argument('json_path', nargs='?', default=JSON_PATH)
+    parser.add_argument('--max-dups', type=int, default=DEFAULT_THRESHOLDS['max_dups'])
+    parser.add_argument('--max-bleed', type=int, default=DEFAULT_THRESHOLDS['max_bleed'])
+    parser.add_argument('--min-coverage', type=float, default=DEFAULT_THRESHOLDS['min_coverage'],
+                        help='minimum share of fighters with a line, per event (0 = off)')
+    parser.add_argument('--max-mismatches', type=int, default=DEFAULT_THRESHOLDS['max_mismatches'])
+    parser.add_argument('--no-json', action='store_true', help='skip the CSV/JSON consistency check')
+    parser.add_argument('--report', action='store_true', help='print the result as JSON')
+    args = parser.parse_args(argv)
+    try:
+        result = validate_files(args.csv_path, args.json_path, check_json=not args.no_json,
+                                max_dups=args.max_dups, max_bleed=args.max_bleed,
+                                min_coverage=args.min_coverage, max_mismatches=args.max_mismatches)
+    except (OSError, ValueError) as e:
+        print('validation error:', e)
+        return 2
+    if args.report:
+        print(json.dumps(result, indent=2))
+    else:
+        print_result(result)
+    return 0 if result['ok'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())